@@ -0,0 +1,93 @@
+""" Compares the throughput of the /books_by_language route in database mode under each connection pool, with and
+without the SQLite pragmas of config.Config.
+
+Run from the project root:
+
+    python -m benchmarks.bench_engine_pool 10000 --requests 500 --threads 4
+
+The database is populated once, without pragmas, and the settings without pragmas are timed first, as the WAL
+journal mode stays set in the database file once a connection has set it. StaticPool shares one connection, so it is
+only timed on a single thread.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy.orm import clear_mappers
+
+from capitulo import create_app
+from capitulo.adapters.engine_factory import DEFAULT_SQLITE_PRAGMAS
+from benchmarks.synthetic import write_synthetic_data
+
+DEFAULT_SIZE = 10000
+# (pool, whether the pragmas are set)
+SETTINGS = [('null', False), ('queue', False), ('null', True), ('queue', True), ('static', True)]
+PAGES = 20
+
+
+def create_database_app(data_path: Path, database_path: Path, pool: str, pragmas: bool):
+    # create_app maps the model again for every app, so the mappings of the previous one have to go first.
+    clear_mappers()
+    return create_app({
+        'TESTING': True,
+        'REPOSITORY': 'database',
+        'TEST_DATA_PATH': data_path,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+        'WTF_CSRF_ENABLED': False,
+        'DATABASE_POOL': pool,
+        'SQLITE_PRAGMAS': DEFAULT_SQLITE_PRAGMAS if pragmas else {}
+    })
+
+
+def requests_per_second(app, number_of_requests: int, threads: int) -> float:
+    urls = [f'/books_by_language?language=English&page={request_number % PAGES + 1}'
+            for request_number in range(number_of_requests)]
+
+    def get_pages(thread_urls):
+        client = app.test_client()
+        for url in thread_urls:
+            client.get(url)
+
+    get_pages(urls[:PAGES])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(get_pages, [urls[thread::threads] for thread in range(threads)]))
+    return number_of_requests / (time.perf_counter() - start)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('books', type=int, nargs='?', default=DEFAULT_SIZE)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=1)
+    arguments = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        data_path = write_synthetic_data(Path(temporary_folder) / 'data', arguments.books)
+        database_path = Path(temporary_folder) / 'benchmark.db'
+        create_database_app(data_path, database_path, 'null', False)
+
+        for pool, pragmas in SETTINGS:
+            if pool == 'static' and arguments.threads > 1:
+                continue
+            app = create_database_app(data_path, database_path, pool, pragmas)
+            results.append({
+                'benchmark': 'engine_pool',
+                'books': arguments.books,
+                'pool': pool,
+                'pragmas': pragmas,
+                'threads': arguments.threads,
+                'requests_per_second': round(requests_per_second(app, arguments.requests, arguments.threads), 1)
+            })
+            print(json.dumps(results[-1]))
+    clear_mappers()
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
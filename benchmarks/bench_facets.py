@@ -0,0 +1,66 @@
+""" Times combining facet filters with the FacetIndex of a synthetic catalogue, and counting every facet value.
+
+Run from the project root:
+
+    python -m benchmarks.bench_facets 10000 100000
+
+Each query filters on a language, a release year and a publisher, and reads the first page of matching book ids.
+"""
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from capitulo.adapters.facet_index import build_facet_index
+from capitulo.adapters.jsondatareader import BooksJSONReader
+from capitulo.adapters.memory_repository import MemoryRepository
+from benchmarks.synthetic import write_synthetic_catalogue
+
+DEFAULT_SIZES = [10000, 100000]
+QUERIES = 1000
+
+
+def main(sizes):
+    results = []
+    for number_of_books in sizes:
+        repo = MemoryRepository()
+        with tempfile.TemporaryDirectory() as temporary_folder:
+            books_file_path, authors_file_path = write_synthetic_catalogue(Path(temporary_folder), number_of_books)
+            repo.add_books(BooksJSONReader(books_file_path, authors_file_path).iter_books())
+
+        start = time.perf_counter()
+        facet_index = build_facet_index(repo)
+        build_seconds = time.perf_counter() - start
+
+        rng = random.Random(235)
+        filters = [{
+            'language': [rng.choice(facet_index.values('language'))],
+            'release_year': [rng.choice(facet_index.values('release_year'))],
+            'publisher': [rng.choice(facet_index.values('publisher'))]
+        } for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        for query in filters:
+            facet_index.book_ids(facet_index.select(query), 0, 20)
+        select_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in filters[:100]:
+            facet_index.counts(query)
+        count_seconds = time.perf_counter() - start
+
+        results.append({
+            'benchmark': 'facets',
+            'books': number_of_books,
+            'build_milliseconds': round(build_seconds * 1e3, 1),
+            'select_microseconds': round(select_seconds / QUERIES * 1e6, 1),
+            'counts_microseconds': round(count_seconds / 100 * 1e6, 1)
+        })
+        print(json.dumps(results[-1]))
+    return results
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
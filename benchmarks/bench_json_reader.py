@@ -0,0 +1,64 @@
+""" Times BooksJSONReader.read_json_files over growing synthetic catalogues.
+
+Run from the project root:
+
+    python -m benchmarks.bench_json_reader 1000 10000 100000 1000000
+
+With the author lookup built once, the time per record should stay roughly flat as the catalogue grows. Each size is
+timed twice: once as the application runs it, and once with the cyclic garbage collector paused, which isolates the
+reader's own cost from collector passes over the growing heap.
+
+Each size is also read with all of its books spread over FEW_PUBLISHERS publishers, so that any per-publisher cost
+that grows with the number of books the publisher has shows up too.
+"""
+import gc
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from capitulo.adapters.jsondatareader import BooksJSONReader
+from benchmarks.synthetic import write_synthetic_catalogue
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+FEW_PUBLISHERS = 2
+
+
+def time_read_json_files(books_file_path: Path, authors_file_path: Path, pause_gc: bool = False) -> float:
+    reader = BooksJSONReader(books_file_path, authors_file_path)
+    gc.collect()
+    if pause_gc:
+        gc.disable()
+    try:
+        start = time.perf_counter()
+        reader.read_json_files()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def main(sizes):
+    results = []
+    for number_of_books in sizes:
+        # None leaves write_synthetic_catalogue to spread the books over one publisher per hundred books.
+        for number_of_publishers in (None, FEW_PUBLISHERS):
+            with tempfile.TemporaryDirectory() as temporary_folder:
+                books_file_path, authors_file_path = write_synthetic_catalogue(
+                    Path(temporary_folder), number_of_books, number_of_publishers=number_of_publishers)
+                seconds = time_read_json_files(books_file_path, authors_file_path)
+                seconds_without_gc = time_read_json_files(books_file_path, authors_file_path, pause_gc=True)
+            results.append({
+                'benchmark': 'read_json_files',
+                'books': number_of_books,
+                'publishers': number_of_publishers or max(1, number_of_books // 100),
+                'seconds': round(seconds, 4),
+                'microseconds_per_book': round(seconds / number_of_books * 1e6, 2),
+                'microseconds_per_book_without_gc': round(seconds_without_gc / number_of_books * 1e6, 2)
+            })
+            print(json.dumps(results[-1]))
+    return results
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
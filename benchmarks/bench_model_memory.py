@@ -0,0 +1,94 @@
+""" Measures the memory the domain objects of a synthetic catalogue take up.
+
+Run from the project root:
+
+    python -m benchmarks.bench_model_memory 10000 100000
+
+The books are read with BooksJSONReader, so the figures include each book's share of its Publisher and Author objects,
+and the strings they all hold. bytes_saved_by_interning is the reader's estimate of what the values it shared between
+books would have taken otherwise.
+
+The books are read a second time with copies of the domain classes that don't declare __slots__, whose instances keep
+their attributes in an instance dict. bytes_per_book_without_slots is what the books take up that way.
+"""
+import ast
+import gc
+import inspect
+import json
+import sys
+import tempfile
+import tracemalloc
+import types
+from pathlib import Path
+from typing import Tuple
+
+from capitulo.adapters import jsondatareader
+from capitulo.adapters.jsondatareader import BooksJSONReader
+from capitulo.domain import model
+from benchmarks.synthetic import write_synthetic_catalogue
+
+DEFAULT_SIZES = [10000, 100000]
+
+
+def model_without_slots() -> types.ModuleType:
+    """ Returns a copy of capitulo.domain.model whose classes don't declare __slots__ """
+    tree = ast.parse(inspect.getsource(model))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            node.body = [statement for statement in node.body
+                         if not (isinstance(statement, ast.Assign) and
+                                 any(isinstance(target, ast.Name) and target.id == '__slots__'
+                                     for target in statement.targets))]
+    copy = types.ModuleType('model_without_slots')
+    exec(compile(tree, model.__file__, 'exec'), copy.__dict__)
+    return copy
+
+
+def measure_books(books_file_path: Path, authors_file_path: Path, domain_model: types.ModuleType = model) \
+        -> Tuple[int, int]:
+    """ Returns the bytes still allocated by reading the books, once the reader's temporary objects are gone, and
+        the bytes the reader's symbol table saved
+        The reader builds the books out of the classes of domain_model. """
+    classes = {name: getattr(jsondatareader, name) for name in ('Publisher', 'Author', 'Book')}
+    for name in classes:
+        setattr(jsondatareader, name, getattr(domain_model, name))
+    try:
+        reader = BooksJSONReader(books_file_path, authors_file_path)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start, _ = tracemalloc.get_traced_memory()
+            books = list(reader.iter_books())
+            gc.collect()
+            allocated, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del books
+    finally:
+        for name, cls in classes.items():
+            setattr(jsondatareader, name, cls)
+    return allocated - start, reader.symbols.bytes_saved
+
+
+def main(sizes):
+    results = []
+    without_slots = model_without_slots()
+    for number_of_books in sizes:
+        with tempfile.TemporaryDirectory() as temporary_folder:
+            books_file_path, authors_file_path = write_synthetic_catalogue(Path(temporary_folder), number_of_books)
+            allocated, bytes_saved = measure_books(books_file_path, authors_file_path)
+            allocated_without_slots, _ = measure_books(books_file_path, authors_file_path, without_slots)
+        results.append({
+            'benchmark': 'model_memory',
+            'books': number_of_books,
+            'bytes': allocated,
+            'bytes_per_book': round(allocated / number_of_books, 1),
+            'bytes_per_book_without_slots': round(allocated_without_slots / number_of_books, 1),
+            'bytes_saved_by_interning': bytes_saved
+        })
+        print(json.dumps(results[-1]))
+    return results
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,50 @@
+""" Times MemoryRepository.get_user as the number of users grows.
+
+Run from the project root:
+
+    python -m benchmarks.bench_user_lookup 1000 10000 100000 1000000
+
+Users are kept in a dict keyed by name, so the time per lookup should stay flat however many users there are.
+"""
+import json
+import random
+import sys
+import time
+
+from capitulo.adapters.memory_repository import MemoryRepository
+from capitulo.domain.model import User
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+LOOKUPS = 100000
+
+
+def time_get_user(repo: MemoryRepository, user_names, lookups: int = LOOKUPS) -> float:
+    # Half the lookups are for names that aren't registered, as when someone logs in with a typo.
+    rng = random.Random(235)
+    names = [rng.choice(user_names) if i % 2 == 0 else f'missing{i}' for i in range(lookups)]
+    start = time.perf_counter()
+    for name in names:
+        repo.get_user(name)
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    results = []
+    for number_of_users in sizes:
+        repo = MemoryRepository()
+        user_names = [f'user{i}' for i in range(number_of_users)]
+        for user_name in user_names:
+            repo.add_user(User(user_name, 'password1'))
+        seconds = time_get_user(repo, user_names)
+        results.append({
+            'benchmark': 'get_user',
+            'users': number_of_users,
+            'lookups': LOOKUPS,
+            'microseconds_per_lookup': round(seconds / LOOKUPS * 1e6, 3)
+        })
+        print(json.dumps(results[-1]))
+    return results
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,49 @@
+""" Compares two results files saved by benchmarks.suite, such as those of two commits.
+
+Run from the project root:
+
+    python -m benchmarks.compare before.json after.json
+
+Prints, for every benchmark in both files, its median time before and after and how many times slower the second is;
+a ratio below 1 is a speed-up.
+"""
+import json
+import sys
+
+
+def result_key(result: dict) -> tuple:
+    return result['benchmark'], result['repository'], result['books'], result['name']
+
+
+def result_time(result: dict) -> float:
+    # populate is timed once, in seconds; everything else per call
+    if 'median_microseconds' in result:
+        return result['median_microseconds']
+    return result['seconds'] * 1e6
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding='utf-8') as results_file:
+        report = json.load(results_file)
+    return {result_key(result): result for result in report['results']}, report.get('commit')
+
+
+def compare(before_path: str, after_path: str) -> list:
+    before, before_commit = load_results(before_path)
+    after, after_commit = load_results(after_path)
+    print(f'{"benchmark":<60} {before_commit or "before":>14} {after_commit or "after":>14} {"ratio":>7}')
+    rows = []
+    for key in before:
+        if key not in after:
+            continue
+        before_time, after_time = result_time(before[key]), result_time(after[key])
+        ratio = after_time / before_time if before_time > 0 else float('inf')
+        rows.append((key, before_time, after_time, ratio))
+        benchmark, repository, books, name = key
+        print(f'{f"{benchmark} {repository} {books} {name}":<60} {before_time:>12.1f}us {after_time:>12.1f}us '
+              f'{ratio:>7.2f}')
+    return rows
+
+
+if __name__ == '__main__':
+    compare(sys.argv[1], sys.argv[2])
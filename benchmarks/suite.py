@@ -0,0 +1,232 @@
+""" Times populating and querying MemoryRepository and SqlAlchemyRepository, the services' book conversions and the
+main routes over synthetic catalogues, and saves the results as JSON so that commits can be compared.
+
+Run from the project root:
+
+    python -m benchmarks.suite --sizes 1000 10000 100000 --output before.json
+    git checkout <other commit>
+    python -m benchmarks.suite --sizes 1000 10000 100000 --output after.json
+    python -m benchmarks.compare before.json after.json
+
+--books-per-author and --books-per-publisher set the cardinality of the catalogue's authors and publishers.
+
+Every timed call is made once on its own, then repeated until it has taken about --seconds in all, and the median
+and fastest of the repeats are kept. The database session is reset before each repository method, as it is at the
+start of a request, so repeated calls of a method share the session's identity map as calls within one request would.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, clear_mappers
+
+import capitulo.books.services as books_services
+import capitulo.home.services as home_services
+from capitulo import create_app
+from capitulo.adapters import repository_populate
+from capitulo.adapters.database_repository import SqlAlchemyRepository
+from capitulo.adapters.memory_repository import MemoryRepository
+from capitulo.adapters.orm import metadata, map_model_to_tables
+from capitulo.adapters.repository import AbstractRepository
+from benchmarks.synthetic import write_synthetic_data
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_SECONDS = 0.2
+# Calls made of each benchmark at most, however quick they are
+MAXIMUM_CALLS = 1000
+# Books converted by the services benchmarks, as on a page of a listing
+BOOKS_PER_PAGE = 20
+REPOSITORIES = ['memory', 'database']
+
+
+def measure(function, seconds: float) -> dict:
+    """ Calls function until it has taken about seconds in all, and returns the median and fastest call times
+        The first call is timed on its own, as it may build caches or compile templates the later calls reuse. """
+    start = time.perf_counter()
+    function()
+    first_call_seconds = time.perf_counter() - start
+    call_seconds = []
+    deadline = time.perf_counter() + seconds
+    while len(call_seconds) == 0 or (time.perf_counter() < deadline and len(call_seconds) < MAXIMUM_CALLS):
+        start = time.perf_counter()
+        function()
+        call_seconds.append(time.perf_counter() - start)
+    return {
+        'first_call_microseconds': round(first_call_seconds * 1e6, 2),
+        'median_microseconds': round(statistics.median(call_seconds) * 1e6, 2),
+        'min_microseconds': round(min(call_seconds) * 1e6, 2),
+        'calls': len(call_seconds)
+    }
+
+
+def create_repository(kind: str, database_path: Path) -> AbstractRepository:
+    clear_mappers()
+    if kind == 'memory':
+        return MemoryRepository()
+    engine = create_engine(f'sqlite:///{database_path}', connect_args={"check_same_thread": False})
+    metadata.create_all(engine)
+    map_model_to_tables()
+    return SqlAlchemyRepository(sessionmaker(autocommit=False, autoflush=True, bind=engine))
+
+
+def repository_queries(repo: AbstractRepository) -> dict:
+    """ Returns a call of every query method of the repository, with arguments taken from its catalogue """
+    book_ids = repo.get_book_ids_all()
+    book_id = book_ids[len(book_ids) // 2]
+    page_ids = book_ids[:BOOKS_PER_PAGE]
+    language = repo.get_languages()[0]
+    publisher = repo.get_publishers()[0]
+    year = repo.get_release_years()[0]
+    author = repo.get_authors()[0]
+    return {
+        'get_user': lambda: repo.get_user('user1'),
+        'get_number_of_users': repo.get_number_of_users,
+        'get_book': lambda: repo.get_book(book_id),
+        'get_books_by_id': lambda: repo.get_books_by_id(page_ids),
+        'get_books_by_author': lambda: repo.get_books_by_author(author.full_name),
+        'get_books_by_release_year': lambda: repo.get_books_by_release_year(year),
+        'get_books_by_publisher': lambda: repo.get_books_by_publisher(publisher),
+        'get_books_by_language': lambda: repo.get_books_by_language(language),
+        'get_books_by_title': lambda: repo.get_books_by_title('Book 1'),
+        'get_number_of_books': repo.get_number_of_books,
+        'get_first_book': repo.get_first_book,
+        'get_last_book': repo.get_last_book,
+        'get_reviews': repo.get_reviews,
+        'get_number_of_reviews': repo.get_number_of_reviews,
+        'get_all_books': repo.get_all_books,
+        'get_book_ids_for_language': lambda: repo.get_book_ids_for_language(language),
+        'get_book_ids_for_author': lambda: repo.get_book_ids_for_author(author.unique_id),
+        'get_book_ids_for_publisher': lambda: repo.get_book_ids_for_publisher(publisher),
+        'get_book_ids_for_year': lambda: repo.get_book_ids_for_year(year),
+        'get_book_ids_all': repo.get_book_ids_all,
+        'get_book_ids_page': lambda: repo.get_book_ids_page('language', language, 0, BOOKS_PER_PAGE),
+        'search_book_ids': lambda: repo.search_book_ids('book 12'),
+        'get_languages': repo.get_languages,
+        'get_authors': repo.get_authors,
+        'get_publishers': repo.get_publishers,
+        'get_release_years': repo.get_release_years,
+        'get_facet_counts': repo.get_facet_counts
+    }
+
+
+def services_conversions(repo: AbstractRepository) -> dict:
+    """ Returns a call of each of the services' book conversions, over a page of books """
+    books = repo.get_books_by_id(repo.get_book_ids_all()[:BOOKS_PER_PAGE])
+    return {
+        'books.book_to_dict': lambda: [books_services.book_to_dict(book) for book in books],
+        'books.books_to_dict': lambda: books_services.books_to_dict(books),
+        'home.book_to_dict': lambda: [home_services.book_to_dict(book) for book in books],
+        'home.books_to_dict': lambda: home_services.books_to_dict(books)
+    }
+
+
+def route_urls(repo: AbstractRepository) -> dict:
+    book_ids = repo.get_book_ids_all()
+    author = repo.get_authors()[0]
+    publisher = repo.get_publishers()[0]
+    year = repo.get_release_years()[0]
+    return {
+        'home': '/',
+        'search': '/?q=book+12',
+        'individual_book': f'/{book_ids[len(book_ids) // 2]}',
+        'books_by_language': '/books_by_language?language=English',
+        'books_by_author': f'/books_by_author?author_name={author.full_name}&author_id={author.unique_id}',
+        'books_by_publisher': f'/books_by_publisher?publisher_name={publisher}',
+        'books_by_release_year': f'/books_by_release_year?release_year={year}&page=2',
+        'browse': f'/browse?language=English&release_year={year}',
+        'about_us': '/About_Us'
+    }
+
+
+def run_size(number_of_books: int, books_per_author: int, books_per_publisher: int, seconds: float) -> list:
+    results = []
+
+    def add_result(benchmark: str, repository: str, name: str, measurements: dict):
+        results.append({'benchmark': benchmark, 'repository': repository, 'books': number_of_books, 'name': name,
+                        **measurements})
+        print(json.dumps(results[-1]))
+
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        data_path = write_synthetic_data(Path(temporary_folder) / 'data', number_of_books,
+                                         max(1, number_of_books // books_per_author),
+                                         max(1, number_of_books // books_per_publisher))
+        database_path = Path(temporary_folder) / 'benchmark.db'
+
+        for kind in REPOSITORIES:
+            repo = create_repository(kind, database_path)
+            start = time.perf_counter()
+            repository_populate.populate(data_path, repo, kind == 'database')
+            add_result('populate', kind, 'populate', {'seconds': round(time.perf_counter() - start, 4)})
+
+            for name, query in repository_queries(repo).items():
+                if kind == 'database':
+                    repo.reset_session()
+                add_result('repository', kind, name, measure(query, seconds))
+
+            if kind == 'database':
+                repo.reset_session()
+            for name, conversion in services_conversions(repo).items():
+                add_result('services', kind, name, measure(conversion, seconds))
+
+            # The app's database is the one populated above, which create_app sees has tables and only maps.
+            clear_mappers()
+            app = create_app({
+                'TESTING': True,
+                'REPOSITORY': kind,
+                'TEST_DATA_PATH': data_path,
+                'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+                'WTF_CSRF_ENABLED': False
+            })
+            client = app.test_client()
+            for name, url in route_urls(repo).items():
+                add_result('route', kind, name, measure(lambda: client.get(url), seconds))
+            if kind == 'database':
+                repo.close_session()
+    clear_mappers()
+    return results
+
+
+def commit_id() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='numbers of books to time')
+    parser.add_argument('--books-per-author', type=int, default=2)
+    parser.add_argument('--books-per-publisher', type=int, default=100)
+    parser.add_argument('--seconds', type=float, default=DEFAULT_SECONDS, help='time spent on each benchmark')
+    parser.add_argument('--output', type=Path, help='file the results are saved to as JSON')
+    arguments = parser.parse_args(argv)
+
+    results = []
+    for number_of_books in arguments.sizes:
+        results += run_size(number_of_books, arguments.books_per_author, arguments.books_per_publisher,
+                            arguments.seconds)
+    report = {
+        'commit': commit_id(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'books_per_author': arguments.books_per_author,
+        'books_per_publisher': arguments.books_per_publisher,
+        'results': results
+    }
+    if arguments.output is not None:
+        with open(arguments.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=1)
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
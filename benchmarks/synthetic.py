@@ -0,0 +1,84 @@
+import csv
+import json
+import random
+from pathlib import Path
+
+from werkzeug.security import generate_password_hash
+
+LANGUAGE_CODES = ['eng', 'fre', 'ger', 'spa', 'jpn', 'ita', 'por', 'chi']
+
+
+def write_synthetic_catalogue(data_path: Path, number_of_books: int, number_of_authors: int = None,
+                              number_of_publishers: int = None, seed: int = 235):
+    """ Writes books and authors JSON-lines files in the Goodreads excerpt format to data_path """
+    generator = random.Random(seed)
+    if number_of_authors is None:
+        number_of_authors = max(1, number_of_books // 2)
+    if number_of_publishers is None:
+        number_of_publishers = max(1, number_of_books // 100)
+
+    data_path = Path(data_path)
+    data_path.mkdir(parents=True, exist_ok=True)
+    books_file_path = data_path / 'comic_books_excerpt.json'
+    authors_file_path = data_path / 'book_authors_excerpt.json'
+
+    with open(authors_file_path, 'w', encoding='UTF-8') as authors_file:
+        for author_id in range(1, number_of_authors + 1):
+            authors_file.write(json.dumps({'author_id': str(author_id), 'name': f'Author {author_id}'}) + '\n')
+
+    with open(books_file_path, 'w', encoding='UTF-8') as books_file:
+        for book_id in range(1, number_of_books + 1):
+            author_ids = generator.sample(range(1, number_of_authors + 1), min(number_of_authors, generator.randint(1, 3)))
+            book_json = {
+                'book_id': str(book_id),
+                'title': f'Book {book_id}',
+                'publisher': f'Publisher {generator.randint(1, number_of_publishers)}',
+                'publication_year': str(generator.randint(1950, 2020)),
+                'is_ebook': generator.choice(['true', 'false']),
+                'language_code': generator.choice(LANGUAGE_CODES),
+                'description': f'Description of book {book_id}',
+                'image_url': f'https://images.example.com/{book_id}.jpg',
+                'num_pages': str(generator.randint(20, 600)),
+                'authors': [{'author_id': str(author_id), 'role': ''} for author_id in author_ids]
+            }
+            books_file.write(json.dumps(book_json) + '\n')
+
+    return books_file_path, authors_file_path
+
+
+def write_synthetic_users_and_reviews(data_path: Path, number_of_books: int, number_of_users: int = 20,
+                                      number_of_reviews: int = None, seed: int = 235):
+    """ Writes users and reviews CSV files to data_path, for the books write_synthetic_catalogue writes
+        The passwords are written already hashed, so loading the users doesn't hash one per user. """
+    generator = random.Random(seed)
+    if number_of_reviews is None:
+        number_of_reviews = max(1, number_of_books // 10)
+    password_hash = generate_password_hash('Synthetic-Password-1')
+
+    data_path = Path(data_path)
+    data_path.mkdir(parents=True, exist_ok=True)
+    users_file_path = data_path / 'users.csv'
+    reviews_file_path = data_path / 'reviews.csv'
+
+    with open(users_file_path, 'w', encoding='UTF-8', newline='') as users_file:
+        writer = csv.writer(users_file)
+        writer.writerow(['id', 'username', 'password'])
+        for user_id in range(1, number_of_users + 1):
+            writer.writerow([user_id, f'user{user_id}', password_hash])
+
+    with open(reviews_file_path, 'w', encoding='UTF-8', newline='') as reviews_file:
+        writer = csv.writer(reviews_file)
+        writer.writerow(['id', 'user-id', 'book-id', 'review-text', 'rating', 'timestamp'])
+        for review_id in range(1, number_of_reviews + 1):
+            writer.writerow([review_id, generator.randint(1, number_of_users), generator.randint(1, number_of_books),
+                             f'Review {review_id}', generator.randint(1, 5), '2020-02-28 14:31:26'])
+
+    return users_file_path, reviews_file_path
+
+
+def write_synthetic_data(data_path: Path, number_of_books: int, number_of_authors: int = None,
+                         number_of_publishers: int = None, seed: int = 235) -> Path:
+    """ Writes every file repository_populate.populate reads to data_path, and returns data_path """
+    write_synthetic_catalogue(data_path, number_of_books, number_of_authors, number_of_publishers, seed)
+    write_synthetic_users_and_reviews(data_path, number_of_books, seed=seed)
+    return Path(data_path)
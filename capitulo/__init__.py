@@ -6,13 +6,14 @@ from flask import Flask
 
 import capitulo.adapters.repository as repo
 from capitulo.adapters.memory_repository import MemoryRepository
-from capitulo.adapters import memory_repository, database_repository, repository_populate
-from capitulo.adapters.orm import metadata, map_model_to_tables
+from capitulo.adapters import memory_repository, database_repository, repository_populate, snapshot, engine_factory
+from capitulo.adapters.orm import metadata, map_model_to_tables, create_missing_indexes
+from capitulo.instrumentation import instrumentation
+from capitulo.instrumentation.statements import DEFAULT_N_PLUS_ONE_THRESHOLD
+from capitulo.utilities.book_views import book_views, DEFAULT_BOOK_VIEW_CACHE_SIZE
 
 # imports from SQLAlchemy
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, clear_mappers
-from sqlalchemy.pool import NullPool
 
 
 def create_app(test_config=None):
@@ -30,27 +31,40 @@ def create_app(test_config=None):
 
     # Here the "magic" of our repository pattern happens. We can easily switch between in memory data and
     # persistent database data storage for our application.
+    database_engine = None
 
     if app.config['REPOSITORY'] == 'memory':
-        # Create the MemoryRepository implementation for a memory-based repository
-        repo.repo_instance = memory_repository.MemoryRepository()
-        # fill the content of the repository from the provided csv files (has to be done every time we start app)
-        database_mode = False
-        repository_populate.populate(data_path, repo.repo_instance, database_mode)
+        snapshot_path = app.config['MEMORY_SNAPSHOT']
+        repo.repo_instance = None
+        if snapshot_path:
+            # Reuse the repository saved by an earlier start, as long as the data files haven't changed since.
+            digest = snapshot.source_digest(data_path)
+            repo.repo_instance = snapshot.load_snapshot(snapshot_path, digest)
+        if repo.repo_instance is None:
+            # Create the MemoryRepository implementation for a memory-based repository
+            repo.repo_instance = memory_repository.MemoryRepository()
+            # fill the content of the repository from the provided csv files
+            database_mode = False
+            repository_populate.populate(data_path, repo.repo_instance, database_mode,
+                                         app.config['LOAD_PROCESSES'], app.config['PASSWORD_HASH_CACHE'])
+            if snapshot_path:
+                snapshot.save_snapshot(repo.repo_instance, snapshot_path, digest)
     elif app.config['REPOSITORY'] == 'database':
         # Configure database
         database_uri = app.config['SQLALCHEMY_DATABASE_URI']
 
         # We create a comparatively simple SQLite database, which is based on a single file (see .env for URI)
         database_echo = app.config['SQLALCHEMY_ECHO']
-        # Do not change the settings for connect_args and poolclass
-        database_engine = create_engine(database_uri, connect_args={"check_same_thread": False}, poolclass=NullPool,
-                                        echo=database_echo)
+        # The pool and SQLite pragmas are configured through DATABASE_POOL* and SQLITE_* (see config.py)
+        database_engine = engine_factory.create_database_engine(
+            database_uri, database_echo, app.config['DATABASE_POOL'], app.config['DATABASE_POOL_SIZE'],
+            app.config['DATABASE_MAX_OVERFLOW'], sqlite_pragmas=app.config['SQLITE_PRAGMAS'])
 
         # Create the database session factory using sessionmaker (this has to be done once in a global manner)
         session_factory = sessionmaker(autocommit=False, autoflush=True, bind=database_engine)
         # Create the SQLAlchemy DatabaseRepository instance for an sqlite3-based repository
-        repo.repo_instance = database_repository.SqlAlchemyRepository(session_factory)
+        repo.repo_instance = database_repository.SqlAlchemyRepository(session_factory,
+                                                                     app.config['POPULATE_BATCH_SIZE'])
 
         if app.config['TESTING'] == 'True' or len(database_engine.table_names()) == 0:
             print("REPOPULATING DATABASE...")
@@ -64,9 +78,12 @@ def create_app(test_config=None):
             map_model_to_tables()
 
             database_mode = True
-            repository_populate.populate(data_path, repo.repo_instance, database_mode)
+            repository_populate.populate(data_path, repo.repo_instance, database_mode,
+                                         app.config['LOAD_PROCESSES'], app.config['PASSWORD_HASH_CACHE'])
             print("REPOPULATING DATABASE... FINISHED")
         else:
+            # Bring the indexes of a database created by an older version up to date
+            create_missing_indexes(database_engine)
             # Solely generate mappings that map domain model classes to the database tables
             map_model_to_tables()
 
@@ -75,6 +92,9 @@ def create_app(test_config=None):
     # fill the content of the repository from the provided csv files
     #populate(data_path, repo.repo_instance)
 
+    # Views of the books shown most recently, shared by the books and home services
+    book_views.resize(app.config.get('BOOK_VIEW_CACHE_SIZE', DEFAULT_BOOK_VIEW_CACHE_SIZE))
+
     # Build the application
     with app.app_context():
         # Register blueprints
@@ -96,6 +116,11 @@ def create_app(test_config=None):
         from .reading_list import reading_list
         app.register_blueprint(reading_list.reading_list_blueprint)
 
+        if str(app.config.get('INSTRUMENTATION')).lower() == 'true':
+            # Time requests, repository calls and SQL statements, serve the totals at /_metrics and report N+1 queries
+            instrumentation.init_app(app, repo.repo_instance, database_engine, app.config.get('SQL_STATEMENT_BUDGET'),
+                                     app.config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD))
+
         # Register a callback that makes sure that database sessions are associated with http requests
         # We reset the session inside the database repository before a new flask request is generated
         @app.before_request
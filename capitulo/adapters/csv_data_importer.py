@@ -1,6 +1,11 @@
 import csv
+import hashlib
+import json
+import re
+from multiprocessing import Pool
 from pathlib import Path
 from datetime import date, datetime
+from typing import List, Tuple
 
 from werkzeug.security import generate_password_hash
 
@@ -23,37 +28,105 @@ def read_csv_file(filename: str):
             yield row
 
 
-def load_books(data_path: Path, repo: AbstractRepository, database_mode: bool):
+def load_books(data_path: Path, repo: AbstractRepository, database_mode: bool, processes: int = None):
     books_file_path = data_path / 'comic_books_excerpt.json'
     authors_file_path = data_path / 'book_authors_excerpt.json'
     our_reader = reader(books_file_path, authors_file_path)
-    our_reader.read_json_files()
-    books_to_load = our_reader.dataset_of_books
-    for book in books_to_load:
-        repo.add_book(book)
+    # Books are streamed straight into the repository rather than being collected by the reader first.
+    # Very large dumps can be parsed in a process pool by asking for more than one process.
+    if processes is not None and processes > 1:
+        books = our_reader.iter_books_parallel(processes)
+    else:
+        books = our_reader.iter_books()
+    repo.add_books(books)
 
-def load_users(data_path: Path, repo: AbstractRepository):
+# generate_password_hash output, pbkdf2:<hash name>:<iterations>$<salt>$<hex digest>, which lets users.csv hold already
+# hashed passwords.
+_password_hash = re.compile(r'pbkdf2:(?P<hash_name>[a-z0-9_]+):(?P<iterations>[1-9][0-9]*)'
+                            r'\$(?P<salt>[A-Za-z0-9]+)\$(?P<digest>[0-9a-f]+)')
+
+
+def is_password_hash(password: str) -> bool:
+    """ Returns whether the password is a hash made by generate_password_hash
+        A password that only looks like one, which would be stored as it is and never match at login, is not. """
+    match = _password_hash.fullmatch(password)
+    if match is None:
+        return False
+    try:
+        digest_size = hashlib.new(match['hash_name']).digest_size
+    except ValueError:
+        return False
+    return len(match['digest']) == 2 * digest_size
+
+
+def hash_passwords(passwords: List[str], processes: int = None) -> List[str]:
+    """ Hashes the passwords that aren't hashed already, in a process pool when more than one process is asked for """
+    plain_positions = [position for position, password in enumerate(passwords) if not is_password_hash(password)]
+    plain_passwords = [passwords[position] for position in plain_positions]
+    if processes is not None and processes > 1 and len(plain_passwords) > 1:
+        with Pool(processes) as pool:
+            hashes = pool.map(generate_password_hash, plain_passwords)
+    else:
+        hashes = [generate_password_hash(password) for password in plain_passwords]
+
+    hashed_passwords = list(passwords)
+    for position, password_hash in zip(plain_positions, hashes):
+        hashed_passwords[position] = password_hash
+    return hashed_passwords
+
+
+def read_users_file(users_filename: str, processes: int = None, hash_cache_path: Path = None) -> List[Tuple[str, str, str]]:
+    """ Returns the (id, user name, password hash) rows of a users file
+        When hash_cache_path is given the hashed rows are saved there, and read back instead of hashing again for as
+        long as the users file is unchanged """
+    with open(users_filename, 'rb') as users_file:
+        source_digest = hashlib.sha256(users_file.read()).hexdigest()
+
+    if hash_cache_path is not None and Path(hash_cache_path).exists():
+        with open(hash_cache_path, encoding='utf-8') as cache_file:
+            cache = json.load(cache_file)
+        if cache.get('source_sha256') == source_digest:
+            return [tuple(row) for row in cache['users']]
+
+    rows = list(read_csv_file(users_filename))
+    password_hashes = hash_passwords([row[2] for row in rows], processes)
+    users = [(row[0], row[1], password_hash) for row, password_hash in zip(rows, password_hashes)]
+
+    if hash_cache_path is not None:
+        with open(hash_cache_path, 'w', encoding='utf-8') as cache_file:
+            json.dump({'source_sha256': source_digest, 'users': users}, cache_file)
+    return users
+
+
+def load_users(data_path: Path, repo: AbstractRepository, processes: int = None, hash_cache_path: Path = None):
     users = dict()
 
     users_filename = str(data_path / "users.csv")
-    for data_row in read_csv_file(users_filename):
+    for user_id, user_name, password_hash in read_users_file(users_filename, processes, hash_cache_path):
         user = User(
-            user_name=data_row[1],
-            password=generate_password_hash(data_row[2])
+            user_name=user_name,
+            password=password_hash
         )
-        repo.add_user(user)
-        users[data_row[0]] = user
+        users[user_id] = user
+    repo.add_users(users.values())
     return users
 
 
 def load_reviews(data_path: Path, repo: AbstractRepository, users):
     reviews_filename = str(data_path / "reviews.csv")
+    # Each reviewed book is only fetched from the repository once.
+    books = dict()
+    reviews = []
     for data_row in read_csv_file(reviews_filename):
+        book_id = int(data_row[2])
+        if book_id not in books:
+            books[book_id] = repo.get_book(book_id)
         review = make_review(
-            book=repo.get_book(int(data_row[2])),
+            book=books[book_id],
             review_text=data_row[3],
             rating=int(data_row[4]),
             user=users[data_row[1]],
             timestamp=datetime.strptime(data_row[5], '%Y-%m-%d %H:%M:%S')
         )
-        repo.add_review(review)
+        reviews.append(review)
+    repo.add_reviews(reviews)
@@ -1,16 +1,21 @@
 from datetime import date
-from typing import List
+from typing import Dict, List, Iterable, Tuple
 
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, func
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 from sqlalchemy import insert, select, delete
 
-from sqlalchemy.orm import scoped_session
+from sqlalchemy.orm import scoped_session, selectinload, joinedload
 from flask import _app_ctx_stack
 
 from capitulo.domain.model import User, Book, Review, Publisher, Author
-from capitulo.adapters.repository import AbstractRepository
-from capitulo.adapters.orm import reading_list_table
+from capitulo.adapters.repository import AbstractRepository, RepositoryException, BOOK_LISTING, BOOK_DETAIL
+from capitulo.adapters.search_index import SearchIndex
+from capitulo.adapters.orm import reading_list_table, books_table, publishers_table, authors_table, \
+    authored_books_table, users_table, reviews_table
+
+# Number of rows written per executemany batch by the add_books/add_users/add_reviews bulk methods
+DEFAULT_BATCH_SIZE = 1000
 
 class SessionContextManager:
     def __init__(self, session_factory):
@@ -36,8 +41,9 @@ class SessionContextManager:
     def reset_session(self):
         # this method can be used e.g. to allow Flask to start a new session for each http request,
         # via the 'before_request' callback
-        self.close_current_session()
-        self.__session = scoped_session(self.__session_factory, scopefunc=_app_ctx_stack.__ident_func__)
+        # Only this scope's session is discarded: replacing the registry would orphan the sessions of requests being
+        # handled on other threads, and with them their pooled connections.
+        self.__session.remove()
 
     def close_current_session(self):
         if not self.__session is None:
@@ -46,8 +52,18 @@ class SessionContextManager:
 
 class SqlAlchemyRepository(AbstractRepository):
 
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__()
         self._session_cm = SessionContextManager(session_factory)
+        self._batch_size = batch_size
+        # Built from the database on the first search, and again after books are added.
+        self.__search_index = None
+        self.__search_index_version = None
+        self.__facet_counts = None
+        self.__facet_counts_version = None
+        # (category, key) -> number of books, until the books change
+        self.__category_counts = dict()
+        self.__category_counts_version = None
 
     def close_session(self):
         self._session_cm.close_current_session()
@@ -60,6 +76,20 @@ class SqlAlchemyRepository(AbstractRepository):
             scm.session.add(user)
             scm.commit()
 
+    def add_users(self, users: Iterable[User], batch_size: int = None):
+        # Primary keys are assigned up front, which lets the unit of work insert each batch with one executemany.
+        # The users stay attached to the session, as they are with add_user.
+        batch_size = batch_size or self._batch_size
+        with self._session_cm as scm:
+            next_id = self.__next_id(users_table)
+            for count, user in enumerate(users, 1):
+                user.id = next_id
+                next_id += 1
+                scm.session.add(user)
+                if count % batch_size == 0:
+                    scm.session.flush()
+            scm.commit()
+
     def get_user(self, user_name: str) -> User:
         user = None
         try:
@@ -82,11 +112,65 @@ class SqlAlchemyRepository(AbstractRepository):
             for author in book.authors:
                 scm.session.add(author)
             scm.commit()
+        self.catalogue_changed()
+
+    def add_books(self, books: Iterable[Book], batch_size: int = None):
+        # Books are written with core executemany inserts rather than through the session, and everything is
+        # committed in a single transaction. Publishers and authors are only inserted the first time they are seen.
+        batch_size = batch_size or self._batch_size
+        with self._session_cm as scm:
+            session = scm.session
+            publisher_names = {row[0] for row in session.execute(select(publishers_table.c.name))}
+            author_ids = {row.unique_id: row.id for row in session.execute(
+                select(authors_table.c.id, authors_table.c.unique_id))}
+            next_author_id = self.__next_id(authors_table)
+            rows = {publishers_table: [], authors_table: [], books_table: [], authored_books_table: []}
 
-    def get_book(self, id: int) -> Book:
+            for book in books:
+                if book.publisher is not None and book.publisher.name not in publisher_names:
+                    publisher_names.add(book.publisher.name)
+                    rows[publishers_table].append({'name': book.publisher.name})
+                for author in book.authors:
+                    if author.unique_id not in author_ids:
+                        author_ids[author.unique_id] = next_author_id
+                        rows[authors_table].append(
+                            {'id': next_author_id, 'unique_id': author.unique_id, 'full_name': author.full_name})
+                        next_author_id += 1
+                    rows[authored_books_table].append(
+                        {'author_id': author_ids[author.unique_id], 'book_id': book.book_id})
+                rows[books_table].append({
+                    'book_id': book.book_id,
+                    'title': book.title,
+                    'description': book.description,
+                    'publisher': book.publisher.name if book.publisher is not None else None,
+                    'release_year': book.release_year,
+                    'num_pages': book.num_pages,
+                    'image_hyperlink': book.image_hyperlink,
+                    'language': book.language
+                })
+                if len(rows[books_table]) >= batch_size:
+                    self.__insert_rows(session, rows)
+            self.__insert_rows(session, rows)
+            scm.commit()
+        self.catalogue_changed()
+
+    @staticmethod
+    def __insert_rows(session, rows: dict):
+        # rows is ordered so that referenced tables are written before the tables referring to them.
+        for table, table_rows in rows.items():
+            if len(table_rows) > 0:
+                session.execute(insert(table), table_rows)
+                table_rows.clear()
+
+    def __next_id(self, table) -> int:
+        with self._session_cm.session.no_autoflush:
+            max_id = self._session_cm.session.execute(select(func.max(table.c.id))).scalar()
+        return (max_id or 0) + 1
+
+    def get_book(self, id: int, load: str = None) -> Book:
         book = None
         try:
-            book = self._session_cm.session.query(Book).filter(Book._Book__book_id == id).one()
+            book = self.__query_books(load).filter(Book._Book__book_id == id).one()
         except NoResultFound:
             # Ignore any exception and return None
             pass
@@ -97,48 +181,62 @@ class SqlAlchemyRepository(AbstractRepository):
         books = self._session_cm.session.query(Book).all()
         return books
 
+    def __query_books(self, load: str = None):
+        # Loads what a listing or a book's page shows of the books in a fixed number of queries, however many books
+        # there are, instead of lazy loading it book by book.
+        query = self._session_cm.session.query(Book)
+        if load is None:
+            return query
+        if load == BOOK_LISTING:
+            # The reviews are only counted, so their users and books aren't needed.
+            return query.options(
+                selectinload(Book._Book__authors),
+                joinedload(Book.publisher),
+                selectinload(Book._Book__reviews)
+            )
+        if load == BOOK_DETAIL:
+            return query.options(
+                selectinload(Book._Book__authors),
+                joinedload(Book.publisher),
+                selectinload(Book._Book__reviews).options(
+                    joinedload(Review._Review__user),
+                    # The reviews' book reference points at books.book_id rather than the primary key, so it can't be
+                    # resolved from the identity map and is joined instead.
+                    joinedload(Review._Review__book)
+                )
+            )
+        raise ValueError(f'Unknown book loading {load!r}, expected {BOOK_LISTING!r} or {BOOK_DETAIL!r}')
+
+    def __query_books_for_display(self):
+        # Loads everything book_to_dict touches (authors, publisher, reviews and their users).
+        return self.__query_books(BOOK_DETAIL).order_by(Book._Book__id)
+
     def get_books_by_author(self, author: Author) -> List[Book]:
+        query = self.__query_books_for_display()
         if author is None:
-            books = self._session_cm.session.query(Book).all()
-            return books
+            return query.all()
+        # Return books matching author; return an empty list if there are no matches.
+        # An Author is matched by id; a name is matched as a substring of the author's full name.
+        query = query.join(Book._Book__authors)
+        if isinstance(author, Author):
+            query = query.filter(Author._Author__unique_id == author.unique_id)
         else:
-            # Return books matching author; return an empty list if there are no matches.
-            # books = self._session_cm.session.query(Book).filter(author in Book._Book__authors).all()
-            result = []
-            books = list(self._session_cm.session.query(Book).all())
-            for book in books:
-                if author in book.authors:
-                    result.append(book)
-            return result
+            query = query.filter(Author._Author__full_name.contains(author, autoescape=True)).distinct()
+        return query.all()
 
     def get_books_by_language(self, language: str) -> List[Book]:
+        query = self.__query_books_for_display()
         if language is None:
-            books = self._session_cm.session.query(Book).all()
-            return books
-        else:
-            # Return books matching author; return an empty list if there are no matches.
-            # books = self._session_cm.session.query(Book).filter(Book._Book__language == language).all()
-            result = []
-            books = list(self._session_cm.session.query(Book).all())
-            for book in books:
-                if book.language == language:
-                    result.append(book)
-            return result
+            return query.all()
+        # Return books matching language; return an empty list if there are no matches.
+        return query.filter(Book._Book__language == language).all()
 
     def get_books_by_publisher(self, publisher: str) -> List[Book]:
+        query = self.__query_books_for_display()
         if publisher is None:
-            books = self._session_cm.session.query(Book).all()
-            return books
-        else:
-            # Return books matching author; return an empty list if there are no matches.
-            result = []
-            books = list(self._session_cm.session.query(Book).all())
-            for book in books:
-                if book.publisher != None and book.publisher.name == publisher:
-                    result.append(book)
-            return result
-            # books = self._session_cm.session.query(Book).filter(Book._Book__publisher == publisher).all()
-            # return books
+            return query.all()
+        # Return books matching publisher; return an empty list if there are no matches.
+        return query.filter(Book._Book__publisher == publisher).all()
 
     def get_books_by_title(self, title: str) -> List[Book]:
         if title is None:
@@ -159,6 +257,16 @@ class SqlAlchemyRepository(AbstractRepository):
             return books
 
     def get_book_ids_for_author(self, full_name: str):
+        if isinstance(full_name, int):
+            # An author's unique_id, as MemoryRepository and the facet index look authors up by
+            book_ids = self._session_cm.session.execute(
+                'SELECT DISTINCT book_authors.book_id FROM book_authors '
+                'JOIN authors ON authors.id = book_authors.author_id '
+                'WHERE authors.unique_id = :unique_id ORDER BY book_authors.book_id ASC',
+                {'unique_id': full_name}
+            ).fetchall()
+            return [id[0] for id in book_ids]
+
         book_ids = []
 
         row = self._session_cm.session.execute('SELECT id FROM authors WHERE full_name = :full_name',
@@ -179,7 +287,8 @@ class SqlAlchemyRepository(AbstractRepository):
 
     def get_book_ids_for_publisher(self, name: str):
         book_ids = []
-        book_ids = self._session_cm.session.execute('SELECT books.book_id FROM publishers LEFT JOIN books ON books.publisher = publishers.name WHERE publishers.name = :name',
+        book_ids = self._session_cm.session.execute('SELECT books.book_id FROM publishers LEFT JOIN books ON books.publisher = publishers.name WHERE publishers.name = :name '
+                                                    'ORDER BY books.id',
                                                     {'name': name}).fetchall()
         if book_ids is None:
             # No existing publisher - create an empty list
@@ -189,7 +298,7 @@ class SqlAlchemyRepository(AbstractRepository):
 
     def get_book_ids_for_language(self, language: str):
         book_ids = []
-        row = self._session_cm.session.execute('SELECT book_id FROM books WHERE language = :language',
+        row = self._session_cm.session.execute('SELECT book_id FROM books WHERE language = :language ORDER BY id',
                                                {'language': language}).fetchall()
         if row is None:
             # No author with the name target_author - create an empty list
@@ -200,7 +309,7 @@ class SqlAlchemyRepository(AbstractRepository):
 
     def get_book_ids_for_year(self, year: int):
         book_ids = []
-        row = self._session_cm.session.execute('SELECT book_id FROM books WHERE release_year = :year',
+        row = self._session_cm.session.execute('SELECT book_id FROM books WHERE release_year = :year ORDER BY id',
                                                {'year': year}).fetchall()
         if row is None:
             # No author with the name target_author - create an empty list
@@ -273,6 +382,56 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
             scm.session.add(review)
             scm.commit()
+        self.book_changed(review.book.book_id)
+
+    def add_reviews(self, reviews: Iterable[Review], batch_size: int = None):
+        # Reviews are attached to persistent books and users, so they go through the unit of work. Assigning primary
+        # keys up front lets each batch be inserted with one executemany, inside a single transaction.
+        batch_size = batch_size or self._batch_size
+        # The bidirectional links are checked by identity against each user's and book's reviews, collected once,
+        # since testing membership with == for every review is quadratic in the number of reviews per user.
+        attached_reviews = dict()
+        changed_book_ids = set()
+
+        def is_attached(review, owner):
+            if id(owner) not in attached_reviews:
+                attached_reviews[id(owner)] = (owner, {id(owner_review) for owner_review in owner.reviews})
+            return id(review) in attached_reviews[id(owner)][1]
+
+        with self._session_cm as scm:
+            next_id = self.__next_id(reviews_table)
+            with scm.session.no_autoflush:
+                for count, review in enumerate(reviews, 1):
+                    if review.user is None or not is_attached(review, review.user):
+                        raise RepositoryException('Review not correctly attached to a User')
+                    if review.book is None or not is_attached(review, review.book):
+                        raise RepositoryException('Review not correctly attached to a Book')
+                    # Reviews that were already flushed, e.g. by an autoflush while they were being built, keep
+                    # their key.
+                    if review.id is None:
+                        review.id = next_id
+                        next_id += 1
+                    scm.session.add(review)
+                    if count % batch_size == 0:
+                        scm.session.flush()
+                    changed_book_ids.add(review.book.book_id)
+            scm.commit()
+        for book_id in changed_book_ids:
+            self.book_changed(book_id)
+
+    def book_versions(self, book_ids: Iterable[int]) -> Dict[int, tuple]:
+        # Other workers add reviews to the same database without this one's book_changed counting them, so the
+        # versions are read from the reviews: how many a book has and the id of the latest. Books themselves only
+        # change while populating, which catalogue_version counts.
+        book_ids = list(book_ids)
+        versions = {book_id: (self.catalogue_version, 0, None) for book_id in book_ids}
+        if len(book_ids) > 0:
+            rows = self._session_cm.session.execute(
+                select(reviews_table.c.book_id, func.count(), func.max(reviews_table.c.id))
+                .where(reviews_table.c.book_id.in_(book_ids)).group_by(reviews_table.c.book_id))
+            for book_id, number_of_reviews, last_review_id in rows:
+                versions[book_id] = (self.catalogue_version, number_of_reviews, last_review_id)
+        return versions
 
     def get_number_of_reviews(self):
         number_of_reviews = self._session_cm.session.query(Review).count()
@@ -299,10 +458,118 @@ class SqlAlchemyRepository(AbstractRepository):
     def get_book_ids_all(self):
         book_ids = []
 
-        row = self._session_cm.session.execute('SELECT id FROM books').fetchall()
+        row = self._session_cm.session.execute('SELECT id FROM books ORDER BY id ASC').fetchall()
         book_ids = [val[0] for val in row]
         return book_ids
 
-    def get_books_by_id(self, id_list):
-        books = self._session_cm.session.query(Book).filter(Book._Book__book_id.in_(id_list)).all()
-        return books
+    def get_books_by_id(self, id_list, load: str = None):
+        books = self.__query_books(load).filter(Book._Book__book_id.in_(id_list)).all()
+
+        # Return the books in the order they were asked for, as the memory repository does, rather than in whatever
+        # order the database produced them.
+        books_by_id = {book.book_id: book for book in books}
+        return [books_by_id[book_id] for book_id in id_list if book_id in books_by_id]
+
+    def search_book_ids(self, query: str) -> List[int]:
+        if self.__search_index is None or self.__search_index_version != self.catalogue_version:
+            self.__search_index_version = self.catalogue_version
+            self.__search_index = self.__build_search_index()
+        return self.__search_index.search(query)
+
+    def get_facet_counts(self) -> Dict[str, Dict[object, int]]:
+        if self.__facet_counts is None or self.__facet_counts_version != self.catalogue_version:
+            self.__facet_counts_version = self.catalogue_version
+            self.__facet_counts = self.__count_facets()
+        return {category: dict(counts) for category, counts in self.__facet_counts.items()}
+
+    def __count_facets(self) -> Dict[str, Dict[object, int]]:
+        # One GROUP BY per facet, rather than a query per language, publisher, author and year.
+        session = self._session_cm.session
+        facet_counts = dict()
+        for category in ('language', 'publisher', 'release_year'):
+            column = books_table.c[category]
+            rows = session.execute(select(column, func.count()).where(column.isnot(None)).group_by(column))
+            facet_counts[category] = {key: count for key, count in rows}
+        rows = session.execute(
+            select(authors_table.c.unique_id, func.count(authored_books_table.c.book_id.distinct()))
+            .select_from(authored_books_table.join(authors_table,
+                                                   authors_table.c.id == authored_books_table.c.author_id))
+            .group_by(authors_table.c.unique_id))
+        facet_counts['author'] = {unique_id: count for unique_id, count in rows}
+        return facet_counts
+
+    @staticmethod
+    def __category_query(category: str, key):
+        # The query of the ids of a category's books, with the column they are read from, or None for categories
+        # that can't be read in SQL
+        if category == 'author':
+            # An author is matched by unique_id, as MemoryRepository's author index is keyed.
+            query = select(authored_books_table.c.book_id).distinct().join(
+                authors_table, authors_table.c.id == authored_books_table.c.author_id
+            ).where(authors_table.c.unique_id == key)
+            return query, authored_books_table.c.book_id
+        if category in ('language', 'publisher', 'release_year'):
+            return select(books_table.c.book_id).where(books_table.c[category] == key), books_table.c.book_id
+        return None
+
+    def get_book_ids_page(self, category: str, key, offset: int, limit: int) -> Tuple[List[int], int]:
+        category_query = self.__category_query(category, key)
+        if category_query is None:
+            return super().get_book_ids_page(category, key, offset, limit)
+        query, book_id_column = category_query
+
+        # Only the page's ids are read, and the size of the category is counted once until the books change.
+        rows = self._session_cm.session.execute(query.order_by(book_id_column).offset(offset).limit(limit))
+        return [row[0] for row in rows], self.count_book_ids(category, key)
+
+    def get_book_ids_after(self, category: str, key, after_book_id: int = None, limit: int = None) -> List[int]:
+        category_query = self.__category_query(category, key)
+        if category_query is None:
+            return super().get_book_ids_after(category, key, after_book_id, limit)
+        query, book_id_column = category_query
+
+        # The book_id indexes let SQLite start reading at after_book_id, where OFFSET steps over the earlier rows.
+        if after_book_id is not None:
+            query = query.where(book_id_column > after_book_id)
+        query = query.order_by(book_id_column)
+        if limit is not None:
+            query = query.limit(limit)
+        return [row[0] for row in self._session_cm.session.execute(query)]
+
+    def count_book_ids(self, category: str, key) -> int:
+        category_query = self.__category_query(category, key)
+        if category_query is None:
+            return super().count_book_ids(category, key)
+        if self.__category_counts_version != self.catalogue_version:
+            self.__category_counts_version = self.catalogue_version
+            self.__category_counts = dict()
+        if (category, key) not in self.__category_counts:
+            query, _ = category_query
+            self.__category_counts[(category, key)] = self._session_cm.session.execute(
+                select(func.count()).select_from(query.subquery())).scalar()
+        return self.__category_counts[(category, key)]
+
+    def __build_search_index(self) -> SearchIndex:
+        # Reads only the searchable columns, in two queries, rather than loading every Book.
+        session = self._session_cm.session
+        fields = dict()
+        for book_id, title, publisher, release_year, language in session.execute(select(
+                books_table.c.book_id, books_table.c.title, books_table.c.publisher, books_table.c.release_year,
+                books_table.c.language)):
+            fields[book_id] = {
+                'title': [title],
+                'author': [],
+                'publisher': [publisher] if publisher is not None else [],
+                'language': [language],
+                'release_year': [release_year]
+            }
+        for book_id, full_name in session.execute(select(authored_books_table.c.book_id, authors_table.c.full_name)
+                                                  .join(authors_table,
+                                                        authors_table.c.id == authored_books_table.c.author_id)):
+            if book_id in fields:
+                fields[book_id]['author'].append(full_name)
+
+        search_index = SearchIndex()
+        for book_id, book_fields in fields.items():
+            search_index.add(book_id, book_fields)
+        return search_index
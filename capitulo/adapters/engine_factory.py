@@ -0,0 +1,62 @@
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+# The pools the engine can be given: NullPool opens a connection for every session and closes it afterwards, QueuePool
+# keeps up to pool_size connections open for reuse and StaticPool shares a single connection, which in-memory SQLite
+# databases need to be seen by every session.
+POOL_CLASSES = {
+    'null': NullPool,
+    'queue': QueuePool,
+    'static': StaticPool
+}
+
+# The pragmas set on every new SQLite connection when none are given. WAL lets readers carry on while a write is
+# committed, and with it synchronous=NORMAL only syncs at checkpoints rather than on every commit. The memory map and
+# the page cache (negative sizes are in KiB) keep the pages of a catalogue-sized database in memory across requests.
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,
+    'cache_size': -65536
+}
+
+
+def create_database_engine(database_uri: str, echo: bool = False, pool: str = 'null', pool_size: int = 5,
+                           max_overflow: int = 10, pool_timeout: float = 30,
+                           sqlite_pragmas: Dict[str, object] = None):
+    """ Creates the engine of the database at database_uri, with the pool named and, for SQLite, the pragmas given
+        set on every connection it opens """
+    if pool not in POOL_CLASSES:
+        raise ValueError(f'Unknown database pool {pool!r}, expected one of {", ".join(POOL_CLASSES)}')
+    pool_arguments = dict()
+    if pool == 'queue':
+        pool_arguments = {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_timeout': pool_timeout}
+
+    # Sessions are scoped to the app context rather than the thread, so a connection may be used by another thread
+    # than the one that opened it.
+    engine = create_engine(database_uri, connect_args={"check_same_thread": False}, poolclass=POOL_CLASSES[pool],
+                           echo=echo, **pool_arguments)
+
+    if engine.dialect.name == 'sqlite':
+        if sqlite_pragmas is None:
+            sqlite_pragmas = DEFAULT_SQLITE_PRAGMAS
+        set_sqlite_pragmas(engine, sqlite_pragmas)
+    return engine
+
+
+def set_sqlite_pragmas(engine, pragmas: Dict[str, object]):
+    """ Sets the pragmas on every connection the engine opens; pragmas without a value are left as SQLite has them """
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items() if value not in (None, '')]
+    if len(statements) == 0:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
@@ -0,0 +1,225 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from capitulo.adapters.repository import AbstractRepository
+
+# The facets books can be filtered on, with the repository method returning the ids of the books with a value
+FACET_BOOK_IDS = {
+    'language': 'get_book_ids_for_language',
+    'publisher': 'get_book_ids_for_publisher',
+    'author': 'get_book_ids_for_author',
+    'release_year': 'get_book_ids_for_year'
+}
+
+
+if hasattr(int, 'bit_count'):
+    def bitmap_count(bitmap: int) -> int:
+        return bitmap.bit_count()
+else:
+    # Before Python 3.10
+    def bitmap_count(bitmap: int) -> int:
+        return bin(bitmap).count('1')
+
+
+# Turns each byte of a bitmap with any bits set into 1, so they can be found with bytes.find, and the bits of the empty
+# stretches between them are never looked at.
+_NONZERO_BYTES = bytes([0] + [1] * 255)
+
+# The bits set in each byte value, lowest first
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+# A value held by fewer than one book in this many keeps the positions of its books rather than a bitmap, as the
+# bitmap would take more memory than the positions.
+SPARSE_RATIO = 64
+
+# How many bitmaps of values that keep positions are held on to after being built for a filter
+SPARSE_BITMAP_CACHE_SIZE = 256
+
+
+class FacetIndex:
+    """ Holds, for every value of every facet, the set of books with that value
+        Sets are bitmaps: ints whose bit n is set when the book at position n of the index, in id order, is in the
+        set. Combining filters is then a handful of ANDs and ORs over whole bitmaps, which Python does in C. As with
+        roaring bitmaps, values held by only a few books keep an array of positions instead, which takes far less
+        memory for the many authors and publishers with a book or two. """
+
+    def __init__(self, book_ids: Iterable[int], facet_book_ids: Dict[str, Dict[object, Iterable[int]]],
+                 labels: Dict[str, Dict[object, str]] = None):
+        self.__book_ids = sorted(book_ids)
+        positions = {book_id: position for position, book_id in enumerate(self.__book_ids)}
+        self.__all = (1 << len(self.__book_ids)) - 1
+        self.__labels = labels if labels is not None else dict()
+
+        # facet -> {value -> bitmap} for the values of many books, and {value -> positions} for the others
+        self.__dense = dict()
+        self.__sparse = dict()
+        # facet -> {value -> number of books}, in the order the values were given
+        self.__sizes = dict()
+        # facet -> the values of the book at each position, for counting the values of a few books directly
+        self.__values_at = dict()
+        # (facet, value) -> bitmap, for the sparse values filtered on most recently
+        self.__sparse_bitmaps = OrderedDict()
+        for facet, value_book_ids in facet_book_ids.items():
+            dense = self.__dense[facet] = dict()
+            sparse = self.__sparse[facet] = dict()
+            sizes = self.__sizes[facet] = dict()
+            values_at = self.__values_at[facet] = [() for _ in self.__book_ids]
+            for value, book_ids in value_book_ids.items():
+                value_positions = sorted(positions[book_id] for book_id in book_ids if book_id in positions)
+                sizes[value] = len(value_positions)
+                if len(value_positions) * SPARSE_RATIO < len(self.__book_ids):
+                    sparse[value] = array('l', value_positions)
+                else:
+                    dense[value] = self.__bitmap(value_positions)
+                for position in value_positions:
+                    values_at[position] += (value,)
+
+    def __bitmap(self, positions: Iterable[int]) -> int:
+        # Setting bits in a bytearray is linear in the number of books; adding up 1 << position ints would not be.
+        bits = bytearray((len(self.__book_ids) + 7) // 8)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bits, 'little')
+
+    def __bytes(self, bitmap: int) -> bytes:
+        # Byte n holds bits 8n to 8n + 7.
+        return bitmap.to_bytes((len(self.__book_ids) + 7) // 8, 'little')
+
+    def __len__(self) -> int:
+        return len(self.__book_ids)
+
+    @property
+    def facets(self) -> List[str]:
+        return list(self.__sizes)
+
+    def values(self, facet: str) -> List:
+        return list(self.__sizes[facet])
+
+    def label(self, facet: str, value) -> str:
+        """ Returns what a facet value is shown as, which is the value itself unless a label was given for it """
+        return self.__labels.get(facet, {}).get(value, str(value))
+
+    def select(self, filters: Dict[str, Iterable]) -> int:
+        """ Returns the bitmap of the books that have at least one of the values given for every facet filtered on
+            A facet with no values given doesn't filter; a value no book has matches nothing """
+        selected = self.__all
+        for facet, values in filters.items():
+            selected &= self.__facet_bitmap(facet, values)
+        return selected
+
+    def __facet_bitmap(self, facet: str, values: Iterable) -> int:
+        values = list(values)
+        if len(values) == 0:
+            return self.__all
+        dense = self.__dense.get(facet, {})
+        sparse = self.__sparse.get(facet, {})
+        bitmap = 0
+        for value in values:
+            if value in dense:
+                bitmap |= dense[value]
+            elif value in sparse:
+                bitmap |= self.__sparse_bitmap(facet, value)
+        return bitmap
+
+    def __sparse_bitmap(self, facet: str, value) -> int:
+        key = (facet, value)
+        bitmap = self.__sparse_bitmaps.get(key)
+        if bitmap is None:
+            bitmap = self.__sparse_bitmaps[key] = self.__bitmap(self.__sparse[facet][value])
+            if len(self.__sparse_bitmaps) > SPARSE_BITMAP_CACHE_SIZE:
+                self.__sparse_bitmaps.popitem(last=False)
+        else:
+            self.__sparse_bitmaps.move_to_end(key)
+        return bitmap
+
+    def book_ids(self, bitmap: int, offset: int = 0, limit: int = None) -> List[int]:
+        """ Returns the ids of the books in the bitmap, in id order, skipping the first offset of them """
+        book_ids = []
+        for position in self.__positions(bitmap):
+            if limit is not None and len(book_ids) >= limit:
+                break
+            if offset > 0:
+                offset -= 1
+            else:
+                book_ids.append(self.__book_ids[position])
+        return book_ids
+
+    def __positions(self, bitmap: int) -> Iterable[int]:
+        bits = self.__bytes(bitmap)
+        nonzero_bytes = bits.translate(_NONZERO_BYTES)
+        byte_index = nonzero_bytes.find(1)
+        while byte_index != -1:
+            for bit in _BYTE_BITS[bits[byte_index]]:
+                yield (byte_index << 3) + bit
+            byte_index = nonzero_bytes.find(1, byte_index + 1)
+
+    def counts(self, filters: Dict[str, Iterable]) -> Dict[str, Dict[object, int]]:
+        """ Returns, for every value of every facet, the number of books that would match if that value were chosen
+            A facet's own filter is left out of its counts, so the other values of a facet already filtered on still
+            show what choosing them as well would add. Values that would match no books may be left out. """
+        facet_bitmaps = {facet: self.__facet_bitmap(facet, values) for facet, values in filters.items()}
+        counts = dict()
+        for facet, sizes in self.__sizes.items():
+            others = self.__all
+            for other_facet, bitmap in facet_bitmaps.items():
+                if other_facet != facet:
+                    others &= bitmap
+            if others == self.__all:
+                counts[facet] = dict(sizes)
+            elif bitmap_count(others) < len(self.__dense[facet]) + len(self.__sparse[facet]):
+                # Fewer books than values: tallying the values of those books is less work than checking each value.
+                facet_counts = counts[facet] = dict()
+                values_at = self.__values_at[facet]
+                for position in self.__positions(others):
+                    for value in values_at[position]:
+                        facet_counts[value] = facet_counts.get(value, 0) + 1
+            else:
+                dense = self.__dense[facet]
+                sparse = self.__sparse[facet]
+                bits = self.__bytes(others)
+                counts[facet] = {value: bitmap_count(dense[value] & others) if value in dense
+                                 else sum(bits[position >> 3] >> (position & 7) & 1 for position in sparse[value])
+                                 for value in sizes}
+        return counts
+
+
+def build_facet_index(repo: AbstractRepository) -> FacetIndex:
+    """ Builds a FacetIndex from the repository's books, through its get_book_ids_for_* methods
+        The index holds the books with a value for at least one facet. """
+    authors = repo.get_authors()
+    facet_values = {
+        'language': repo.get_languages(),
+        'publisher': repo.get_publishers(),
+        'author': [author.unique_id for author in authors],
+        'release_year': repo.get_release_years()
+    }
+    facet_book_ids = dict()
+    for facet, values in facet_values.items():
+        book_ids_for = getattr(repo, FACET_BOOK_IDS[facet])
+        facet_book_ids[facet] = {value: book_ids_for(value) or [] for value in dict.fromkeys(values)}
+    labels = {'author': {author.unique_id: author.full_name for author in authors}}
+    book_ids = {book_id for value_book_ids in facet_book_ids.values() for ids in value_book_ids.values()
+                for book_id in ids}
+    return FacetIndex(book_ids, facet_book_ids, labels)
+
+
+class FacetIndexCache:
+    """ Holds the FacetIndex of a repository until the repository's books change """
+
+    def __init__(self):
+        self.__repo = None
+        self.__catalogue_version = None
+        self.__facet_index = None
+
+    def get(self, repo: AbstractRepository) -> FacetIndex:
+        if self.__repo is not repo or self.__catalogue_version != repo.catalogue_version:
+            # The version is read before building, so books added while building cause another rebuild next time.
+            catalogue_version = repo.catalogue_version
+            self.__facet_index = build_facet_index(repo)
+            self.__repo = repo
+            self.__catalogue_version = catalogue_version
+        return self.__facet_index
+
+
+facet_indexes = FacetIndexCache()
@@ -1,76 +1,199 @@
 import json
-from typing import List
+import os
+import sys
+from multiprocessing import Pool
+from typing import List, Iterator, Dict, Tuple
 
 from capitulo.domain.model import Publisher, Author, Book
 
 
+class SymbolTable:
+    """ Hands out one shared object per distinct value, so values repeated across many books, like release years and
+        page counts, are only held in memory once
+        Keeps count of the bytes the repeats would otherwise have taken. """
+
+    def __init__(self):
+        self.__symbols = dict()
+        self.__bytes_saved = 0
+
+    def __len__(self) -> int:
+        return len(self.__symbols)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.__bytes_saved
+
+    def intern(self, value):
+        symbol = self.__symbols.setdefault(value, value)
+        if symbol is not value:
+            self.__bytes_saved += sys.getsizeof(value)
+        return symbol
+
+
+def book_from_json(book_json: dict, author_names: Dict[int, str], publisher_dict: dict, author_dict: dict,
+                   symbols: SymbolTable = None) -> Book:
+    # publisher_dict and author_dict are shared between calls, so every Book refers to a single Publisher or Author
+    # instance per name or id. Publisher and author names are therefore held once each, and the language is stored
+    # as the name Book looks the code up in, so the symbol table is only needed for the numbers.
+    if symbols is None:
+        symbols = SymbolTable()
+    book_instance = Book(int(book_json['book_id']), book_json['title'])
+    if publisher_dict.get(book_json['publisher']) == None and book_json['publisher'] != "":
+        publisher_dict[book_json['publisher']] = Publisher(book_json['publisher'])
+    if book_json['publisher'] == "":
+        book_instance.publisher = None
+    else:
+        book_instance.publisher = publisher_dict.get(book_json['publisher'])
+    if book_json['publication_year'] != "":
+        book_instance.release_year = symbols.intern(int(book_json['publication_year']))
+    if book_json['is_ebook'].lower() == 'false':
+        book_instance.ebook = False
+    else:
+        if book_json['is_ebook'].lower() == 'true':
+            book_instance.ebook = True
+    book_instance.language = book_json['language_code']
+    book_instance.description = book_json['description']
+    book_instance.image_hyperlink = book_json['image_url']
+    if book_json['num_pages'] != "":
+        book_instance.num_pages = symbols.intern(int(book_json['num_pages']))
+
+    # extract the author ids:
+    list_of_authors_ids = book_json['authors']
+    for author_id in list_of_authors_ids:
+
+        numerical_id = int(author_id['author_id'])
+        # We assume book authors are available in the authors file,
+        # otherwise more complex handling is required.
+        if author_dict.get(numerical_id) == None:
+            author_dict[numerical_id] = Author(numerical_id, author_names.get(numerical_id))
+        book_instance.add_author(author_dict.get(numerical_id))
+
+    return book_instance
+
+
+# Author names handed to each worker process once by the pool initializer, rather than with every chunk.
+_worker_author_names: Dict[int, str] = dict()
+
+
+def _init_worker(author_names: Dict[int, str]):
+    global _worker_author_names
+    _worker_author_names = author_names
+
+
+def _parse_chunk(chunk: Tuple[str, int, int]) -> List[Book]:
+    file_name, start, end = chunk
+    with open(file_name, 'rb') as books_jsonfile:
+        books_jsonfile.seek(start)
+        lines = books_jsonfile.read(end - start).decode('UTF-8').splitlines()
+    publisher_dict = dict()
+    author_dict = dict()
+    return [book_from_json(json.loads(line), _worker_author_names, publisher_dict, author_dict)
+            for line in lines if line.strip() != ""]
+
+
+def chunk_file(file_name: str, chunk_bytes: int) -> List[Tuple[str, int, int]]:
+    """ Splits a JSON-lines file into (file_name, start, end) byte ranges that begin and end on line boundaries """
+    file_size = os.path.getsize(file_name)
+    chunks = []
+    with open(file_name, 'rb') as jsonfile:
+        start = 0
+        while start < file_size:
+            jsonfile.seek(min(start + chunk_bytes, file_size))
+            # Extend the chunk to the end of the line it finishes in.
+            jsonfile.readline()
+            end = min(jsonfile.tell(), file_size)
+            chunks.append((file_name, start, end))
+            start = end
+    return chunks
+
+
+def share_instances(book: Book, publisher_dict: dict, author_dict: dict, symbols: SymbolTable = None):
+    """ Points a book at the first Publisher and Author instances seen for each name and id, and at the symbol
+        table's release year and page count """
+    if symbols is not None:
+        if book.release_year is not None:
+            book.release_year = symbols.intern(book.release_year)
+        if book.num_pages is not None:
+            book.num_pages = symbols.intern(book.num_pages)
+    if book.publisher is not None:
+        publisher = publisher_dict.setdefault(book.publisher.name, book.publisher)
+        if publisher is not book.publisher:
+            book.publisher = publisher
+
+    authors = [author_dict.setdefault(author.unique_id, author) for author in book.authors]
+    if any(shared is not own for shared, own in zip(authors, book.authors)):
+        for author in list(book.authors):
+            book.remove_author(author)
+        for author in authors:
+            book.add_author(author)
+
+
 class BooksJSONReader:
 
     def __init__(self, books_file_name: str, authors_file_name: str):
         self.__books_file_name = books_file_name
         self.__authors_file_name = authors_file_name
         self.__dataset_of_books = []
+        self.__symbols = SymbolTable()
 
     @property
     def dataset_of_books(self) -> List[Book]:
         return self.__dataset_of_books
 
-    def read_books_file(self) -> list:
-        books_json = []
+    @property
+    def symbols(self) -> SymbolTable:
+        """ The values shared between the books read so far; its bytes_saved reports the memory that saved """
+        return self.__symbols
+
+    def iter_books_file(self) -> Iterator[dict]:
         with open(self.__books_file_name, encoding='UTF-8') as books_jsonfile:
             for line in books_jsonfile:
-                book_entry = json.loads(line)
-                books_json.append(book_entry)
-        return books_json
+                yield json.loads(line)
 
-    def read_authors_file(self) -> list:
-        authors_json = []
+    def iter_authors_file(self) -> Iterator[dict]:
         with open(self.__authors_file_name, encoding='UTF-8') as authors_jsonfile:
             for line in authors_jsonfile:
-                author_entry = json.loads(line)
-                authors_json.append(author_entry)
-        return authors_json
+                yield json.loads(line)
+
+    def read_books_file(self) -> list:
+        return list(self.iter_books_file())
+
+    def read_authors_file(self) -> list:
+        return list(self.iter_authors_file())
 
-    def read_json_files(self):
-        authors_json = self.read_authors_file()
-        books_json = self.read_books_file()
+    def read_author_names(self) -> Dict[int, str]:
+        # Only the id and name of each author are kept, rather than every field of the authors file.
+        # Later entries for the same id win. Authors sharing a name share its string.
+        return {int(author_json['author_id']): self.__symbols.intern(author_json['name'])
+                for author_json in self.iter_authors_file()}
+
+    def iter_books(self) -> Iterator[Book]:
+        """ Yields the books one at a time, so the books file is never held in memory as a whole """
+        author_names = self.read_author_names()
         publisher_dict = dict()
         author_dict = dict()
 
-        for book_json in books_json:
-            book_instance = Book(int(book_json['book_id']), book_json['title'])
-            if publisher_dict.get(book_json['publisher']) == None and book_json['publisher'] != "":
-                publisher_dict[book_json['publisher']] = Publisher(book_json['publisher'])
-            if book_json['publisher'] == "":
-                book_instance.publisher = None
-            else:
-                book_instance.publisher = publisher_dict.get(book_json['publisher'])
-            if book_json['publication_year'] != "":
-                book_instance.release_year = int(book_json['publication_year'])
-            if book_json['is_ebook'].lower() == 'false':
-                book_instance.ebook = False
-            else:
-                if book_json['is_ebook'].lower() == 'true':
-                    book_instance.ebook = True
-            book_instance.language = book_json['language_code']
-            book_instance.description = book_json['description']
-            book_instance.image_hyperlink = book_json['image_url']
-            if book_json['num_pages'] != "":
-                book_instance.num_pages = int(book_json['num_pages'])
-
-            # extract the author ids:
-            list_of_authors_ids = book_json['authors']
-            for author_id in list_of_authors_ids:
-
-                numerical_id = int(author_id['author_id'])
-                # We assume book authors are available in the authors file,
-                # otherwise more complex handling is required.
-                author_name = None
-                for author_json in authors_json:
-                    if int(author_json['author_id']) == numerical_id:
-                        author_name = author_json['name']
-                if author_dict.get(numerical_id) == None:
-                    author_dict[numerical_id] = Author(numerical_id, author_name)
-                book_instance.add_author(author_dict.get(numerical_id))
-
-            self.__dataset_of_books.append(book_instance)
+        for book_json in self.iter_books_file():
+            yield book_from_json(book_json, author_names, publisher_dict, author_dict, self.__symbols)
+
+    def iter_books_parallel(self, processes: int = None, chunk_bytes: int = 16 * 1024 * 1024) -> Iterator[Book]:
+        """ Yields the books in file order, parsing byte-range chunks of the books file in a process pool """
+        author_names = self.read_author_names()
+        chunks = chunk_file(str(self.__books_file_name), chunk_bytes)
+        publisher_dict = dict()
+        author_dict = dict()
+
+        with Pool(processes, initializer=_init_worker, initargs=(author_names,)) as pool:
+            # Each worker builds its own Publisher and Author instances, so they are merged here to keep a single
+            # instance per publisher name and author id across the whole dataset.
+            for books in pool.imap(_parse_chunk, chunks):
+                for book in books:
+                    share_instances(book, publisher_dict, author_dict, self.__symbols)
+                    yield book
+
+    def read_json_files(self, processes: int = None):
+        # Parsing only happens in a process pool when more than one process is asked for.
+        if processes is not None and processes > 1:
+            self.__dataset_of_books.extend(self.iter_books_parallel(processes))
+        else:
+            self.__dataset_of_books.extend(self.iter_books())
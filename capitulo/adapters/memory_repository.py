@@ -1,92 +1,205 @@
 import csv
 
 from capitulo.adapters.jsondatareader import BooksJSONReader as reader
+from capitulo.adapters.csv_data_importer import read_users_file
 from pathlib import Path
 from datetime import date, datetime
-from typing import List
+from typing import Dict, Iterable, List, Tuple
 import sys
 
-from bisect import bisect, bisect_left, insort_left
+from bisect import bisect, bisect_left, bisect_right, insort_left
 
-from werkzeug.security import generate_password_hash
 
 from capitulo.adapters.repository import AbstractRepository, RepositoryException
+from capitulo.adapters.search_index import SearchIndex
 from capitulo.domain.model import Publisher, Author, Book, Review, User, BooksInventory, make_review
 
 
+def user_name_key(user_name):
+    """ The key a user is stored and looked up under
+        User names are case sensitive. Surrounding whitespace is ignored, as User strips it from the names it is
+        given. """
+    if isinstance(user_name, str):
+        return user_name.strip()
+    return user_name
+
+
 class MemoryRepository(AbstractRepository):
     # Books ordered by title, not id. id is assumed unique
 
     def __init__(self):
+        super().__init__()
         self.__books = list()
         self.__books_index = dict()
-        self.__users = list()
+        # Users keyed by user_name_key(user_name). The dict keeps them in the order they were added.
+        self.__users = dict()
         self.__reviews = list()
-        self.__languages = list()
-        self.__authors = list()
-        self.__publishers = list()
-        self.__release_years = list()
+
+        # Secondary indexes mapping a category key to a sorted list of book ids. They are maintained by
+        # add_book/remove_book so category lookups never have to scan the whole catalogue.
+        self.__language_index = dict()
+        self.__publisher_index = dict()
+        self.__release_year_index = dict()
+        self.__author_index = dict()
+        self.__authors = dict()
+
+        # The keys each book was indexed under, so a book can be removed from the indexes even after its
+        # attributes have been changed.
+        self.__indexed_keys = dict()
+
+        # The indexes get_book_ids_page can slice a page of ids out of, by category.
+        self.__category_indexes = {
+            'language': self.__language_index,
+            'author': self.__author_index,
+            'publisher': self.__publisher_index,
+            'release_year': self.__release_year_index
+        }
+
+        # Full text index over the books, for the home page search.
+        self.__search_index = SearchIndex()
 
     def add_user(self, user: User):
-        self.__users.append(user)
+        # The first user added under a name keeps it, as the database's unique user_name column would insist.
+        self.__users.setdefault(user_name_key(user.user_name), user)
 
     def get_user(self, user_name) -> User:
-        return next((user for user in self.__users if user.user_name == user_name), None)
+        return self.__users.get(user_name_key(user_name))
+
+    def get_users(self) -> List[User]:
+        """ Returns the users in the order they were added """
+        return list(self.__users.values())
 
     def get_number_of_users(self) -> int:
         return len(self.__users)
 
     def add_book(self, book: Book):
+        # Adding a book with an existing id replaces it, and re-indexes it under its current attributes.
+        if book.book_id in self.__books_index:
+            self.remove_book(self.__books_index[book.book_id])
         insort_left(self.__books, book)
         self.__books_index[book.book_id] = book
-        if book.language is not None:
-            if book.language not in self.__languages:
-                self.__languages.append(book.language)
-        if book.authors is not None:
-            for author in book.authors:
-                if author not in self.__authors:
-                    self.__authors.append(author)
-        if book.publisher is not None:
-            if book.publisher.name not in self.__publishers:
-                self.__publishers.append(book.publisher.name)
-        if book.release_year is not None:
-            if book.release_year not in self.__release_years:
-                if book.release_year is not None:
-                    self.__release_years.append(book.release_year)
-
-    def get_book(self, id: int) -> Book:
+        self.__index_book(book)
+        self.catalogue_changed()
+
+    def add_books(self, books: Iterable[Book]):
+        # The books are appended and every list they went into is sorted once at the end, as inserting each one in
+        # order costs O(n) when the ids don't arrive ascending.
+        batch = dict()
+        for book in books:
+            batch[book.book_id] = book
+        for book_id in batch:
+            if book_id in self.__books_index:
+                self.remove_book(self.__books_index[book_id])
+        unsorted = dict()
+        for book in batch.values():
+            self.__books.append(book)
+            self.__books_index[book.book_id] = book
+            self.__index_book(book, unsorted)
+        if len(batch) > 0:
+            self.__books.sort()
+            for book_ids in unsorted.values():
+                book_ids.sort()
+            self.catalogue_changed()
+
+    def update_book(self, book: Book):
+        """ Re-indexes a book whose language, publisher, release year or authors have changed """
+        self.add_book(book)
+
+    def remove_book(self, book: Book):
+        if self.__books_index.get(book.book_id) is None:
+            return
+        stored_book = self.__books_index.pop(book.book_id)
+        del self.__books[bisect_left(self.__books, stored_book)]
+        self.__unindex_book(stored_book)
+        self.catalogue_changed()
+
+    def __index_book(self, book: Book, unsorted: dict = None):
+        # With unsorted, the id is appended to each list instead, and the lists are collected in it to be sorted.
+        language = book.language
+        publisher_name = book.publisher.name if book.publisher is not None else None
+        release_year = book.release_year
+        author_ids = tuple(author.unique_id for author in book.authors)
+
+        if language is not None:
+            self.__add_to_index(self.__language_index, language, book.book_id, unsorted)
+        if publisher_name is not None:
+            self.__add_to_index(self.__publisher_index, publisher_name, book.book_id, unsorted)
+        if release_year is not None:
+            self.__add_to_index(self.__release_year_index, release_year, book.book_id, unsorted)
+        for author in book.authors:
+            self.__authors.setdefault(author.unique_id, author)
+            self.__add_to_index(self.__author_index, author.unique_id, book.book_id, unsorted)
+
+        self.__indexed_keys[book.book_id] = (language, publisher_name, release_year, author_ids)
+        self.__search_index.add_book(book)
+
+    def __unindex_book(self, book: Book):
+        language, publisher_name, release_year, author_ids = self.__indexed_keys.pop(book.book_id)
+        self.__remove_from_index(self.__language_index, language, book.book_id)
+        self.__remove_from_index(self.__publisher_index, publisher_name, book.book_id)
+        self.__remove_from_index(self.__release_year_index, release_year, book.book_id)
+        for author_id in author_ids:
+            self.__remove_from_index(self.__author_index, author_id, book.book_id)
+            if author_id not in self.__author_index:
+                del self.__authors[author_id]
+        self.__search_index.remove(book.book_id)
+
+    @staticmethod
+    def __add_to_index(index: dict, key, book_id: int, unsorted: dict = None):
+        book_ids = index.setdefault(key, [])
+        if unsorted is None:
+            insort_left(book_ids, book_id)
+        else:
+            book_ids.append(book_id)
+            unsorted[id(book_ids)] = book_ids
+
+    @staticmethod
+    def __remove_from_index(index: dict, key, book_id: int):
+        book_ids = index.get(key)
+        if book_ids is None:
+            return
+        position = bisect_left(book_ids, book_id)
+        if position < len(book_ids) and book_ids[position] == book_id:
+            del book_ids[position]
+        if len(book_ids) == 0:
+            del index[key]
+
+    def __books_for_ids(self, book_ids) -> List[Book]:
+        return [self.__books_index[book_id] for book_id in book_ids]
+
+    def get_book(self, id: int, load: str = None) -> Book:
+        # Books are held with everything they refer to, so there is nothing to load.
         book = self.__books_index.get(id)
         return book
 
     def get_books_by_author(self, author: str) -> List[Book]:
         # Searching for one author will return all books done by that author.
-        matching_books = []
-        for book in self.__books:
-            for book_author in book.authors:
-                if author in book_author.full_name and book not in matching_books:
-                    matching_books.append(book)
-        if len(matching_books) == 0:
+        matching_ids = set()
+        for author_id, book_author in self.__authors.items():
+            if author in book_author.full_name:
+                matching_ids.update(self.__author_index[author_id])
+        if len(matching_ids) == 0:
             return None
-        return matching_books
+        return self.__books_for_ids(sorted(matching_ids))
 
     def get_books_by_release_year(self, release_year: int) -> List[Book]:
-        matching_books = [book for book in self.__books if book.release_year == release_year]
-        if len(matching_books) == 0:
+        book_ids = self.__release_year_index.get(release_year)
+        if book_ids is None:
             return None
-        return matching_books
+        return self.__books_for_ids(book_ids)
 
     def get_books_by_publisher(self, publisher: str) -> List[Book]:
-        matching_books = [book for book in self.__books if book.publisher.name == publisher]
-        if len(matching_books) == 0:
+        book_ids = self.__publisher_index.get(publisher)
+        if book_ids is None:
             return None
-        return matching_books
+        return self.__books_for_ids(book_ids)
 
     def get_books_by_language(self, language: str) -> List[Book]:
         # Needs to be an exact match for the language we're after.
-        matching_books = [book for book in self.__books if book.language == language]
-        if len(matching_books) == 0:
+        book_ids = self.__language_index.get(language)
+        if book_ids is None:
             return None
-        return matching_books
+        return self.__books_for_ids(book_ids)
 
     def get_books_by_title(self, title: str) -> List[Book]:
         # Doesn't have to be an exact match, as long as the searched for string is a substring of the title.
@@ -123,6 +236,7 @@ class MemoryRepository(AbstractRepository):
     def add_review(self, review: Review):
         super().add_review(review)
         self.__reviews.append(review)
+        self.book_changed(review.book.book_id)
 
     def get_reviews(self):
         return self.__reviews
@@ -131,46 +245,41 @@ class MemoryRepository(AbstractRepository):
         return len(self.__reviews)
 
     def get_languages(self):
-        return self.__languages
+        return list(self.__language_index)
 
     def get_authors(self):
-        return sorted(self.__authors)
+        return sorted(self.__authors.values())
 
     def get_publishers(self):
-        return sorted(self.__publishers)
+        return sorted(self.__publisher_index)
 
     def get_release_years(self):
-        return sorted(self.__release_years)
+        return sorted(self.__release_year_index)
 
     def get_all_books(self):
         return sorted(self.__books)
 
     def get_book_ids_for_language(self, language):
         # Needs to be an exact match for the language we're after.
-        matching_book_ids = [book.book_id for book in self.__books if book.language == language]
-        if len(matching_book_ids) == 0:
+        book_ids = self.__language_index.get(language)
+        if book_ids is None:
             return None
-        return matching_book_ids
+        return list(book_ids)
 
     def get_book_ids_for_author(self, author_id):
-        matching_book_ids = []
-        for book in self.__books:
-            for author in book.authors:
-                if author_id == int(author.unique_id):
-                    matching_book_ids.append(book.book_id)
-        return matching_book_ids
+        return list(self.__author_index.get(author_id, []))
 
     def get_book_ids_for_publisher(self, publisher_name: str):
-        matching_book_ids = [book.book_id for book in self.__books if publisher_name == book.publisher.name]
-        if len(matching_book_ids) == 0:
+        book_ids = self.__publisher_index.get(publisher_name)
+        if book_ids is None:
             return None
-        return matching_book_ids
+        return list(book_ids)
 
     def get_book_ids_for_year(self, year: int):
-        matching_book_ids = [book.book_id for book in self.__books if int(year) == book.release_year]
-        if len(matching_book_ids) == 0:
+        book_ids = self.__release_year_index.get(int(year))
+        if book_ids is None:
             return None
-        return matching_book_ids
+        return list(book_ids)
 
     def get_book_ids_all(self):
         book_ids = [book.book_id for book in self.__books]
@@ -178,7 +287,7 @@ class MemoryRepository(AbstractRepository):
             return None
         return book_ids
 
-    def get_books_by_id(self, id_list):
+    def get_books_by_id(self, id_list, load: str = None):
         # Strip out unrelated IDs
         correct_ids = [id_val for id_val in id_list if id_val in self.__books_index]
 
@@ -186,31 +295,61 @@ class MemoryRepository(AbstractRepository):
         books = [self.__books_index[id_val] for id_val in correct_ids]
         return books
 
-
-def populate(data_path: Path, repo: MemoryRepository):
+    def search_book_ids(self, query: str) -> List[int]:
+        return self.__search_index.search(query)
+
+    def get_facet_counts(self) -> Dict[str, Dict[object, int]]:
+        # add_book and remove_book keep the indexes up to date, so each count is just the length of a key's ids.
+        return {category: {key: len(book_ids) for key, book_ids in index.items()}
+                for category, index in self.__category_indexes.items()}
+
+    def get_book_ids_page(self, category: str, key, offset: int, limit: int) -> Tuple[List[int], int]:
+        index = self.__category_indexes.get(category)
+        if index is None:
+            return super().get_book_ids_page(category, key, offset, limit)
+        # Slices the page straight out of the index rather than copying the whole category first.
+        book_ids = index.get(int(key) if category == 'release_year' else key, [])
+        return book_ids[offset:offset + limit], len(book_ids)
+
+    def get_book_ids_after(self, category: str, key, after_book_id: int = None, limit: int = None) -> List[int]:
+        index = self.__category_indexes.get(category)
+        if index is None:
+            return super().get_book_ids_after(category, key, after_book_id, limit)
+        # The index is sorted, so the page starts where after_book_id would be inserted.
+        book_ids = index.get(int(key) if category == 'release_year' else key, [])
+        start = 0 if after_book_id is None else bisect_right(book_ids, after_book_id)
+        return book_ids[start:] if limit is None else book_ids[start:start + limit]
+
+    def count_book_ids(self, category: str, key) -> int:
+        index = self.__category_indexes.get(category)
+        if index is None:
+            return super().count_book_ids(category, key)
+        return len(index.get(int(key) if category == 'release_year' else key, []))
+
+
+def populate(data_path: Path, repo: MemoryRepository, processes: int = None, password_hash_cache: Path = None):
     # Using the JSON data reader we can populate the repository
     books_file_path = data_path / 'comic_books_excerpt.json'
     authors_file_path = data_path / 'book_authors_excerpt.json'
     our_reader = reader(books_file_path, authors_file_path)
-    our_reader.read_json_files()
-    books_to_load = our_reader.dataset_of_books
-    for book in books_to_load:
+    # Books are streamed straight into the repository rather than being collected by the reader first.
+    for book in our_reader.iter_books():
         repo.add_book(book)
-    users = load_users(data_path, repo)
+    users = load_users(data_path, repo, processes, password_hash_cache)
     load_reviews(data_path, repo, users)
 
 
-def load_users(data_path: Path, repo: MemoryRepository):
+def load_users(data_path: Path, repo: MemoryRepository, processes: int = None, hash_cache_path: Path = None):
     users = dict()
 
     users_filename = str(Path(data_path) / "users.csv")
-    for data_row in read_csv_file(users_filename):
+    for user_id, user_name, password_hash in read_users_file(users_filename, processes, hash_cache_path):
         user = User(
-            user_name=data_row[1],
-            password=generate_password_hash(data_row[2])
+            user_name=user_name,
+            password=password_hash
         )
         repo.add_user(user)
-        users[data_row[0]] = user
+        users[user_id] = user
     return users
 
 
@@ -1,8 +1,8 @@
 from sqlalchemy import (
     Table, MetaData, Column, Integer, String, Date, DateTime,
-    ForeignKey
+    ForeignKey, Index, inspect
 )
-from sqlalchemy.orm import backref, mapper, relation, relationship, synonym
+from sqlalchemy.orm import backref, mapper, relation, relationship, synonym, clear_mappers
 
 from capitulo.domain import model
 
@@ -67,6 +67,36 @@ authored_books_table = Table(
     Column('book_id', ForeignKey('books.book_id'))
 )
 
+# Indexes on the columns the repository looks books, authors, reviews and reading lists up by. They are created with
+# the tables by metadata.create_all; create_missing_indexes adds them to databases created before they existed.
+Index('ix_books_book_id', books_table.c.book_id, unique=True)
+# The category indexes end in book_id, so a category's books are read from them in id order, starting at any id.
+Index('ix_books_language_book_id', books_table.c.language, books_table.c.book_id)
+Index('ix_books_publisher_book_id', books_table.c.publisher, books_table.c.book_id)
+Index('ix_books_release_year_book_id', books_table.c.release_year, books_table.c.book_id)
+Index('ix_book_authors_author_id_book_id', authored_books_table.c.author_id, authored_books_table.c.book_id)
+Index('ix_book_authors_book_id', authored_books_table.c.book_id)
+Index('ix_reviews_book_id', reviews_table.c.book_id)
+Index('ix_authors_full_name', authors_table.c.full_name)
+Index('ix_reading_lists_user_name_title', reading_list_table.c.user_name, reading_list_table.c.title)
+
+
+def create_missing_indexes(engine):
+    """ Creates any index defined in the metadata that an existing database doesn't have yet
+        Returns the names of the indexes that were created """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    created = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+                created.append(index.name)
+    return created
+
 #published_books_table = Table(
 #    'book_publishers', metadata,
 #    Column('id', Integer, primary_key=True, autoincrement=True),
@@ -74,8 +104,28 @@ authored_books_table = Table(
 #    Column('book_id', ForeignKey('books.book_id'))
 #)
 
+# The domain model's own class attributes, from before it was first mapped. Mapping replaces some of them, such as
+# Book.publisher with the publisher backref, and clear_mappers deletes those rather than putting them back.
+_model_attributes = dict()
+
+MAPPED_MODEL_CLASSES = (model.User, model.Review, model.Publisher, model.Book, model.Author)
+
+
+def unmap_model():
+    """ Removes the mappings made by map_model_to_tables and restores the domain model's own attributes, so that the
+        model works outside the database again """
+    clear_mappers()
+    for model_class, attributes in _model_attributes.items():
+        for name, value in attributes.items():
+            if model_class.__dict__.get(name) is not value:
+                setattr(model_class, name, value)
+
+
 def map_model_to_tables():
-    
+    for model_class in MAPPED_MODEL_CLASSES:
+        if model_class not in _model_attributes:
+            _model_attributes[model_class] = dict(vars(model_class))
+
     mapper(model.User, users_table, properties={
         '_User__user_name': users_table.c.user_name,
         '_User__password': users_table.c.password,
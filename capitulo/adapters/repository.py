@@ -1,5 +1,6 @@
 import abc
-from typing import List
+from bisect import bisect_right
+from typing import Dict, List, Iterable, Tuple
 from datetime import date
 
 from capitulo.domain.model import Publisher, Author, Book, Review, User, BooksInventory
@@ -11,13 +12,68 @@ class RepositoryException(Exception):
     def __init__(self, message=None):
         pass
 
+# The categories get_book_ids_page can page through, with the method returning all of a category's book ids
+BOOK_ID_CATEGORIES = {
+    'language': 'get_book_ids_for_language',
+    'author': 'get_book_ids_for_author',
+    'publisher': 'get_book_ids_for_publisher',
+    'release_year': 'get_book_ids_for_year',
+    'search': 'search_book_ids'
+}
+
+# The categories whose book ids come in id order, which get_book_ids_after can page through by book id
+KEYSET_CATEGORIES = ('language', 'author', 'publisher', 'release_year')
+
+# What get_book and get_books_by_id load along with a book, for repositories that load related objects separately:
+# a listing shows a book's authors, publisher and number of reviews, and a book's own page also shows its reviews and
+# who wrote them. Without either, related objects are loaded when first used.
+BOOK_LISTING = 'listing'
+BOOK_DETAIL = 'detail'
+
+
 class AbstractRepository(abc.ABC):
 
+    def __init__(self):
+        self.__catalogue_version = 0
+        # book id -> changes made to the book itself, such as reviews added to it
+        self.__book_versions = dict()
+
+    @property
+    def catalogue_version(self) -> int:
+        """ Counts the changes made to the books in the repository
+            Caches built from the catalogue compare against it to know when to rebuild """
+        return self.__catalogue_version
+
+    def catalogue_changed(self):
+        """ Records that books have been added to, changed in or removed from the repository """
+        self.__catalogue_version += 1
+
+    def book_version(self, book_id: int) -> Tuple[int, int]:
+        """ Counts the changes made to a book, along with those made to the catalogue
+            Caches of what is shown of a book compare against it to know when to rebuild """
+        return self.__catalogue_version, self.__book_versions.get(book_id, 0)
+
+    def book_changed(self, book_id: int):
+        """ Records that a book has changed, such as by having a review added to it """
+        self.__book_versions[book_id] = self.__book_versions.get(book_id, 0) + 1
+
+    def book_versions(self, book_ids: Iterable[int]) -> Dict[int, tuple]:
+        """ Returns a version of each of the books, which changes whenever the book changes
+            Implementations whose books can be changed from other processes, such as other workers sharing a database,
+            override this to read the versions from where the changes are made. """
+        return {book_id: self.book_version(book_id) for book_id in book_ids}
+
     @abc.abstractmethod
     def add_user(self, user: User):
         """ Adds a new user account to the repository. """
         raise NotImplementedError
     
+    def add_users(self, users: Iterable[User]):
+        """ Adds many user accounts to the repository
+            Implementations can override this to store the users more efficiently than one add_user call each """
+        for user in users:
+            self.add_user(user)
+
     @abc.abstractmethod
     def get_user(self, user_name: str) -> User:
         """ Returns a user account object from the repository by user_name 
@@ -34,10 +90,17 @@ class AbstractRepository(abc.ABC):
         """ Adds a book to the repository """
         raise NotImplementedError
     
+    def add_books(self, books: Iterable[Book]):
+        """ Adds many books to the repository
+            Implementations can override this to store the books more efficiently than one add_book call each """
+        for book in books:
+            self.add_book(book)
+
     @abc.abstractmethod
-    def get_book(self, id: int) -> Book:
+    def get_book(self, id: int, load: str = None) -> Book:
         """ Returns a book object from the repository 
-            Returns None if there is no associated book """
+            Returns None if there is no associated book
+            load is BOOK_LISTING or BOOK_DETAIL to load what those show of the book with it """
         raise NotImplementedError
     
     @abc.abstractmethod
@@ -118,6 +181,12 @@ class AbstractRepository(abc.ABC):
         if review.book is None or review not in review.book.reviews:
             raise RepositoryException('Review not correctly attached to a Book')
     
+    def add_reviews(self, reviews: Iterable[Review]):
+        """ Adds many reviews to the repository
+            Implementations can override this to store the reviews more efficiently than one add_review call each """
+        for review in reviews:
+            self.add_review(review)
+
     @abc.abstractmethod
     def get_reviews(self):
         """ Returns the reviews stored in the repository """
@@ -164,10 +233,64 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_books_by_id(self, id_list):
-        """ Returns all books by ids """
+    def get_books_by_id(self, id_list, load: str = None):
+        """ Returns all books by ids
+            load is BOOK_LISTING or BOOK_DETAIL to load what those show of the books with them """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def search_book_ids(self, query: str) -> List[int]:
+        """ Returns the ids of the books whose title, authors, publisher, language or release year contain words
+            starting with every word of the query, best matches first """
         raise NotImplementedError
 
+    def get_book_ids_page(self, category: str, key, offset: int, limit: int) -> Tuple[List[int], int]:
+        """ Returns the ids of up to limit books in a category, starting offset books in, together with the number of
+            books in the whole category
+            category is one of BOOK_ID_CATEGORIES; key is the language, author unique id, publisher name, release
+            year or search query
+            Implementations can override this to avoid reading the ids of the books that aren't on the page """
+        if category not in BOOK_ID_CATEGORIES:
+            raise RepositoryException(f'Unknown book category {category}')
+        book_ids = getattr(self, BOOK_ID_CATEGORIES[category])(key)
+        if book_ids is None:
+            book_ids = []
+        return book_ids[offset:offset + limit], len(book_ids)
+
+    def get_book_ids_after(self, category: str, key, after_book_id: int = None, limit: int = None) -> List[int]:
+        """ Returns the ids of up to limit books in a category whose ids come after after_book_id, in id order, or
+            from the first book when after_book_id is None
+            Passing the last id of a page gets the next page, which costs the same however deep it is, where an
+            offset has to step over every book before the page.
+            category is one of KEYSET_CATEGORIES; key is as for get_book_ids_page
+            Implementations can override this to avoid reading the ids of the books that aren't on the page """
+        if category not in KEYSET_CATEGORIES:
+            raise RepositoryException(f'Books in category {category} are not in id order')
+        book_ids = sorted(getattr(self, BOOK_ID_CATEGORIES[category])(key) or [])
+        start = 0 if after_book_id is None else bisect_right(book_ids, after_book_id)
+        return book_ids[start:] if limit is None else book_ids[start:start + limit]
+
+    def count_book_ids(self, category: str, key) -> int:
+        """ Returns the number of books in a category, as get_book_ids_page does alongside a page
+            Implementations can override this to count the books without reading their ids """
+        _, total = self.get_book_ids_page(category, key, 0, 0)
+        return total
+
+    def get_facet_counts(self) -> Dict[str, Dict[object, int]]:
+        """ Returns the number of books with each language, publisher name, author unique_id and release year, under
+            the keys 'language', 'publisher', 'author' and 'release_year'
+            Implementations can override this to avoid looking up the books of every value in turn """
+        return {
+            'language': {language: len(self.get_book_ids_for_language(language) or [])
+                         for language in self.get_languages()},
+            'publisher': {publisher: len(self.get_book_ids_for_publisher(publisher) or [])
+                          for publisher in self.get_publishers()},
+            'author': {author.unique_id: len(self.get_book_ids_for_author(author.unique_id) or [])
+                       for author in self.get_authors()},
+            'release_year': {release_year: len(self.get_book_ids_for_year(release_year) or [])
+                             for release_year in self.get_release_years()}
+        }
+
     @abc.abstractmethod
     def get_publishers(self):
         raise NotImplementedError
@@ -5,12 +5,13 @@ from capitulo.adapters.csv_data_importer import load_reviews, load_users, load_b
 from capitulo.adapters.jsondatareader import BooksJSONReader as reader
 
 
-def populate(data_path: Path, repo: AbstractRepository, database_mode: bool):
+def populate(data_path: Path, repo: AbstractRepository, database_mode: bool, processes: int = None,
+             password_hash_cache: Path = None):
     # Load books into the repository
-    load_books(data_path, repo, database_mode)
+    load_books(data_path, repo, database_mode, processes)
 
     # Load users into the repository
-    users = load_users(data_path, repo)
+    users = load_users(data_path, repo, processes, password_hash_cache)
 
     # Load reviews into the repository:
     load_reviews(data_path, repo, users)
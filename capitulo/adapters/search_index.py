@@ -0,0 +1,122 @@
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from capitulo.domain.model import Book
+
+# How much a match in each field counts towards a book's rank.
+FIELD_WEIGHTS = {
+    'title': 4,
+    'author': 3,
+    'publisher': 2,
+    'language': 1,
+    'release_year': 1
+}
+
+# A term that equals a token counts this many times more than one that is only a prefix of it.
+EXACT_MATCH_FACTOR = 2
+
+_token_pattern = re.compile(r'\w+')
+
+
+def tokenise(text) -> List[str]:
+    """ Splits text into lower case words, ignoring punctuation """
+    if text is None:
+        return []
+    return _token_pattern.findall(str(text).lower())
+
+
+def search_fields(book: Book) -> Dict[str, List[str]]:
+    """ Returns the searchable text of a book, grouped by field """
+    return {
+        'title': [book.title],
+        'author': [author.full_name for author in book.authors],
+        'publisher': [book.publisher.name] if book.publisher is not None else [],
+        'language': [book.language],
+        'release_year': [book.release_year]
+    }
+
+
+class SearchIndex:
+    """ An inverted index from the words of each book's title, authors, publisher, language and release year to
+        the ids of the books they appear in """
+
+    def __init__(self):
+        # token -> {book id -> weight of the heaviest field the token appears in}
+        self.__postings = dict()
+        # book id -> the tokens it was indexed under, so it can be removed again
+        self.__book_tokens = dict()
+        # All tokens in order, for prefix lookups. Rebuilt on the next search after the vocabulary changes.
+        self.__sorted_tokens: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.__book_tokens)
+
+    def add_book(self, book: Book):
+        self.add(book.book_id, search_fields(book))
+
+    def add(self, book_id: int, fields: Dict[str, List[str]]):
+        if book_id in self.__book_tokens:
+            self.remove(book_id)
+
+        token_weights = dict()
+        for field, values in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for value in values:
+                for token in tokenise(value):
+                    if token_weights.get(token, 0) < weight:
+                        token_weights[token] = weight
+
+        for token, weight in token_weights.items():
+            postings = self.__postings.get(token)
+            if postings is None:
+                postings = self.__postings[token] = dict()
+                self.__sorted_tokens = None
+            postings[book_id] = weight
+        self.__book_tokens[book_id] = tuple(token_weights)
+
+    def remove(self, book_id: int):
+        for token in self.__book_tokens.pop(book_id, ()):
+            postings = self.__postings[token]
+            del postings[book_id]
+            if len(postings) == 0:
+                del self.__postings[token]
+                self.__sorted_tokens = None
+
+    def __tokens_starting_with(self, prefix: str) -> List[str]:
+        if self.__sorted_tokens is None:
+            self.__sorted_tokens = sorted(self.__postings)
+        tokens = []
+        position = bisect_left(self.__sorted_tokens, prefix)
+        while position < len(self.__sorted_tokens) and self.__sorted_tokens[position].startswith(prefix):
+            tokens.append(self.__sorted_tokens[position])
+            position += 1
+        return tokens
+
+    def __scores_for_term(self, term: str) -> Dict[int, int]:
+        # A term matches every token it is a prefix of; a book scores its best match.
+        scores = dict()
+        for token in self.__tokens_starting_with(term):
+            factor = EXACT_MATCH_FACTOR if token == term else 1
+            for book_id, weight in self.__postings[token].items():
+                score = weight * factor
+                if scores.get(book_id, 0) < score:
+                    scores[book_id] = score
+        return scores
+
+    def search(self, query: str) -> List[int]:
+        """ Returns the ids of the books matching every word of the query, each word matching as a prefix
+            Books are ordered by how well they match, best first, then by id; each book appears once """
+        terms = list(dict.fromkeys(tokenise(query)))
+        if len(terms) == 0:
+            return []
+
+        # Starting from the term with the fewest matches keeps the work proportional to the size of the result.
+        term_scores = sorted((self.__scores_for_term(term) for term in terms), key=len)
+        totals = dict(term_scores[0])
+        for scores in term_scores[1:]:
+            totals = {book_id: total + scores[book_id] for book_id, total in totals.items() if book_id in scores}
+            if len(totals) == 0:
+                break
+
+        return sorted(totals, key=lambda book_id: (-totals[book_id], book_id))
@@ -0,0 +1,80 @@
+""" Saves a populated MemoryRepository to a binary file, and loads it back, so that memory mode doesn't have to
+    re-read the data files and rehash the passwords on every start. """
+import gc
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Iterable, Optional
+
+from capitulo.adapters.memory_repository import MemoryRepository
+
+SNAPSHOT_MAGIC = b'CAPSNAP'
+
+# Bump whenever MemoryRepository or the domain classes change in a way older snapshots can't be loaded into.
+SNAPSHOT_VERSION = 3
+
+# magic, format version, then the SHA-256 digest of the data files the snapshot was built from
+_header = struct.Struct(f'>{len(SNAPSHOT_MAGIC)}sH32s')
+
+# The data files memory mode is populated from
+SOURCE_FILE_NAMES = ['comic_books_excerpt.json', 'book_authors_excerpt.json', 'users.csv', 'reviews.csv']
+
+
+def source_digest(data_path: Path, file_names: Iterable[str] = SOURCE_FILE_NAMES) -> bytes:
+    """ Returns a SHA-256 digest of the names and contents of the data files """
+    digest = hashlib.sha256()
+    for file_name in file_names:
+        digest.update(file_name.encode('utf-8'))
+        with open(Path(data_path) / file_name, 'rb') as source_file:
+            for block in iter(lambda: source_file.read(1024 * 1024), b''):
+                digest.update(block)
+    return digest.digest()
+
+
+def save_snapshot(repo: MemoryRepository, snapshot_path: Path, digest: bytes):
+    # Written to a temporary file first, so a worker starting at the same time never sees half a snapshot.
+    temporary_path = Path(f'{snapshot_path}.{os.getpid()}.tmp')
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(_header.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, digest))
+        pickle.dump(repo, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, snapshot_path)
+
+
+def load_snapshot(snapshot_path: Path, digest: bytes) -> Optional[MemoryRepository]:
+    """ Returns the repository saved in the snapshot file
+        Returns None if there is no snapshot, or it was saved by another version or from other data files """
+    try:
+        snapshot_file = open(snapshot_path, 'rb')
+    except FileNotFoundError:
+        return None
+
+    with snapshot_file:
+        if os.fstat(snapshot_file.fileno()).st_size < _header.size:
+            return None
+        with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            repo = _load_mapped_snapshot(mapped, digest)
+
+    if not isinstance(repo, MemoryRepository):
+        return None
+    return repo
+
+
+def _load_mapped_snapshot(mapped: mmap.mmap, digest: bytes):
+    magic, version, snapshot_digest = _header.unpack_from(mapped)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or snapshot_digest != digest:
+        return None
+
+    # Unpickling creates a great many objects that all stay alive, so collector passes during it are wasted.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with memoryview(mapped) as contents, contents[_header.size:] as pickled_repo:
+            return pickle.loads(pickled_repo)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
@@ -9,7 +9,6 @@ from password_validator import PasswordValidator
 
 from functools import wraps
 
-import capitulo.utilities.utilities as utilities
 import capitulo.authentication.services as services
 import capitulo.adapters.repository as repo
 
@@ -78,8 +77,7 @@ def login():
         title='Login',
         user_name_error_message=user_name_not_recognised,
         password_error_message=password_does_not_match_user_name,
-        form=form,
-        language_urls=utilities.get_languages_and_urls()
+        form=form
     )
 
 
@@ -1,5 +1,3 @@
-import math
-
 from flask import Blueprint
 from flask import request, render_template, redirect, url_for, session
 
@@ -9,8 +7,8 @@ from wtforms import TextAreaField, HiddenField, SubmitField, IntegerField, valid
 from wtforms.validators import DataRequired, Length, ValidationError, NumberRange
 
 import capitulo.adapters.repository as repo
-import capitulo.utilities.utilities as utilities
 import capitulo.books.services as services
+import capitulo.utilities.pagination as pagination
 
 import sys
 
@@ -19,19 +17,23 @@ from capitulo.authentication.authentication import login_required
 # Configure the Blueprint
 books_blueprint = Blueprint('books_bp', __name__)
 
+# The facets of the browse page: the query parameter each is read from, the type of its values and its heading
+BROWSE_FACETS = {
+    'language': ('language', str, 'Languages'),
+    'publisher': ('publisher_name', str, 'Publishers'),
+    'author': ('author_id', int, 'Authors'),
+    'release_year': ('release_year', int, 'Release years')
+}
+
 
 @books_blueprint.route('/<int:book_id>', methods=['GET', 'POST'])
 def individual_book(book_id):
     # Read query parameters.
     show_reviews = request.args.get('view_reviews_for')
-    book = services.get_book(book_id, repo.repo_instance)
-    book['add_review_url'] = url_for('books_bp.review_book', book=book['id'])
-    return render_template('individual_book.html', book=book, show_reviews_for_book=show_reviews,
-                           author_urls=utilities.get_authors_and_urls(),
-                           language_urls=utilities.get_languages_and_urls(),
-                           publisher_urls=utilities.get_publishers_and_urls(),
-                           release_year_urls=utilities.get_release_years_and_urls()
-                           )
+    # The book's view is shared and read-only, so the page's own links go on a copy.
+    book = dict(services.get_book(book_id, repo.repo_instance),
+                add_review_url=url_for('books_bp.review_book', book=book_id))
+    return render_template('individual_book.html', book=book, show_reviews_for_book=show_reviews)
 
 
 @books_blueprint.route('/books_by_language', methods=['GET'])
@@ -40,37 +42,26 @@ def books_by_language():
 
     # Read in the query parameters
     language_name = request.args.get('language')
-    page = request.args.get('page')
-
-    if page is None:
-        page = 1
-    else:
-        page = int(page)
-
-    # Retrieve book ids that have that are in the specified language
-    book_ids = services.get_book_ids_for_language(language_name, repo.repo_instance)
-
-    # Retrieve the set books we want to display based on the page
-    books = services.get_books_by_id(book_ids[(page - 1) * books_per_page: page * books_per_page], repo.repo_instance)
+    page = pagination.page_number(request.args.get('page'))
+    after = pagination.after_book_id(request.args.get('after'))
 
-    number_of_pages = math.ceil(len(book_ids) / books_per_page)
+    # Retrieve the ids of the books on this page that are in the specified language
+    book_page = pagination.get_category_page('language', language_name, page, after, books_per_page,
+                                             repo.repo_instance)
+    books = services.get_books_by_id(book_page.book_ids, repo.repo_instance)
 
     # Note that we will display the number of pages, and we need to remember to inform the request.args of our page number.
-    page_list = []
-    for i in range(1, number_of_pages + 1):
-        page_list.append(url_for('books_bp.books_by_language', page=i, language=language_name))
+    page_list = book_page.urls('books_bp.books_by_language', language=language_name)
+    next_page_url = book_page.next_url('books_bp.books_by_language', language=language_name)
 
     # Generate the template
     return render_template(
         'books/books.html',
         search_title=language_name,
         page_list=page_list,
+        next_page_url=next_page_url,
         books=books,
-        language_urls=utilities.get_languages_and_urls(),
-        word="in",
-        author_urls=utilities.get_authors_and_urls(),
-        publisher_urls=utilities.get_publishers_and_urls(),
-        release_year_urls=utilities.get_release_years_and_urls()
+        word="in"
     )
 
 
@@ -80,38 +71,27 @@ def books_by_author():
 
     # Read in the query parameters
     author_name = request.args.get('author_name')
-    author_id = request.args.get('author_id')
-    page = request.args.get('page')
+    author_id = int(request.args.get('author_id'))
+    page = pagination.page_number(request.args.get('page'))
+    after = pagination.after_book_id(request.args.get('after'))
 
-    if page is None:
-        page = 1
-    else:
-        page = int(page)
-
-    #book_ids = services.get_book_ids_for_author(int(author_id), repo.repo_instance)
-    book_ids = services.get_book_ids_for_author(author_name, repo.repo_instance)
-
-    # Retrieve the set books we want to display based on the page
-    books = services.get_books_by_id(book_ids[(page - 1) * books_per_page: page * books_per_page], repo.repo_instance)
-
-    number_of_pages = math.ceil(len(book_ids) / books_per_page)
+    # Retrieve the ids of the books on this page by the specified author, who is looked up by unique id
+    book_page = pagination.get_category_page('author', author_id, page, after, books_per_page,
+                                             repo.repo_instance)
+    books = services.get_books_by_id(book_page.book_ids, repo.repo_instance)
 
     # Note that we will display the number of pages, and we need to remember to inform the request.args of our page number.
-    page_list = []
-    for i in range(1, number_of_pages + 1):
-        page_list.append(url_for('books_bp.books_by_author', page=i, author_id=author_id, author_name=author_name))
+    page_list = book_page.urls('books_bp.books_by_author', author_id=author_id, author_name=author_name)
+    next_page_url = book_page.next_url('books_bp.books_by_author', author_id=author_id, author_name=author_name)
 
     # Generate the template
     return render_template(
         'books/books.html',
         search_title=author_name,
         page_list=page_list,
+        next_page_url=next_page_url,
         books=books,
-        author_urls=utilities.get_authors_and_urls(),
-        word="by",
-        language_urls=utilities.get_languages_and_urls(),
-        publisher_urls=utilities.get_publishers_and_urls(),
-        release_year_urls=utilities.get_release_years_and_urls()
+        word="by"
     )
 
 
@@ -121,36 +101,26 @@ def books_by_publisher():
 
     # Read in the query parameters
     publisher_name = request.args.get('publisher_name')
-    page = request.args.get('page')
-
-    if page is None:
-        page = 1
-    else:
-        page = int(page)
-
-    book_ids = services.get_book_ids_for_publisher(publisher_name.strip(), repo.repo_instance)
+    page = pagination.page_number(request.args.get('page'))
+    after = pagination.after_book_id(request.args.get('after'))
 
-    # Retrieve the set books we want to display based on the page
-    books = services.get_books_by_id(book_ids[(page - 1) * books_per_page: page * books_per_page], repo.repo_instance)
-
-    number_of_pages = math.ceil(len(book_ids) / books_per_page)
+    # Retrieve the ids of the books on this page from the specified publisher
+    book_page = pagination.get_category_page('publisher', publisher_name.strip(), page, after, books_per_page,
+                                             repo.repo_instance)
+    books = services.get_books_by_id(book_page.book_ids, repo.repo_instance)
 
     # Note that we will display the number of pages, and we need to remember to inform the request.args of our page number.
-    page_list = []
-    for i in range(1, number_of_pages + 1):
-        page_list.append(url_for('books_bp.books_by_publisher', page=i, publisher_name=publisher_name))
+    page_list = book_page.urls('books_bp.books_by_publisher', publisher_name=publisher_name)
+    next_page_url = book_page.next_url('books_bp.books_by_publisher', publisher_name=publisher_name)
 
     # Generate the template
     return render_template(
         'books/books.html',
         search_title=publisher_name,
         page_list=page_list,
+        next_page_url=next_page_url,
         books=books,
-        publisher_urls=utilities.get_publishers_and_urls(),
-        word="from",
-        language_urls=utilities.get_languages_and_urls(),
-        author_urls=utilities.get_authors_and_urls(),
-        release_year_urls=utilities.get_release_years_and_urls()
+        word="from"
     )
 
 
@@ -160,36 +130,64 @@ def books_by_release_year():
 
     # Read in the query parameters
     release_year = request.args.get('release_year')
-    page = request.args.get('page')
-
-    if page is None:
-        page = 1
-    else:
-        page = int(page)
-
-    book_ids = services.get_book_ids_for_year(int(release_year), repo.repo_instance)
+    page = pagination.page_number(request.args.get('page'))
+    after = pagination.after_book_id(request.args.get('after'))
 
-    # Retrieve the set books we want to display based on the page
-    books = services.get_books_by_id(book_ids[(page - 1) * books_per_page: page * books_per_page], repo.repo_instance)
-
-    number_of_pages = math.ceil(len(book_ids) / books_per_page)
+    # Retrieve the ids of the books on this page from the specified year
+    book_page = pagination.get_category_page('release_year', int(release_year), page, after, books_per_page,
+                                             repo.repo_instance)
+    books = services.get_books_by_id(book_page.book_ids, repo.repo_instance)
 
     # Note that we will display the number of pages, and we need to remember to inform the request.args of our page number.
-    page_list = []
-    for i in range(1, number_of_pages + 1):
-        page_list.append(url_for('books_bp.books_by_release_year', page=i, release_year=release_year))
+    page_list = book_page.urls('books_bp.books_by_release_year', release_year=release_year)
+    next_page_url = book_page.next_url('books_bp.books_by_release_year', release_year=release_year)
 
     # Generate the template
     return render_template(
         'books/books.html',
         search_title=release_year,
         page_list=page_list,
+        next_page_url=next_page_url,
         books=books,
-        release_year_urls=utilities.get_release_years_and_urls(),
-        word="from",
-        language_urls=utilities.get_languages_and_urls(),
-        author_urls=utilities.get_authors_and_urls(),
-        publisher_urls=utilities.get_publishers_and_urls()
+        word="from"
+    )
+
+
+@books_blueprint.route('/browse', methods=['GET'])
+def browse():
+    books_per_page = 4
+
+    # Read in the query parameters. A parameter can be given several times, to match books with any of its values.
+    filters = {facet: [value_type(value) for value in request.args.getlist(parameter)]
+               for facet, (parameter, value_type, _) in BROWSE_FACETS.items()}
+    page = pagination.page_number(request.args.get('page'))
+
+    # Retrieve the ids of the books on this page that match every facet chosen, and the counts of the other values
+    book_page, facets = services.browse_books(filters, page, books_per_page, repo.repo_instance)
+    books = services.get_books_by_id(book_page.book_ids, repo.repo_instance)
+
+    query = {BROWSE_FACETS[facet][0]: values for facet, values in filters.items()}
+    page_list = book_page.urls('books_bp.browse', **query)
+
+    # Each value links to the page with the value chosen, or no longer chosen.
+    facet_menus = []
+    for facet, facet_values in facets.items():
+        parameter, _, heading = BROWSE_FACETS[facet]
+        chosen = filters[facet]
+        for facet_value in facet_values:
+            value = facet_value['value']
+            facet_value['selected'] = value in chosen
+            values = [other for other in chosen if other != value] if facet_value['selected'] else chosen + [value]
+            facet_value['url'] = url_for('books_bp.browse', **dict(query, **{parameter: values}))
+        facet_menus.append({'heading': heading, 'values': facet_values})
+
+    # Generate the template
+    return render_template(
+        'books/browse.html',
+        facets=facet_menus,
+        number_of_books=book_page.total,
+        page_list=page_list,
+        books=books
     )
 
 
@@ -237,11 +235,7 @@ def review_book():
         title='Review Book',
         book=book,
         form=form,
-        handle_url=url_for('books_bp.review_book'),
-        language_urls=utilities.get_languages_and_urls(),
-        author_urls=utilities.get_authors_and_urls(),
-        publisher_urls=utilities.get_publishers_and_urls(),
-        release_year_urls=utilities.get_release_years_and_urls()
+        handle_url=url_for('books_bp.review_book')
     )
 
 
@@ -1,6 +1,10 @@
-from typing import List, Iterable
+from typing import List, Iterable, Tuple
 
+from capitulo.adapters.facet_index import facet_indexes, bitmap_count
 from capitulo.adapters.repository import AbstractRepository
+from capitulo.utilities.pagination import Page
+from capitulo.utilities.book_views import book_view, listing_views, book_to_dict, books_to_dict, \
+    book_to_listing_dict, books_to_listing_dict, reviews_to_dict
 from capitulo.domain.model import make_review, Book, Review, Author, Publisher
 
 
@@ -31,12 +35,12 @@ def add_review(book_id: int, review_text: str, user_name: str, rating: int, repo
 
 
 def get_book(book_id: int, repo: AbstractRepository):
-    book = repo.get_book(book_id)
+    book = book_view(book_id, repo)
 
     if book is None:
         raise NonExistentBookException
 
-    return book_to_dict(book)
+    return book
 
 
 def get_book_ids_for_language(language, repo: AbstractRepository):
@@ -55,6 +59,25 @@ def get_book_ids_for_year(year, repo: AbstractRepository):
     book_ids = repo.get_book_ids_for_year(year)
     return book_ids
 
+def browse_books(filters: dict, page_number: int, books_per_page: int, repo: AbstractRepository) -> Tuple[Page, dict]:
+    """ Returns the page of books that match the filters, and the values of every facet with their counts
+        filters maps a facet to the values chosen for it; a book matches when it has one of the values chosen for
+        every facet. Each facet's values come as dicts of the value, the label to show and the number of books, and
+        leave out the values that weren't chosen and would match no books. """
+    facet_index = facet_indexes.get(repo)
+    selected = facet_index.select(filters)
+    book_ids = facet_index.book_ids(selected, (page_number - 1) * books_per_page, books_per_page)
+    counts = facet_index.counts(filters)
+    facets = dict()
+    for facet in facet_index.facets:
+        chosen = filters.get(facet, [])
+        facets[facet] = []
+        for value in facet_index.values(facet):
+            count = counts[facet].get(value, 0)
+            if count > 0 or value in chosen:
+                facets[facet].append({'value': value, 'label': facet_index.label(facet, value), 'count': count})
+    return Page(page_number, books_per_page, book_ids, bitmap_count(selected)), facets
+
 def get_books_by_author(author, repo: AbstractRepository):
     books = books_to_dict(repo.get_books_by_author(author))
     return books
@@ -68,10 +91,7 @@ def get_books_by_release_year(release_year, repo: AbstractRepository):
     return books
 
 def get_books_by_id(id_list, repo: AbstractRepository):
-    books = repo.get_books_by_id(id_list)
-
-    # Convert to dict form
-    books_as_dict = books_to_dict(books)
+    books_as_dict = listing_views(id_list, repo)
 
     return books_as_dict
 
@@ -85,54 +105,6 @@ def get_reviews_for_book(book_id, repo: AbstractRepository):
     return reviews_to_dict(book.reviews)
 
 
-def book_to_dict(book: Book):
-    book_dict = {
-        'id': book.book_id,
-        'title': book.title,
-        'reviews': reviews_to_dict(book.reviews),
-        'description': book.description,
-        #'publisher': book.publisher.name,
-        'publisher': book.publisher,
-        'authors': authors_to_dict(book.authors),
-        'release_year': book.release_year,
-        'image_hyperlink': book.image_hyperlink,
-        #'ebook': book.ebook,
-        'num_pages': book.num_pages,
-    }
-    return book_dict
-
-
-def books_to_dict(books: Iterable[Book]):
-    return [book_to_dict(book) for book in books]
-
-
-def review_to_dict(review: Review):
-    review_dict = {
-        'book_id': review.book.book_id,
-        'user_name': review.user.user_name,
-        'review_text': review.review_text,
-        'rating': review.rating,
-        'timestamp': review.timestamp
-    }
-    return review_dict
-
-
-def reviews_to_dict(reviews: Iterable[Review]):
-    return [review_to_dict(review) for review in reviews]
-
-
-def author_to_dict(author: Author):
-    author_dict = {
-        'author_id': author.unique_id,
-        'full_name': author.full_name
-    }
-    return author_dict
-
-
-def authors_to_dict(authors: Iterable[Author]):
-    return [author_to_dict(author) for author in authors]
-
-
 def dict_to_book(dict):
     book = Book(dict.id, dict.title)
     book_publisher = Publisher(dict.publisher)
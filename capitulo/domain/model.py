@@ -1,13 +1,62 @@
 from datetime import datetime
+from types import MemberDescriptorType
 from typing import List, Iterable
 
+# The domain classes declare __slots__ so their instances don't each carry an attribute dict. '__dict__' and
+# '__weakref__' stay available because the SQLAlchemy mappings in orm.py keep their state in the instance dict and hold
+# weak references to instances; the dict itself is only created when something is stored in it.
+
+
+def _getstate(instance) -> dict:
+    # Attributes held in slots, plus the instance dict. Once a class is mapped by orm.py its mapped attributes live in
+    # the instance dict instead of their slots, so only slots that are still plain slots are read.
+    state = dict(getattr(instance, '__dict__', {}))
+    for name, slot in _slots(type(instance)).items():
+        try:
+            state[name] = slot.__get__(instance)
+        except AttributeError:
+            pass
+    return state
+
+
+def _setstate(instance, state: dict):
+    slots = _slots(type(instance))
+    for name, value in state.items():
+        if name in slots:
+            slots[name].__set__(instance, value)
+        else:
+            # Stored as is, as unpickling an instance without slots would, rather than through a mapped attribute.
+            instance.__dict__[name] = value
+
+
+def _slots(cls) -> dict:
+    # Slot names are written unmangled in __slots__, but their descriptors are stored under the mangled name.
+    names = (f'_{cls.__name__}{name}' if name.startswith('__') and not name.endswith('__') else name
+             for name in cls.__slots__)
+    return {name: cls.__dict__[name] for name in names if isinstance(cls.__dict__.get(name), MemberDescriptorType)}
+
+
+def _container(instance, attribute: str, factory=list):
+    """ Returns a collection attribute, creating it the first time it is asked for
+        Collections most instances never use, such as a book's reviews, then take no memory until they are needed. """
+    try:
+        return getattr(instance, attribute)
+    except AttributeError:
+        container = factory()
+        setattr(instance, attribute, container)
+        return container
+
 
 class Publisher:
 
+    __slots__ = ('__name', '__books', '__dict__', '__weakref__')
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, publisher_name: str):
         # This makes sure the setter is called here in the initializer/constructor as well.
         self.name = publisher_name
-        self.__books: List[Book] = list()
 
     @property
     def name(self) -> str:
@@ -15,7 +64,7 @@ class Publisher:
 
     @property
     def books(self) -> Iterable['Book']:
-        return iter(self.__books)
+        return iter(_container(self, '_Publisher__books'))
 
     @name.setter
     def name(self, publisher_name: str):
@@ -27,8 +76,9 @@ class Publisher:
                 self.__name = publisher_name
     
     def add_book(self, book: 'Book'):
-        if isinstance(book, Book) and book not in self.__books:
-            self.__books.append(book)
+        # Book's publisher setter only adds a book when its publisher changes, so the books aren't scanned for it.
+        if isinstance(book, Book):
+            _container(self, '_Publisher__books').append(book)
 
     def __repr__(self):
         return f'<Publisher {self.name}>'
@@ -47,6 +97,11 @@ class Publisher:
 
 class Author:
 
+    __slots__ = ('__unique_id', '__full_name', '__authors_this_one_has_worked_with', '__dict__', '__weakref__')
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, author_id: int, author_full_name: str):
         if not isinstance(author_id, int):
             raise ValueError
@@ -59,9 +114,8 @@ class Author:
         # Uses the attribute setter method.
         self.full_name = author_full_name
 
-        # Initialize author colleagues data structure with empty set.
-        # We use a set so each unique author is only represented once.
-        self.__authors_this_one_has_worked_with = set()
+        # The author's colleagues are kept in a set, so each unique author is only represented once. It is created by
+        # the first add_coauthor.
 
     @property
     def unique_id(self) -> int:
@@ -85,10 +139,10 @@ class Author:
 
     def add_coauthor(self, coauthor):
         if isinstance(coauthor, self.__class__) and coauthor.unique_id != self.unique_id:
-            self.__authors_this_one_has_worked_with.add(coauthor)
+            _container(self, '_Author__authors_this_one_has_worked_with', set).add(coauthor)
 
     def check_if_this_author_coauthored_with(self, author):
-        return author in self.__authors_this_one_has_worked_with
+        return author in _container(self, '_Author__authors_this_one_has_worked_with', set)
 
     def __repr__(self):
         return f'<Author {self.full_name}, author id = {self.unique_id}>'
@@ -107,6 +161,22 @@ class Author:
 
 class Book:
 
+    __slots__ = ('__id', '__book_id', '__title', '__reading_list_users', '__reviews', '__description', '__publisher',
+                 '__authors', '__release_year', '__ebook', '__num_pages', '__image_hyperlink', '__language',
+                 '__dict__', '__weakref__')
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
+    # Shared by every Book, so they are built once rather than per instance.
+    __language_iso_codes = ['aar', 'abk', 'ace', 'ach', 'ada', 'ady', 'afa', 'afh', 'afr', 'ain', 'aka', 'akk', 'alb', 'ale', 'alg', 'alt', 'amh', 'ang', 'anp', 'apa', 'ara', 'arc', 'arg', 'arm', 'arn', 'arp', 'art', 'arw', 'asm', 'ast', 'ath', 'aus', 'ava', 'ave', 'awa', 'aym', 'aze', 'bad', 'bai', 'bak', 'bal', 'bam', 'ban', 'baq', 'bas', 'bat', 'bej', 'bel', 'bem', 'ben', 'ber', 'bho', 'bih', 'bik', 'bin', 'bis', 'bla', 'bnt', 'tib', 'bos', 'bra', 'bre', 'btk', 'bua', 'bug', 'bul', 'bur', 'byn', 'cad', 'cai', 'car', 'cat', 'cau', 'ceb', 'cel', 'cze', 'cha', 'chb', 'che', 'chg', 'chi', 'chk', 'chm', 'chn', 'cho', 'chp', 'chr', 'chu', 'chv', 'chy', 'cmc', 'cnr', 'cop', 'cor', 'cos', 'cpe', 'cpf', 'cpp', 'cre', 'crh', 'crp', 'csb', 'cus', 'wel', 'dak', 'dan', 'dar', 'day', 'del', 'den', 'ger', 'dgr', 'din', 'div', 'doi', 'dra', 'dsb', 'dua', 'dum', 'dut', 'dyu', 'dzo', 'efi', 'egy', 'en-US', 'eka', 'gre', 'elx', 'eng', 'enm', 'epo', 'est', 'ewe', 'ewo', 'fan', 'fao', 'per', 'fat', 'fij', 'fil', 'fin', 'fiu', 'fon', 'fre', 'frm', 'fro', 'frr', 'frs', 'fry', 'ful', 'fur', 'gaa', 'gay', 'gba', 'gem', 'geo', 'gez', 'gil', 'gla', 'gle', 'glg', 'glv', 'gmh', 'goh', 'gon', 'gor', 'got', 'grb', 'grc', 'grn', 'gsw', 'guj', 'gwi', 'hai', 'hat', 'hau', 'haw', 'heb', 'her', 'hil', 'him', 'hin', 'hit', 'hmn', 'hmo', 'hrv', 'hsb', 'hun', 'hup', 'iba', 'ibo', 'ice', 'ido', 'iii', 'ijo', 'iku', 'ile', 'ilo', 'ina', 'inc', 'ind', 'ine', 'inh', 'ipk', 'ira', 'iro', 'ita', 'jav', 'jbo', 'jpn', 'jpr', 'jrb', 'kaa', 'kab', 'kac', 'kal', 'kam', 'kan', 'kar', 'kas', 'kau', 'kaw', 'kaz', 'kbd', 'kha', 'khi', 'khm', 'kho', 'kik', 'kin', 'kir', 'kmb', 'kok', 'kom', 'kon', 'kor', 'kos', 'kpe', 'krc', 'krl', 'kro', 'kru', 'kua', 'kum', 'kur', 'kut', 'lad', 'lah', 'lam', 'lao', 'lat', 'lav', 'lez', 'lim', 'lin', 'lit', 'lol', 'loz', 'ltz', 'lua', 'lub', 'lug', 'lui', 'lun', 'luo', 'lus', 'mac', 'mad', 'mag', 'mah', 'mai', 'mak', 'mal', 'man', 'mao', 'map', 'mar', 'mas', 'may', 'mdf', 'mdr', 'men', 'mga', 'mic', 'min', 'mis', 'mkh', 'mlg', 'mlt', 'mnc', 'mni', 'mno', 'moh', 'mon', 'mos', 'mul', 'mun', 'mus', 'mwl', 'mwr', 'myn', 'myv', 'nah', 'nai', 'nap', 'nau', 'nav', 'nbl', 'nde', 'ndo', 'nds', 'nep', 'new', 'nia', 'nic', 'niu', 'nno', 'nob', 'nog', 'non', 'nor', 'nqo', 'nso', 'nub', 'nwc', 'nya', 'nym', 'nyn', 'nyo', 'nzi', 'oci', 'oji', 'ori', 'orm', 'osa', 'oss', 'ota', 'oto', 'paa', 'pag', 'pal', 'pam', 'pan', 'pap', 'pau', 'peo', 'phi', 'phn', 'pli', 'pol', 'pon', 'por', 'pra', 'pro', 'pus', 'qaa-qtz', 'que', 'raj', 'rap', 'rar', 'roa', 'roh', 'rom', 'rum', 'run', 'rup', 'rus', 'sad', 'sag', 'sah', 'sai', 'sal', 'sam', 'san', 'sas', 'sat', 'scn', 'sco', 'sel', 'sem', 'sga', 'sgn', 'shn', 'sid', 'sin', 'sio', 'sit', 'sla', 'slo', 'slv', 'sma', 'sme', 'smi', 'smj', 'smn', 'smo', 'sms', 'sna', 'snd', 'snk', 'sog', 'som', 'son', 'sot', 'spa', 'srd', 'srn', 'srp', 'srr', 'ssa', 'ssw', 'suk', 'sun', 'sus', 'sux', 'swa', 'swe', 'syc', 'syr', 'tah', 'tai', 'tam', 'tat', 'tel', 'tem', 'ter', 'tet', 'tgk', 'tgl', 'tha', 'tig', 'tir', 'tiv', 'tkl', 'tlh', 'tli', 'tmh', 'tog', 'ton', 'tpi', 'tsi', 'tsn', 'tso', 'tuk', 'tum', 'tup', 'tur', 'tut', 'tvl', 'twi', 'tyv', 'udm', 'uga', 'uig', 'ukr', 'umb', 'und', 'urd', 'uzb', 'vai', 'ven', 'vie', 'vol', 'vot', 'wak', 'wal', 'war', 'was', 'wen', 'wln', 'wol', 'xal', 'xho', 'yao', 'yap', 'yid', 'yor', 'ypk', 'zap', 'zbl', 'zen', 'zgh', 'zha', 'znd', 'zul', 'zun', 'zxx', 'zza', 'zho']
+    __languages_in_english = ['Afar', 'Abkhazian', 'Achinese', 'Acoli', 'Adangme', 'Adyghe; Adygei', 'Afro-Asiatic languages', 'Afrihili', 'Afrikaans', 'Ainu', 'Akan', 'Akkadian', 'Albanian', 'Aleut', 'Algonquian languages', 'Southern Altai', 'Amharic', 'English, Old (ca.450-1100)', 'Angika', 'Apache languages', 'Arabic', 'Official Aramaic (700-300 BCE); Imperial Aramaic (700-300 BCE)', 'Aragonese', 'Armenian', 'Mapudungun; Mapuche', 'Arapaho', 'Artificial languages', 'Arawak', 'Assamese', 'Asturian; Bable; Leonese; Asturleonese', 'Athapascan languages', 'Australian languages', 'Avaric', 'Avestan', 'Awadhi', 'Aymara', 'Azerbaijani', 'Banda languages', 'Bamileke languages', 'Bashkir', 'Baluchi', 'Bambara', 'Balinese', 'Basque', 'Basa', 'Baltic languages', 'Beja; Bedawiyet', 'Belarusian', 'Bemba', 'Bengali', 'Berber languages', 'Bhojpuri', 'Bihari languages', 'Bikol', 'Bini; Edo', 'Bislama', 'Siksika', 'Bantu languages', 'Tibetan', 'Bosnian', 'Braj', 'Breton', 'Batak languages', 'Buriat', 'Buginese', 'Bulgarian', 'Burmese', 'Blin; Bilin', 'Caddo', 'Central American Indian languages', 'Galibi Carib', 'Catalan; Valencian', 'Caucasian languages', 'Cebuano', 'Celtic languages', 'Czech', 'Chamorro', 'Chibcha', 'Chechen', 'Chagatai', 'Chinese', 'Chuukese', 'Mari', 'Chinook jargon', 'Choctaw', 'Chipewyan; Dene Suline', 'Cherokee', 'Church Slavic; Old Slavonic; Church Slavonic; Old Bulgarian; Old Church Slavonic', 'Chuvash', 'Cheyenne', 'Chamic languages', 'Montenegrin', 'Coptic', 'Cornish', 'Corsican', 'Creoles and pidgins, English based', 'Creoles and pidgins, French-based', 'Creoles and pidgins, Portuguese-based', 'Cree', 'Crimean Tatar; Crimean Turkish', 'Creoles and pidgins', 'Kashubian', 'Cushitic languages', 'Welsh', 'Dakota', 'Danish', 'Dargwa', 'Land Dayak languages', 'Delaware', 'Slave (Athapascan)', 'German', 'Dogrib', 'Dinka', 'Divehi; Dhivehi; Maldivian', 'Dogri', 'Dravidian languages', 'Lower Sorbian', 'Duala', 'Dutch, Middle (ca.1050-1350)', 'Dutch; Flemish', 'Dyula', 'Dzongkha', 'Efik', 'Egyptian (Ancient)', 'English', 'Ekajuk', 'Greek, Modern (1453-)', 'Elamite', 'English', 'English, Middle (1100-1500)', 'Esperanto', 'Estonian', 'Ewe', 'Ewondo', 'Fang', 'Faroese', 'Persian', 'Fanti', 'Fijian', 'Filipino; Pilipino', 'Finnish', 'Finno-Ugrian languages', 'Fon', 'French', 'French, Middle (ca.1400-1600)', 'French, Old (842-ca.1400)', 'Northern Frisian', 'Eastern Frisian', 'Western Frisian', 'Fulah', 'Friulian', 'Ga', 'Gayo', 'Gbaya', 'Germanic languages', 'Georgian', 'Geez', 'Gilbertese', 'Gaelic; Scottish Gaelic', 'Irish', 'Galician', 'Manx', 'German, Middle High (ca.1050-1500)', 'German, Old High (ca.750-1050)', 'Gondi', 'Gorontalo', 'Gothic', 'Grebo', 'Greek, Ancient (to 1453)', 'Guarani', 'Swiss German; Alemannic; Alsatian', 'Gujarati', "Gwich'in", 'Haida', 'Haitian; Haitian Creole', 'Hausa', 'Hawaiian', 'Hebrew', 'Herero', 'Hiligaynon', 'Himachali languages; Western Pahari languages', 'Hindi', 'Hittite', 'Hmong; Mong', 'Hiri Motu', 'Croatian', 'Upper Sorbian', 'Hungarian', 'Hupa', 'Iban', 'Igbo', 'Icelandic', 'Ido', 'Sichuan Yi; Nuosu', 'Ijo languages', 'Inuktitut', 'Interlingue; Occidental', 'Iloko', 'Interlingua (International Auxiliary Language Association)', 'Indic languages', 'Indonesian', 'Indo-European languages', 'Ingush', 'Inupiaq', 'Iranian languages', 'Iroquoian languages', 'Italian', 'Javanese', 'Lojban', 'Japanese', 'Judeo-Persian', 'Judeo-Arabic', 'Kara-Kalpak', 'Kabyle', 'Kachin; Jingpho', 'Kalaallisut; Greenlandic', 'Kamba', 'Kannada', 'Karen languages', 'Kashmiri', 'Kanuri', 'Kawi', 'Kazakh', 'Kabardian', 'Khasi', 'Khoisan languages', 'Central Khmer', 'Khotanese; Sakan', 'Kikuyu; Gikuyu', 'Kinyarwanda', 'Kirghiz; Kyrgyz', 'Kimbundu', 'Konkani', 'Komi', 'Kongo', 'Korean', 'Kosraean', 'Kpelle', 'Karachay-Balkar', 'Karelian', 'Kru languages', 'Kurukh', 'Kuanyama; Kwanyama', 'Kumyk', 'Kurdish', 'Kutenai', 'Ladino', 'Lahnda', 'Lamba', 'Lao', 'Latin', 'Latvian', 'Lezghian', 'Limburgan; Limburger; Limburgish', 'Lingala', 'Lithuanian', 'Mongo', 'Lozi', 'Luxembourgish; Letzeburgesch', 'Luba-Lulua', 'Luba-Katanga', 'Ganda', 'Luiseno', 'Lunda', 'Luo (Kenya and Tanzania)', 'Lushai', 'Macedonian', 'Madurese', 'Magahi', 'Marshallese', 'Maithili', 'Makasar', 'Malayalam', 'Mandingo', 'Maori', 'Austronesian languages', 'Marathi', 'Masai', 'Malay', 'Moksha', 'Mandar', 'Mende', 'Irish, Middle (900-1200)', "Mi'kmaq; Micmac", 'Minangkabau', 'Uncoded languages', 'Mon-Khmer languages', 'Malagasy', 'Maltese', 'Manchu', 'Manipuri', 'Manobo languages', 'Mohawk', 'Mongolian', 'Mossi', 'Multiple languages', 'Munda languages', 'Creek', 'Mirandese', 'Marwari', 'Mayan languages', 'Erzya', 'Nahuatl languages', 'North American Indian languages', 'Neapolitan', 'Nauru', 'Navajo; Navaho', 'Ndebele, South; South Ndebele', 'Ndebele, North; North Ndebele', 'Ndonga', 'Low German; Low Saxon; German, Low; Saxon, Low', 'Nepali', 'Nepal Bhasa; Newari', 'Nias', 'Niger-Kordofanian languages', 'Niuean', 'Norwegian Nynorsk; Nynorsk, Norwegian', 'Bokm\x8cl, Norwegian; Norwegian Bokm\x8cl', 'Nogai', 'Norse, Old', 'Norwegian', "N'Ko", 'Pedi; Sepedi; Northern Sotho', 'Nubian languages', 'Classical Newari; Old Newari; Classical Nepal Bhasa', 'Chichewa; Chewa; Nyanja', 'Nyamwezi', 'Nyankole', 'Nyoro', 'Nzima', 'Occitan (post 1500)', 'Ojibwa', 'Oriya', 'Oromo', 'Osage', 'Ossetian; Ossetic', 'Turkish, Ottoman (1500-1928)', 'Otomian languages', 'Papuan languages', 'Pangasinan', 'Pahlavi', 'Pampanga; Kapampangan', 'Panjabi; Punjabi', 'Papiamento', 'Palauan', 'Persian, Old (ca.600-400 B.C.)', 'Philippine languages', 'Phoenician', 'Pali', 'Polish', 'Pohnpeian', 'Portuguese', 'Prakrit languages', 'Proven\x8dal, Old (to 1500);Occitan, Old (to 1500)', 'Pushto; Pashto', 'Reserved for local use', 'Quechua', 'Rajasthani', 'Rapanui', 'Rarotongan; Cook Islands Maori', 'Romance languages', 'Romansh', 'Romany', 'Romanian; Moldavian; Moldovan', 'Rundi', 'Aromanian; Arumanian; Macedo-Romanian', 'Russian', 'Sandawe', 'Sango', 'Yakut', 'South American Indian languages', 'Salishan languages', 'Samaritan Aramaic', 'Sanskrit', 'Sasak', 'Santali', 'Sicilian', 'Scots', 'Selkup', 'Semitic languages', 'Irish, Old (to 900)', 'Sign Languages', 'Shan', 'Sidamo', 'Sinhala; Sinhalese', 'Siouan languages', 'Sino-Tibetan languages', 'Slavic languages', 'Slovak', 'Slovenian', 'Southern Sami', 'Northern Sami', 'Sami languages', 'Lule Sami', 'Inari Sami', 'Samoan', 'Skolt Sami', 'Shona', 'Sindhi', 'Soninke', 'Sogdian', 'Somali', 'Songhai languages', 'Sotho, Southern', 'Spanish', 'Sardinian', 'Sranan Tongo', 'Serbian', 'Serer', 'Nilo-Saharan languages', 'Swati', 'Sukuma', 'Sundanese', 'Susu', 'Sumerian', 'Swahili', 'Swedish', 'Classical Syriac', 'Syriac', 'Tahitian', 'Tai languages', 'Tamil', 'Tatar', 'Telugu', 'Timne', 'Tereno', 'Tetum', 'Tajik', 'Tagalog', 'Thai', 'Tigre', 'Tigrinya', 'Tiv', 'Tokelau', 'Klingon; tlhIngan-Hol', 'Tlingit', 'Tamashek', 'Tonga (Nyasa)', 'Tonga (Tonga Islands)', 'Tok Pisin', 'Tsimshian', 'Tswana', 'Tsonga', 'Turkmen', 'Tumbuka', 'Tupi languages', 'Turkish', 'Altaic languages', 'Tuvalu', 'Twi', 'Tuvinian', 'Udmurt', 'Ugaritic', 'Uighur; Uyghur', 'Ukrainian', 'Umbundu', 'Undetermined', 'Urdu', 'Uzbek', 'Vai', 'Venda', 'Vietnamese', 'Volap\x9fk', 'Votic', 'Wakashan languages', 'Wolaitta; Wolaytta', 'Waray', 'Washo', 'Sorbian languages', 'Walloon', 'Wolof', 'Kalmyk; Oirat', 'Xhosa', 'Yao', 'Yapese', 'Yiddish', 'Yoruba', 'Yupik languages', 'Zapotec', 'Blissymbols; Blissymbolics; Bliss', 'Zenaga', 'Standard Moroccan Tamazight', 'Zhuang; Chuang', 'Zande languages', 'Zulu', 'Zuni', 'No linguistic content; Not applicable', 'Zaza; Dimili; Dimli; Kirdki; Kirmanjki; Zazaki', "Chinese"]
+    # Each code's name, so books in the same language all refer to the one name string
+    __languages_by_iso_code = dict()
+    for __code, __name in zip(__language_iso_codes, __languages_in_english):
+        __languages_by_iso_code.setdefault(__code, __name)
+    del __code, __name
+
     def __init__(self, id: int, book_title: str):
         if not isinstance(id, int):
             raise ValueError
@@ -118,18 +188,14 @@ class Book:
         self.__id = None
         self.__book_id = id
         self.title = book_title
-        self.__reading_list_users: List[User] = list()
-        self.__reviews = []
+        # The reading list users, reviews and authors lists are created when first used.
         self.__description = None
         self.__publisher = None
-        self.__authors = []
         self.__release_year = None
         self.__ebook = None
         self.__num_pages = None
         self.__image_hyperlink = None
         self.__language = None
-        self.__language_iso_codes = ['aar', 'abk', 'ace', 'ach', 'ada', 'ady', 'afa', 'afh', 'afr', 'ain', 'aka', 'akk', 'alb', 'ale', 'alg', 'alt', 'amh', 'ang', 'anp', 'apa', 'ara', 'arc', 'arg', 'arm', 'arn', 'arp', 'art', 'arw', 'asm', 'ast', 'ath', 'aus', 'ava', 'ave', 'awa', 'aym', 'aze', 'bad', 'bai', 'bak', 'bal', 'bam', 'ban', 'baq', 'bas', 'bat', 'bej', 'bel', 'bem', 'ben', 'ber', 'bho', 'bih', 'bik', 'bin', 'bis', 'bla', 'bnt', 'tib', 'bos', 'bra', 'bre', 'btk', 'bua', 'bug', 'bul', 'bur', 'byn', 'cad', 'cai', 'car', 'cat', 'cau', 'ceb', 'cel', 'cze', 'cha', 'chb', 'che', 'chg', 'chi', 'chk', 'chm', 'chn', 'cho', 'chp', 'chr', 'chu', 'chv', 'chy', 'cmc', 'cnr', 'cop', 'cor', 'cos', 'cpe', 'cpf', 'cpp', 'cre', 'crh', 'crp', 'csb', 'cus', 'wel', 'dak', 'dan', 'dar', 'day', 'del', 'den', 'ger', 'dgr', 'din', 'div', 'doi', 'dra', 'dsb', 'dua', 'dum', 'dut', 'dyu', 'dzo', 'efi', 'egy', 'en-US', 'eka', 'gre', 'elx', 'eng', 'enm', 'epo', 'est', 'ewe', 'ewo', 'fan', 'fao', 'per', 'fat', 'fij', 'fil', 'fin', 'fiu', 'fon', 'fre', 'frm', 'fro', 'frr', 'frs', 'fry', 'ful', 'fur', 'gaa', 'gay', 'gba', 'gem', 'geo', 'gez', 'gil', 'gla', 'gle', 'glg', 'glv', 'gmh', 'goh', 'gon', 'gor', 'got', 'grb', 'grc', 'grn', 'gsw', 'guj', 'gwi', 'hai', 'hat', 'hau', 'haw', 'heb', 'her', 'hil', 'him', 'hin', 'hit', 'hmn', 'hmo', 'hrv', 'hsb', 'hun', 'hup', 'iba', 'ibo', 'ice', 'ido', 'iii', 'ijo', 'iku', 'ile', 'ilo', 'ina', 'inc', 'ind', 'ine', 'inh', 'ipk', 'ira', 'iro', 'ita', 'jav', 'jbo', 'jpn', 'jpr', 'jrb', 'kaa', 'kab', 'kac', 'kal', 'kam', 'kan', 'kar', 'kas', 'kau', 'kaw', 'kaz', 'kbd', 'kha', 'khi', 'khm', 'kho', 'kik', 'kin', 'kir', 'kmb', 'kok', 'kom', 'kon', 'kor', 'kos', 'kpe', 'krc', 'krl', 'kro', 'kru', 'kua', 'kum', 'kur', 'kut', 'lad', 'lah', 'lam', 'lao', 'lat', 'lav', 'lez', 'lim', 'lin', 'lit', 'lol', 'loz', 'ltz', 'lua', 'lub', 'lug', 'lui', 'lun', 'luo', 'lus', 'mac', 'mad', 'mag', 'mah', 'mai', 'mak', 'mal', 'man', 'mao', 'map', 'mar', 'mas', 'may', 'mdf', 'mdr', 'men', 'mga', 'mic', 'min', 'mis', 'mkh', 'mlg', 'mlt', 'mnc', 'mni', 'mno', 'moh', 'mon', 'mos', 'mul', 'mun', 'mus', 'mwl', 'mwr', 'myn', 'myv', 'nah', 'nai', 'nap', 'nau', 'nav', 'nbl', 'nde', 'ndo', 'nds', 'nep', 'new', 'nia', 'nic', 'niu', 'nno', 'nob', 'nog', 'non', 'nor', 'nqo', 'nso', 'nub', 'nwc', 'nya', 'nym', 'nyn', 'nyo', 'nzi', 'oci', 'oji', 'ori', 'orm', 'osa', 'oss', 'ota', 'oto', 'paa', 'pag', 'pal', 'pam', 'pan', 'pap', 'pau', 'peo', 'phi', 'phn', 'pli', 'pol', 'pon', 'por', 'pra', 'pro', 'pus', 'qaa-qtz', 'que', 'raj', 'rap', 'rar', 'roa', 'roh', 'rom', 'rum', 'run', 'rup', 'rus', 'sad', 'sag', 'sah', 'sai', 'sal', 'sam', 'san', 'sas', 'sat', 'scn', 'sco', 'sel', 'sem', 'sga', 'sgn', 'shn', 'sid', 'sin', 'sio', 'sit', 'sla', 'slo', 'slv', 'sma', 'sme', 'smi', 'smj', 'smn', 'smo', 'sms', 'sna', 'snd', 'snk', 'sog', 'som', 'son', 'sot', 'spa', 'srd', 'srn', 'srp', 'srr', 'ssa', 'ssw', 'suk', 'sun', 'sus', 'sux', 'swa', 'swe', 'syc', 'syr', 'tah', 'tai', 'tam', 'tat', 'tel', 'tem', 'ter', 'tet', 'tgk', 'tgl', 'tha', 'tig', 'tir', 'tiv', 'tkl', 'tlh', 'tli', 'tmh', 'tog', 'ton', 'tpi', 'tsi', 'tsn', 'tso', 'tuk', 'tum', 'tup', 'tur', 'tut', 'tvl', 'twi', 'tyv', 'udm', 'uga', 'uig', 'ukr', 'umb', 'und', 'urd', 'uzb', 'vai', 'ven', 'vie', 'vol', 'vot', 'wak', 'wal', 'war', 'was', 'wen', 'wln', 'wol', 'xal', 'xho', 'yao', 'yap', 'yid', 'yor', 'ypk', 'zap', 'zbl', 'zen', 'zgh', 'zha', 'znd', 'zul', 'zun', 'zxx', 'zza', 'zho']
-        self.__languages_in_english = ['Afar', 'Abkhazian', 'Achinese', 'Acoli', 'Adangme', 'Adyghe; Adygei', 'Afro-Asiatic languages', 'Afrihili', 'Afrikaans', 'Ainu', 'Akan', 'Akkadian', 'Albanian', 'Aleut', 'Algonquian languages', 'Southern Altai', 'Amharic', 'English, Old (ca.450-1100)', 'Angika', 'Apache languages', 'Arabic', 'Official Aramaic (700-300 BCE); Imperial Aramaic (700-300 BCE)', 'Aragonese', 'Armenian', 'Mapudungun; Mapuche', 'Arapaho', 'Artificial languages', 'Arawak', 'Assamese', 'Asturian; Bable; Leonese; Asturleonese', 'Athapascan languages', 'Australian languages', 'Avaric', 'Avestan', 'Awadhi', 'Aymara', 'Azerbaijani', 'Banda languages', 'Bamileke languages', 'Bashkir', 'Baluchi', 'Bambara', 'Balinese', 'Basque', 'Basa', 'Baltic languages', 'Beja; Bedawiyet', 'Belarusian', 'Bemba', 'Bengali', 'Berber languages', 'Bhojpuri', 'Bihari languages', 'Bikol', 'Bini; Edo', 'Bislama', 'Siksika', 'Bantu languages', 'Tibetan', 'Bosnian', 'Braj', 'Breton', 'Batak languages', 'Buriat', 'Buginese', 'Bulgarian', 'Burmese', 'Blin; Bilin', 'Caddo', 'Central American Indian languages', 'Galibi Carib', 'Catalan; Valencian', 'Caucasian languages', 'Cebuano', 'Celtic languages', 'Czech', 'Chamorro', 'Chibcha', 'Chechen', 'Chagatai', 'Chinese', 'Chuukese', 'Mari', 'Chinook jargon', 'Choctaw', 'Chipewyan; Dene Suline', 'Cherokee', 'Church Slavic; Old Slavonic; Church Slavonic; Old Bulgarian; Old Church Slavonic', 'Chuvash', 'Cheyenne', 'Chamic languages', 'Montenegrin', 'Coptic', 'Cornish', 'Corsican', 'Creoles and pidgins, English based', 'Creoles and pidgins, French-based', 'Creoles and pidgins, Portuguese-based', 'Cree', 'Crimean Tatar; Crimean Turkish', 'Creoles and pidgins', 'Kashubian', 'Cushitic languages', 'Welsh', 'Dakota', 'Danish', 'Dargwa', 'Land Dayak languages', 'Delaware', 'Slave (Athapascan)', 'German', 'Dogrib', 'Dinka', 'Divehi; Dhivehi; Maldivian', 'Dogri', 'Dravidian languages', 'Lower Sorbian', 'Duala', 'Dutch, Middle (ca.1050-1350)', 'Dutch; Flemish', 'Dyula', 'Dzongkha', 'Efik', 'Egyptian (Ancient)', 'English', 'Ekajuk', 'Greek, Modern (1453-)', 'Elamite', 'English', 'English, Middle (1100-1500)', 'Esperanto', 'Estonian', 'Ewe', 'Ewondo', 'Fang', 'Faroese', 'Persian', 'Fanti', 'Fijian', 'Filipino; Pilipino', 'Finnish', 'Finno-Ugrian languages', 'Fon', 'French', 'French, Middle (ca.1400-1600)', 'French, Old (842-ca.1400)', 'Northern Frisian', 'Eastern Frisian', 'Western Frisian', 'Fulah', 'Friulian', 'Ga', 'Gayo', 'Gbaya', 'Germanic languages', 'Georgian', 'Geez', 'Gilbertese', 'Gaelic; Scottish Gaelic', 'Irish', 'Galician', 'Manx', 'German, Middle High (ca.1050-1500)', 'German, Old High (ca.750-1050)', 'Gondi', 'Gorontalo', 'Gothic', 'Grebo', 'Greek, Ancient (to 1453)', 'Guarani', 'Swiss German; Alemannic; Alsatian', 'Gujarati', "Gwich'in", 'Haida', 'Haitian; Haitian Creole', 'Hausa', 'Hawaiian', 'Hebrew', 'Herero', 'Hiligaynon', 'Himachali languages; Western Pahari languages', 'Hindi', 'Hittite', 'Hmong; Mong', 'Hiri Motu', 'Croatian', 'Upper Sorbian', 'Hungarian', 'Hupa', 'Iban', 'Igbo', 'Icelandic', 'Ido', 'Sichuan Yi; Nuosu', 'Ijo languages', 'Inuktitut', 'Interlingue; Occidental', 'Iloko', 'Interlingua (International Auxiliary Language Association)', 'Indic languages', 'Indonesian', 'Indo-European languages', 'Ingush', 'Inupiaq', 'Iranian languages', 'Iroquoian languages', 'Italian', 'Javanese', 'Lojban', 'Japanese', 'Judeo-Persian', 'Judeo-Arabic', 'Kara-Kalpak', 'Kabyle', 'Kachin; Jingpho', 'Kalaallisut; Greenlandic', 'Kamba', 'Kannada', 'Karen languages', 'Kashmiri', 'Kanuri', 'Kawi', 'Kazakh', 'Kabardian', 'Khasi', 'Khoisan languages', 'Central Khmer', 'Khotanese; Sakan', 'Kikuyu; Gikuyu', 'Kinyarwanda', 'Kirghiz; Kyrgyz', 'Kimbundu', 'Konkani', 'Komi', 'Kongo', 'Korean', 'Kosraean', 'Kpelle', 'Karachay-Balkar', 'Karelian', 'Kru languages', 'Kurukh', 'Kuanyama; Kwanyama', 'Kumyk', 'Kurdish', 'Kutenai', 'Ladino', 'Lahnda', 'Lamba', 'Lao', 'Latin', 'Latvian', 'Lezghian', 'Limburgan; Limburger; Limburgish', 'Lingala', 'Lithuanian', 'Mongo', 'Lozi', 'Luxembourgish; Letzeburgesch', 'Luba-Lulua', 'Luba-Katanga', 'Ganda', 'Luiseno', 'Lunda', 'Luo (Kenya and Tanzania)', 'Lushai', 'Macedonian', 'Madurese', 'Magahi', 'Marshallese', 'Maithili', 'Makasar', 'Malayalam', 'Mandingo', 'Maori', 'Austronesian languages', 'Marathi', 'Masai', 'Malay', 'Moksha', 'Mandar', 'Mende', 'Irish, Middle (900-1200)', "Mi'kmaq; Micmac", 'Minangkabau', 'Uncoded languages', 'Mon-Khmer languages', 'Malagasy', 'Maltese', 'Manchu', 'Manipuri', 'Manobo languages', 'Mohawk', 'Mongolian', 'Mossi', 'Multiple languages', 'Munda languages', 'Creek', 'Mirandese', 'Marwari', 'Mayan languages', 'Erzya', 'Nahuatl languages', 'North American Indian languages', 'Neapolitan', 'Nauru', 'Navajo; Navaho', 'Ndebele, South; South Ndebele', 'Ndebele, North; North Ndebele', 'Ndonga', 'Low German; Low Saxon; German, Low; Saxon, Low', 'Nepali', 'Nepal Bhasa; Newari', 'Nias', 'Niger-Kordofanian languages', 'Niuean', 'Norwegian Nynorsk; Nynorsk, Norwegian', 'Bokm\x8cl, Norwegian; Norwegian Bokm\x8cl', 'Nogai', 'Norse, Old', 'Norwegian', "N'Ko", 'Pedi; Sepedi; Northern Sotho', 'Nubian languages', 'Classical Newari; Old Newari; Classical Nepal Bhasa', 'Chichewa; Chewa; Nyanja', 'Nyamwezi', 'Nyankole', 'Nyoro', 'Nzima', 'Occitan (post 1500)', 'Ojibwa', 'Oriya', 'Oromo', 'Osage', 'Ossetian; Ossetic', 'Turkish, Ottoman (1500-1928)', 'Otomian languages', 'Papuan languages', 'Pangasinan', 'Pahlavi', 'Pampanga; Kapampangan', 'Panjabi; Punjabi', 'Papiamento', 'Palauan', 'Persian, Old (ca.600-400 B.C.)', 'Philippine languages', 'Phoenician', 'Pali', 'Polish', 'Pohnpeian', 'Portuguese', 'Prakrit languages', 'Proven\x8dal, Old (to 1500);Occitan, Old (to 1500)', 'Pushto; Pashto', 'Reserved for local use', 'Quechua', 'Rajasthani', 'Rapanui', 'Rarotongan; Cook Islands Maori', 'Romance languages', 'Romansh', 'Romany', 'Romanian; Moldavian; Moldovan', 'Rundi', 'Aromanian; Arumanian; Macedo-Romanian', 'Russian', 'Sandawe', 'Sango', 'Yakut', 'South American Indian languages', 'Salishan languages', 'Samaritan Aramaic', 'Sanskrit', 'Sasak', 'Santali', 'Sicilian', 'Scots', 'Selkup', 'Semitic languages', 'Irish, Old (to 900)', 'Sign Languages', 'Shan', 'Sidamo', 'Sinhala; Sinhalese', 'Siouan languages', 'Sino-Tibetan languages', 'Slavic languages', 'Slovak', 'Slovenian', 'Southern Sami', 'Northern Sami', 'Sami languages', 'Lule Sami', 'Inari Sami', 'Samoan', 'Skolt Sami', 'Shona', 'Sindhi', 'Soninke', 'Sogdian', 'Somali', 'Songhai languages', 'Sotho, Southern', 'Spanish', 'Sardinian', 'Sranan Tongo', 'Serbian', 'Serer', 'Nilo-Saharan languages', 'Swati', 'Sukuma', 'Sundanese', 'Susu', 'Sumerian', 'Swahili', 'Swedish', 'Classical Syriac', 'Syriac', 'Tahitian', 'Tai languages', 'Tamil', 'Tatar', 'Telugu', 'Timne', 'Tereno', 'Tetum', 'Tajik', 'Tagalog', 'Thai', 'Tigre', 'Tigrinya', 'Tiv', 'Tokelau', 'Klingon; tlhIngan-Hol', 'Tlingit', 'Tamashek', 'Tonga (Nyasa)', 'Tonga (Tonga Islands)', 'Tok Pisin', 'Tsimshian', 'Tswana', 'Tsonga', 'Turkmen', 'Tumbuka', 'Tupi languages', 'Turkish', 'Altaic languages', 'Tuvalu', 'Twi', 'Tuvinian', 'Udmurt', 'Ugaritic', 'Uighur; Uyghur', 'Ukrainian', 'Umbundu', 'Undetermined', 'Urdu', 'Uzbek', 'Vai', 'Venda', 'Vietnamese', 'Volap\x9fk', 'Votic', 'Wakashan languages', 'Wolaitta; Wolaytta', 'Waray', 'Washo', 'Sorbian languages', 'Walloon', 'Wolof', 'Kalmyk; Oirat', 'Xhosa', 'Yao', 'Yapese', 'Yiddish', 'Yoruba', 'Yupik languages', 'Zapotec', 'Blissymbols; Blissymbolics; Bliss', 'Zenaga', 'Standard Moroccan Tamazight', 'Zhuang; Chuang', 'Zande languages', 'Zulu', 'Zuni', 'No linguistic content; Not applicable', 'Zaza; Dimili; Dimli; Kirdki; Kirmanjki; Zazaki', "Chinese"]
 
     @property
     def id(self) -> int:
@@ -141,10 +207,10 @@ class Book:
     
     @property
     def reading_list_users(self) -> Iterable['User']:
-        return iter(self.__reading_list_users)
+        return iter(_container(self, '_Book__reading_list_users'))
     
     def add_reading_list_user(self, user: 'User'):
-        self.__reading_list_users.append(user)
+        _container(self, '_Book__reading_list_users').append(user)
 
     @property
     def title(self) -> str:
@@ -171,7 +237,7 @@ class Book:
 
     @property
     def reviews(self):
-        return self.__reviews
+        return _container(self, '_Book__reviews')
 
     @property
     def language(self) -> str:
@@ -182,7 +248,9 @@ class Book:
         if isinstance(book_language, str):
             book_language = book_language.strip()
             if book_language != "":
-                self.__language = self.__languages_in_english[self.__language_iso_codes.index(book_language)]
+                if book_language not in self.__languages_by_iso_code:
+                    raise ValueError(f'{book_language!r} is not a language code')
+                self.__language = self.__languages_by_iso_code[book_language]
             else:
                 self.__language = "English"
 
@@ -213,30 +281,31 @@ class Book:
     @publisher.setter
     def publisher(self, publisher: Publisher):
         if isinstance(publisher, Publisher):
-            self.__publisher = publisher
-            publisher.add_book(self)
+            if publisher is not self.__publisher:
+                self.__publisher = publisher
+                publisher.add_book(self)
         else:
             self.__publisher = None
 
     @property
     def authors(self) -> List[Author]:
-        return self.__authors
+        return _container(self, '_Book__authors')
 
     def add_author(self, author: Author):
         if not isinstance(author, Author):
             return
 
-        if author in self.__authors:
+        if author in self.authors:
             return
 
-        self.__authors.append(author)
+        self.authors.append(author)
 
     def remove_author(self, author: Author):
         if not isinstance(author, Author):
             return
 
-        if author in self.__authors:
-            self.__authors.remove(author)
+        if author in self.authors:
+            self.authors.remove(author)
 
     @property
     def ebook(self) -> bool:
@@ -257,7 +326,7 @@ class Book:
             self.__num_pages = num_pages
 
     def add_review(self, review):
-        self.__reviews.append(review)
+        self.reviews.append(review)
 
     def __repr__(self):
         return f'<Book {self.title}, book id = {self.book_id}>'
@@ -276,6 +345,11 @@ class Book:
 
 class Review:
 
+    __slots__ = ('__book', '__user', '__review_text', '__rating', '__timestamp', '__dict__', '__weakref__')
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, book: Book, review_text: str, rating: int, user, timestamp=datetime.now()):
         if isinstance(book, Book):
             self.__book = book
@@ -336,6 +410,12 @@ class Review:
 
 class User:
 
+    __slots__ = ('__user_name', '__password', '__read_books', '__reviews', '__pages_read', '__reading_list',
+                 '__dict__', '__weakref__')
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, user_name: str, password: str):
         if user_name == "" or not isinstance(user_name, str):
             self.__user_name = None
@@ -347,10 +427,8 @@ class User:
         else:
             self.__password = password
 
-        self.__read_books = list()
-        self.__reviews = list()
+        # The read books, reviews and reading list are created when first used.
         self.__pages_read = 0
-        self.__reading_list: List[Book] = list()
 
     @property
     def user_name(self) -> str:
@@ -362,23 +440,23 @@ class User:
 
     @property
     def read_books(self) -> List[Book]:
-        return self.__read_books
+        return _container(self, '_User__read_books')
 
     @property
     def reviews(self) -> List[Review]:
-        return self.__reviews
+        return _container(self, '_User__reviews')
 
     @property
     def reading_list(self) -> List[Book]:
-        return self.__reading_list
+        return _container(self, '_User__reading_list')
 
     def add_to_reading_list(self, book: Book):
         if isinstance(book, Book):
-            self.__reading_list.append(book)
+            self.reading_list.append(book)
 
     def remove_from_reading_list(self, book: Book):
         if isinstance(book, Book):
-            self.__reading_list.remove(book)
+            self.reading_list.remove(book)
 
     @property
     def pages_read(self) -> int:
@@ -386,14 +464,14 @@ class User:
 
     def read_a_book(self, book: Book):
         if isinstance(book, Book):
-            self.__read_books.append(book)
+            self.read_books.append(book)
             if book.num_pages is not None:
                 self.__pages_read += book.num_pages
 
     def add_review(self, review: Review):
         if isinstance(review, Review):
             # Review objects are in practice always considered different due to their timestamp.
-            self.__reviews.append(review)
+            self.reviews.append(review)
 
     def __repr__(self):
         return f'<User {self.user_name}>'
@@ -0,0 +1,209 @@
+import functools
+import threading
+import time
+from collections import defaultdict
+
+from flask import Blueprint, Response, current_app, g, has_request_context, request
+
+from capitulo.adapters.repository import AbstractRepository
+from capitulo.instrumentation.statements import StatementCounter, DEFAULT_N_PLUS_ONE_THRESHOLD, \
+    current_repository_method, set_current_repository_method, listen_for_statements
+
+# Configure the Blueprint
+instrumentation_blueprint = Blueprint('instrumentation_bp', __name__)
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestTimings:
+    """ The repository calls and SQL statements made while handling one request, with the time they took """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # method name -> [calls, seconds]
+        self.repository_calls = defaultdict(lambda: [0, 0.0])
+        self.sql = StatementCounter()
+
+    def server_timing(self, total_seconds: float, n_plus_one_candidates: dict = None) -> str:
+        """ Returns the value of the request's Server-Timing header, with durations in milliseconds """
+        repository_calls = sum(calls for calls, _ in self.repository_calls.values())
+        repository_seconds = sum(seconds for _, seconds in self.repository_calls.values())
+        entries = [
+            f'total;dur={total_seconds * 1e3:.3f}',
+            f'repository;desc="{repository_calls} calls";dur={repository_seconds * 1e3:.3f}',
+            f'sql;desc="{self.sql.statements} statements";dur={self.sql.seconds * 1e3:.3f}'
+        ]
+        if n_plus_one_candidates:
+            entries.append(f'n-plus-one;desc="{len(n_plus_one_candidates)} repeated statements"')
+        for method, (calls, seconds) in self.repository_calls.items():
+            entries.append(f'repository-{method};desc="{calls} calls";dur={seconds * 1e3:.3f}')
+        return ', '.join(entries)
+
+
+class Metrics:
+    """ Adds up the timings of every request since the app started, for the /_metrics endpoint
+        Repository calls and SQL statements made outside a request, such as when populating, are counted too. """
+
+    def __init__(self):
+        # Requests are handled on several threads by some servers.
+        self.__lock = threading.Lock()
+        # endpoint -> [requests, seconds]
+        self.__requests = defaultdict(lambda: [0, 0.0])
+        # method name -> [calls, seconds]
+        self.__repository_calls = defaultdict(lambda: [0, 0.0])
+        self.__sql = [0, 0.0]
+        # repository method -> statements, with None for statements run outside repository methods
+        self.__repository_statements = defaultdict(int)
+        # endpoint -> requests that ran a statement often enough to be a possible N+1 query
+        self.__n_plus_one_requests = defaultdict(int)
+
+    def record_request(self, endpoint: str, seconds: float):
+        with self.__lock:
+            totals = self.__requests[endpoint]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def record_repository_call(self, method: str, seconds: float):
+        with self.__lock:
+            totals = self.__repository_calls[method]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def record_sql_statement(self, statement: str, seconds: float, method: str = None):
+        with self.__lock:
+            self.__sql[0] += 1
+            self.__sql[1] += seconds
+            self.__repository_statements[method] += 1
+
+    def record_n_plus_one(self, endpoint: str):
+        with self.__lock:
+            self.__n_plus_one_requests[endpoint] += 1
+
+    def prometheus_text(self) -> str:
+        """ Returns the metrics in the Prometheus text exposition format """
+        with self.__lock:
+            requests = {endpoint: tuple(totals) for endpoint, totals in self.__requests.items()}
+            repository_calls = {method: tuple(totals) for method, totals in self.__repository_calls.items()}
+            sql_statements, sql_seconds = self.__sql
+            repository_statements = {method or 'none': count for method, count in self.__repository_statements.items()}
+            n_plus_one_requests = dict(self.__n_plus_one_requests)
+        lines = []
+
+        def add_metric(name, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, value in samples:
+                lines.append(f'{name}{labels} {value}')
+
+        add_metric('capitulo_requests_total', 'Requests handled, by endpoint.',
+                   [(f'{{endpoint="{endpoint}"}}', count) for endpoint, (count, _) in sorted(requests.items())])
+        add_metric('capitulo_request_seconds_total', 'Time spent handling requests, by endpoint.',
+                   [(f'{{endpoint="{endpoint}"}}', repr(seconds))
+                    for endpoint, (_, seconds) in sorted(requests.items())])
+        add_metric('capitulo_repository_calls_total', 'Repository method calls, by method.',
+                   [(f'{{method="{method}"}}', count) for method, (count, _) in sorted(repository_calls.items())])
+        add_metric('capitulo_repository_seconds_total', 'Time spent in repository methods, by method.',
+                   [(f'{{method="{method}"}}', repr(seconds))
+                    for method, (_, seconds) in sorted(repository_calls.items())])
+        add_metric('capitulo_sql_statements_total', 'SQL statements executed.', [('', sql_statements)])
+        add_metric('capitulo_sql_seconds_total', 'Time spent executing SQL statements.', [('', repr(sql_seconds))])
+        add_metric('capitulo_repository_sql_statements_total',
+                   'SQL statements executed, by the repository method that ran them.',
+                   [(f'{{method="{method}"}}', count) for method, count in sorted(repository_statements.items())])
+        add_metric('capitulo_n_plus_one_requests_total',
+                   'Requests that repeated an SQL statement often enough to be a possible N+1 query, by endpoint.',
+                   [(f'{{endpoint="{endpoint}"}}', count) for endpoint, count in sorted(n_plus_one_requests.items())])
+        return '\n'.join(lines) + '\n'
+
+
+def current_timings():
+    """ Returns the RequestTimings of the request being handled, or None outside a timed request """
+    if has_request_context():
+        return g.get('request_timings')
+    return None
+
+
+def instrument_repository(repo: AbstractRepository, metrics: Metrics):
+    """ Times every public method of the repository, by replacing it on the instance with a timed wrapper
+        The repository keeps its class, so isinstance checks against it still hold. """
+    for name in dir(type(repo)):
+        if name.startswith('_') or isinstance(getattr(type(repo), name), property):
+            continue
+        method = getattr(repo, name)
+        if callable(method) and not hasattr(method, '__wrapped__'):
+            setattr(repo, name, _timed(name, method, metrics))
+
+
+def _timed(name, method, metrics: Metrics):
+    @functools.wraps(method)
+    def timed_method(*args, **kwargs):
+        if current_repository_method() is not None:
+            # A call a repository method makes to another is part of the outer call's time and statements.
+            return method(*args, **kwargs)
+        set_current_repository_method(name)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            set_current_repository_method(None)
+            metrics.record_repository_call(name, seconds)
+            timings = current_timings()
+            if timings is not None:
+                calls = timings.repository_calls[name]
+                calls[0] += 1
+                calls[1] += seconds
+    return timed_method
+
+
+def instrument_engine(engine, metrics: Metrics):
+    """ Times and counts every SQL statement the engine executes """
+
+    def record(statement, seconds, method):
+        metrics.record_sql_statement(statement, seconds, method)
+        timings = current_timings()
+        if timings is not None:
+            timings.sql.record(statement, seconds, method)
+
+    return listen_for_statements(engine, record)
+
+
+def init_app(app, repo: AbstractRepository, engine=None, statement_budget: int = None,
+             n_plus_one_threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD):
+    """ Times the app's requests, the repository's methods and the engine's SQL statements, adds a Server-Timing
+        header to every response and serves the totals at /_metrics
+        Requests that repeat a statement n_plus_one_threshold times are logged as possible N+1 queries, and requests
+        that run more statements than statement_budget raise StatementBudgetExceeded. """
+    metrics = app.extensions['capitulo_metrics'] = Metrics()
+    instrument_repository(repo, metrics)
+    if engine is not None:
+        instrument_engine(engine, metrics)
+
+    @app.before_request
+    def start_request_timings():
+        g.request_timings = RequestTimings()
+
+    @app.after_request
+    def add_server_timing(response):
+        timings = g.pop('request_timings', None)
+        if timings is not None:
+            total_seconds = time.perf_counter() - timings.started
+            endpoint = request.endpoint or 'unknown'
+            metrics.record_request(endpoint, total_seconds)
+            candidates = timings.sql.n_plus_one_candidates(n_plus_one_threshold)
+            if candidates:
+                metrics.record_n_plus_one(endpoint)
+                app.logger.warning('Possible N+1 queries in %s %s: %s', request.method, request.full_path,
+                                   '; '.join(f'{count} x {shape}' for shape, count in candidates.items()))
+            response.headers['Server-Timing'] = timings.server_timing(total_seconds, candidates)
+            if statement_budget is not None:
+                timings.sql.check_budget(statement_budget)
+        return response
+
+    app.register_blueprint(instrumentation_blueprint)
+
+
+@instrumentation_blueprint.route('/_metrics', methods=['GET'])
+def metrics_endpoint():
+    metrics = current_app.extensions['capitulo_metrics']
+    return Response(metrics.prometheus_text(), content_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,106 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict
+
+from sqlalchemy import event
+
+# The same query for a different number of ids renders IN (?, ?) or IN (?, ?, ?); both have the shape IN (?)
+_PARAMETER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# A statement shape run this many times or more while handling one request is reported as a possible N+1 query
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+# The repository method each thread is running, if any
+_repository_call = threading.local()
+
+
+class StatementBudgetExceeded(Exception):
+
+    def __init__(self, message=None):
+        super().__init__(message)
+
+
+def statement_shape(statement: str) -> str:
+    """ Returns the statement with its whitespace and lists of parameters collapsed, so that statements run for
+        different values compare equal """
+    return _PARAMETER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def current_repository_method() -> str:
+    """ Returns the name of the repository method this thread is running, or None outside repository methods """
+    return getattr(_repository_call, 'method', None)
+
+
+def set_current_repository_method(method: str):
+    _repository_call.method = method
+
+
+class StatementCounter:
+    """ Counts SQL statements by their shape and by the repository method that ran them """
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        # Statements run outside any repository method are counted under None
+        self.by_repository_method = Counter()
+
+    def record(self, statement: str, seconds: float, method: str = None):
+        self.statements += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        self.by_repository_method[method] += 1
+
+    def n_plus_one_candidates(self, threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """ Returns the shapes run at least threshold times, which usually come from loading related objects one
+            object at a time, with the number of times each was run """
+        return {shape: count for shape, count in self.shapes.most_common() if count >= threshold}
+
+    def check_budget(self, budget: int):
+        """ Raises StatementBudgetExceeded if more than budget statements were counted """
+        if self.statements > budget:
+            repeated = '; '.join(f'{count} x {shape}' for shape, count in self.shapes.most_common(3))
+            raise StatementBudgetExceeded(f'{self.statements} SQL statements run, over the budget of {budget}. '
+                                          f'Most repeated: {repeated}')
+
+
+def listen_for_statements(engine, record):
+    """ Calls record(statement, seconds, repository method) for every SQL statement the engine runs, and returns a
+        function that stops listening """
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('statement_starts', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['statement_starts'].pop()
+        record(statement, seconds, current_repository_method())
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    def stop_listening():
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+    return stop_listening
+
+
+@contextmanager
+def count_statements(engine, budget: int = None):
+    """ Counts the SQL statements the engine runs inside the with block
+        If a budget is given and the block runs more statements than it, StatementBudgetExceeded is raised on leaving
+        the block, which fails a test written as:
+
+            with count_statements(engine, budget=3):
+                ... """
+    counter = StatementCounter()
+    stop_listening = listen_for_statements(engine, counter.record)
+    try:
+        yield counter
+    finally:
+        stop_listening()
+    if budget is not None:
+        counter.check_budget(budget)
@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Iterable, List, Mapping
+
+from capitulo.adapters.repository import AbstractRepository, BOOK_LISTING, BOOK_DETAIL
+from capitulo.domain.model import Book, Review, Author, Publisher
+
+# Views kept at most; a listing page shows a handful of books, so this holds the books browsed most recently
+DEFAULT_BOOK_VIEW_CACHE_SIZE = 4096
+
+
+def freeze(value):
+    """ Returns the value with its dicts made read-only mappings and its lists tuples, all the way down """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class BookViewCache:
+    """ Holds the dicts the services show books as, read-only, for the books shown most recently
+        Each view is kept with its repository's version of the book, so it is rebuilt once a review is added to the
+        book or the catalogue changes. The database repository reads the versions from the database, so reviews added
+        by other workers are seen too. Views are kept per kind, such as a listing's and a book page's, and those of
+        a previous repository are dropped. """
+
+    def __init__(self, maximum_size: int = DEFAULT_BOOK_VIEW_CACHE_SIZE):
+        # Requests are handled on several threads by some servers.
+        self.__lock = threading.Lock()
+        self.__maximum_size = maximum_size
+        self.__repo = None
+        # (kind, book id) -> (book version, view), least recently used first
+        self.__views = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__views)
+
+    def resize(self, maximum_size: int):
+        with self.__lock:
+            self.__maximum_size = maximum_size
+            self.__evict()
+
+    def clear(self):
+        with self.__lock:
+            self.__views.clear()
+
+    def views(self, repo: AbstractRepository, kind: str, book_ids: Iterable[int],
+              build: Callable[[List[int]], Iterable[dict]]) -> List[Mapping]:
+        """ Returns the views of the books, in the order of book_ids
+            Books without an up to date view are passed to build, which returns their views as dicts with an 'id';
+            books it doesn't return a view for are left out. """
+        book_ids = list(book_ids)
+        # The versions are read before building, so reviews added while building cause another rebuild next time.
+        versions = repo.book_versions(book_ids)
+        views = dict()
+        with self.__lock:
+            if self.__repo is not repo:
+                self.__views.clear()
+                self.__repo = repo
+            for book_id in book_ids:
+                entry = self.__views.get((kind, book_id))
+                if entry is not None and entry[0] == versions[book_id]:
+                    self.__views.move_to_end((kind, book_id))
+                    views[book_id] = entry[1]
+        missing = [book_id for book_id in dict.fromkeys(book_ids) if book_id not in views]
+        if missing:
+            built = {view['id']: freeze(view) for view in build(missing)}
+            views.update(built)
+            with self.__lock:
+                if self.__repo is repo:
+                    for book_id, view in built.items():
+                        if book_id in versions:
+                            self.__views[(kind, book_id)] = (versions[book_id], view)
+                            self.__views.move_to_end((kind, book_id))
+                    self.__evict()
+        return [views[book_id] for book_id in book_ids if book_id in views]
+
+    def __evict(self):
+        while len(self.__views) > self.__maximum_size:
+            self.__views.popitem(last=False)
+
+
+book_views = BookViewCache()
+
+
+def book_view(book_id: int, repo: AbstractRepository) -> Mapping:
+    """ Returns the view of a book's own page, from the cache when it is up to date
+        Returns None if there is no associated book """
+    views = book_views.views(repo, BOOK_DETAIL, [book_id],
+                             lambda book_ids: books_to_dict(repo.get_books_by_id(book_ids, BOOK_DETAIL)))
+    return views[0] if len(views) > 0 else None
+
+
+def listing_views(book_ids: Iterable[int], repo: AbstractRepository) -> List[Mapping]:
+    """ Returns the views of the books as a listing shows them, in the order of book_ids
+        Only the books without an up to date view in the cache are loaded and converted. """
+    return book_views.views(repo, BOOK_LISTING, book_ids,
+                            lambda missing_ids: books_to_listing_dict(repo.get_books_by_id(missing_ids, BOOK_LISTING)))
+
+
+def book_to_dict(book: Book):
+    book_dict = {
+        'id': book.book_id,
+        'title': book.title,
+        'reviews': reviews_to_dict(book.reviews),
+        'description': book.description,
+        #'publisher': book.publisher.name,
+        'publisher': publisher_copy(book.publisher),
+        'authors': authors_to_dict(book.authors),
+        'release_year': book.release_year,
+        'image_hyperlink': book.image_hyperlink,
+        #'ebook': book.ebook,
+        'num_pages': book.num_pages,
+    }
+    return book_dict
+
+
+def books_to_dict(books: Iterable[Book]):
+    return [book_to_dict(book) for book in books]
+
+
+def book_to_listing_dict(book: Book):
+    """ Returns what a listing shows of a book: book_to_dict without the reviews, which are only counted """
+    book_dict = {
+        'id': book.book_id,
+        'title': book.title,
+        'number_of_reviews': len(book.reviews),
+        'description': book.description,
+        'publisher': publisher_copy(book.publisher),
+        'authors': authors_to_dict(book.authors),
+        'release_year': book.release_year,
+        'image_hyperlink': book.image_hyperlink,
+        'num_pages': book.num_pages,
+    }
+    return book_dict
+
+
+def books_to_listing_dict(books: Iterable[Book]):
+    return [book_to_listing_dict(book) for book in books]
+
+
+def publisher_copy(publisher: Publisher):
+    # Cached views outlive the request, so they can't hold on to a publisher the database session may expire.
+    return Publisher(publisher.name) if publisher is not None else None
+
+
+def review_to_dict(review: Review):
+    review_dict = {
+        'book_id': review.book.book_id,
+        'user_name': review.user.user_name,
+        'review_text': review.review_text,
+        'rating': review.rating,
+        'timestamp': review.timestamp
+    }
+    return review_dict
+
+
+def reviews_to_dict(reviews: Iterable[Review]):
+    return [review_to_dict(review) for review in reviews]
+
+
+def author_to_dict(author: Author):
+    author_dict = {
+        'author_id': author.unique_id,
+        'full_name': author.full_name
+    }
+    return author_dict
+
+
+def authors_to_dict(authors: Iterable[Author]):
+    return [author_to_dict(author) for author in authors]
@@ -0,0 +1,85 @@
+import math
+from typing import List
+
+from flask import url_for
+
+from capitulo.adapters.repository import AbstractRepository
+
+
+class Page:
+    """ One page of the books in a category: the ids of the books on the page and the number of books overall
+        A page read by keyset, after a given book id, has no number, but knows the id the next page starts after. """
+
+    def __init__(self, number: int, books_per_page: int, book_ids: List[int], total: int, next_after: int = None):
+        self.__number = number
+        self.__books_per_page = books_per_page
+        self.__book_ids = book_ids
+        self.__total = total
+        self.__next_after = next_after
+
+    @property
+    def number(self) -> int:
+        return self.__number
+
+    @property
+    def next_after(self) -> int:
+        """ The id of the last book on the page when more books follow it, for reading the next page by keyset """
+        return self.__next_after
+
+    @property
+    def book_ids(self) -> List[int]:
+        return self.__book_ids
+
+    @property
+    def total(self) -> int:
+        return self.__total
+
+    @property
+    def number_of_pages(self) -> int:
+        return math.ceil(self.__total / self.__books_per_page)
+
+    def urls(self, endpoint: str, **values) -> List[str]:
+        """ Returns the url of every page, built from the endpoint and query values of the current one """
+        return [url_for(endpoint, page=number, **values) for number in range(1, self.number_of_pages + 1)]
+
+    def next_url(self, endpoint: str, **values) -> str:
+        """ Returns the url of the next page by keyset, or None on the last page """
+        if self.__next_after is None:
+            return None
+        return url_for(endpoint, after=self.__next_after, **values)
+
+
+def page_number(page_arg) -> int:
+    """ Reads the page query parameter, which counts from 1 """
+    if page_arg is None:
+        return 1
+    return max(int(page_arg), 1)
+
+
+def after_book_id(after_arg) -> int:
+    """ Reads the after query parameter, the id of the book a page read by keyset follows """
+    if after_arg is None:
+        return None
+    return int(after_arg)
+
+
+def get_page(category: str, key, number: int, books_per_page: int, repo: AbstractRepository) -> Page:
+    book_ids, total = repo.get_book_ids_page(category, key, (number - 1) * books_per_page, books_per_page)
+    next_after = book_ids[-1] if len(book_ids) > 0 and number * books_per_page < total else None
+    return Page(number, books_per_page, book_ids, total, next_after)
+
+
+def get_page_after(category: str, key, after: int, books_per_page: int, repo: AbstractRepository) -> Page:
+    """ Returns the page of the books in a category that follow the book with id after, in id order
+        One more id than fits on the page is read, to know whether there is a next page. """
+    book_ids = repo.get_book_ids_after(category, key, after, books_per_page + 1)
+    next_after = book_ids[books_per_page - 1] if len(book_ids) > books_per_page else None
+    return Page(None, books_per_page, book_ids[:books_per_page], repo.count_book_ids(category, key), next_after)
+
+
+def get_category_page(category: str, key, number: int, after: int, books_per_page: int,
+                      repo: AbstractRepository) -> Page:
+    """ Returns the page after the given book id when there is one, and otherwise the numbered page """
+    if after is not None:
+        return get_page_after(category, key, after, books_per_page, repo)
+    return get_page(category, key, number, books_per_page, repo)
@@ -25,6 +25,11 @@ def get_release_years(repo: AbstractRepository):
     return release_years
 
 
+def get_facet_counts(repo: AbstractRepository):
+    facet_counts = repo.get_facet_counts()
+    return facet_counts
+
+
 def get_book(book_id: int, repo: AbstractRepository):
     book = repo.get_book(book_id)
     return book
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, render_template, redirect, url_for, session
+from markupsafe import Markup
 
 import capitulo.adapters.repository as repo
 import capitulo.utilities.services as services
@@ -7,7 +8,71 @@ import capitulo.utilities.services as services
 utilities_blueprint = Blueprint('utilities_bp', __name__)
 
 
+class NavigationCache:
+    """ Holds the navigation menu links and book counts, and the menus rendered from them, until the repository's
+        books change """
+
+    def __init__(self):
+        self.__repo = None
+        self.__catalogue_version = None
+        self.__urls = None
+        self.__facet_counts = None
+        self.__menus_html = None
+
+    def __refresh(self, repo_instance):
+        if self.__repo is repo_instance and self.__catalogue_version == repo_instance.catalogue_version:
+            return
+        # The version is read before building, so books added while building cause another rebuild next time.
+        catalogue_version = repo_instance.catalogue_version
+        self.__urls = {
+            'author_urls': build_authors_and_urls(),
+            'language_urls': build_languages_and_urls(),
+            'publisher_urls': build_publishers_and_urls(),
+            'release_year_urls': build_release_years_and_urls()
+        }
+        self.__facet_counts = services.get_facet_counts(repo_instance)
+        self.__menus_html = None
+        self.__repo = repo_instance
+        self.__catalogue_version = catalogue_version
+
+    def urls(self, repo_instance) -> dict:
+        self.__refresh(repo_instance)
+        return self.__urls
+
+    def menus_html(self, repo_instance) -> Markup:
+        self.__refresh(repo_instance)
+        if self.__menus_html is None:
+            self.__menus_html = Markup(render_template('navigation_menus.html', facet_counts=self.__facet_counts,
+                                                       **self.__urls))
+        return self.__menus_html
+
+
+navigation_cache = NavigationCache()
+
+
+@utilities_blueprint.app_context_processor
+def inject_navigation_menus():
+    # The menus are only built when a template actually renders them.
+    return {'navigation_menus': lambda: navigation_cache.menus_html(repo.repo_instance)}
+
+
 def get_languages_and_urls():
+    return navigation_cache.urls(repo.repo_instance)['language_urls']
+
+
+def get_authors_and_urls():
+    return navigation_cache.urls(repo.repo_instance)['author_urls']
+
+
+def get_publishers_and_urls():
+    return navigation_cache.urls(repo.repo_instance)['publisher_urls']
+
+
+def get_release_years_and_urls():
+    return navigation_cache.urls(repo.repo_instance)['release_year_urls']
+
+
+def build_languages_and_urls():
     languages = services.get_languages(repo.repo_instance)
     language_urls = dict()
     for language in languages:
@@ -15,7 +80,7 @@ def get_languages_and_urls():
     return language_urls
 
 
-def get_authors_and_urls():
+def build_authors_and_urls():
     authors = services.get_authors(repo.repo_instance)
     author_urls = dict()
     for author in authors:
@@ -23,7 +88,7 @@ def get_authors_and_urls():
     return author_urls
 
 
-def get_publishers_and_urls():
+def build_publishers_and_urls():
     publishers = services.get_publishers(repo.repo_instance)
     publisher_urls = dict()
     for publisher_name in publishers:
@@ -31,7 +96,7 @@ def get_publishers_and_urls():
     return publisher_urls
 
 
-def get_release_years_and_urls():
+def build_release_years_and_urls():
     release_years = services.get_release_years(repo.repo_instance)
     release_year_urls = dict()
     for release_year in release_years:
@@ -53,4 +118,4 @@ def get_languages():
 
 def get_books_by_author(author):
     books = services.get_books_by_author(author, repo.repo_instance)
-    return books
\ No newline at end of file
+    return books
@@ -18,10 +18,51 @@ class Config:
 
     REPOSITORY = environ.get('REPOSITORY')
 
+    # Number of processes used to parse the books file and hash passwords when populating; 1 does it in the app
+    # process
+    LOAD_PROCESSES = int(environ.get('LOAD_PROCESSES', '1'))
+
+    # File the hashed passwords of users.csv are saved to, so later starts don't hash them again; unset to always hash
+    PASSWORD_HASH_CACHE = environ.get('PASSWORD_HASH_CACHE')
+
+    # File a populated memory repository is saved to and loaded back from on later starts; unset to always populate
+    MEMORY_SNAPSHOT = environ.get('MEMORY_SNAPSHOT')
+
     # Database configuration
     SQLALCHEMY_DATABASE_URI = environ.get('SQLALCHEMY_DATABASE_URI')
 
+    # Connection pool of the database engine: 'null' opens a connection per request, 'queue' keeps
+    # DATABASE_POOL_SIZE connections (and up to DATABASE_MAX_OVERFLOW more) open for reuse, 'static' shares one
+    DATABASE_POOL = environ.get('DATABASE_POOL', 'null')
+    DATABASE_POOL_SIZE = int(environ.get('DATABASE_POOL_SIZE', '5'))
+    DATABASE_MAX_OVERFLOW = int(environ.get('DATABASE_MAX_OVERFLOW', '10'))
+
+    # Pragmas set on every SQLite connection; set one to an empty value to leave SQLite's own default
+    SQLITE_PRAGMAS = {
+        'journal_mode': environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': environ.get('SQLITE_MMAP_SIZE', '268435456'),
+        'cache_size': environ.get('SQLITE_CACHE_SIZE', '-65536')
+    }
+
+    # Books whose page and listing views are cached, until a review is added to them or the catalogue changes. With
+    # the database repository, each page reads the versions of its books from the reviews table, so reviews posted
+    # through other workers are shown too.
+    BOOK_VIEW_CACHE_SIZE = int(environ.get('BOOK_VIEW_CACHE_SIZE', '4096'))
+
+    # Rows written per batch when populating the database
+    POPULATE_BATCH_SIZE = int(environ.get('POPULATE_BATCH_SIZE', '1000'))
+
     echo_string = environ.get('SQLALCHEMY_ECHO')
     SQLALCHEMY_ECHO = False
     if echo_string.lower().strip() == "true":
         SQLALCHEMY_ECHO = True
+
+    # Time requests, repository calls and SQL statements, adding a Server-Timing header and a /_metrics endpoint
+    INSTRUMENTATION = environ.get('INSTRUMENTATION', 'False').lower().strip() == 'true'
+
+    # Requests repeating one SQL statement this many times are logged as possible N+1 queries
+    N_PLUS_ONE_THRESHOLD = int(environ.get('N_PLUS_ONE_THRESHOLD', '5'))
+
+    # Requests running more SQL statements than this raise an error, which fails tests that go over it; unset for none
+    SQL_STATEMENT_BUDGET = int(environ['SQL_STATEMENT_BUDGET']) if environ.get('SQL_STATEMENT_BUDGET') else None
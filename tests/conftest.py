@@ -3,6 +3,7 @@ import pytest
 from capitulo import create_app
 from capitulo.adapters import memory_repository
 from capitulo.adapters.memory_repository import MemoryRepository
+from capitulo.adapters.orm import unmap_model
 
 from utils import get_project_root
 
@@ -17,15 +18,19 @@ def in_memory_repo():
 
 
 @pytest.fixture
-def client():
+def client(tmp_path):
     my_app = create_app({
         'TESTING': True,
         'TEST_DATA_PATH': TEST_DATA_PATH,
+        # A database of its own, rather than the one in .env, when REPOSITORY is 'database'
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "capitulo-test.db"}',
         'WTF_CSRF_ENABLED': False
 
     })
 
-    return my_app.test_client()
+    yield my_app.test_client()
+    # The mappers would otherwise stay installed for the memory tests that follow.
+    unmap_model()
 
 
 class AuthenticationManager:
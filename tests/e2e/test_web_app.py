@@ -2,6 +2,15 @@ import pytest
 
 from flask import session
 
+import capitulo.adapters.repository as repo
+import capitulo.utilities.utilities as utilities
+from capitulo import create_app
+from capitulo.adapters.orm import unmap_model
+from capitulo.domain.model import Book
+from capitulo.instrumentation.statements import StatementBudgetExceeded
+
+from utils import get_project_root
+
 
 def test_register(client):
     # Check that we retrieve the register page.
@@ -157,6 +166,12 @@ def test_books_with_author(client):
 
     # Check that the page includes the first book
     assert b'Books by Andrea DiVito' in response.data
+    assert b'The Thing: Idol of Millions' in response.data
+
+    # Check that every book by the author is listed
+    response = client.get('/books_by_author?author_name=Garth+Ennis&author_id=14965')
+    assert b'War Stories, Volume 3' in response.data
+    assert b'War Stories, Volume 4' in response.data
 
 
 def test_books_with_publisher(client):
@@ -175,3 +190,155 @@ def test_books_with_release_year(client):
 
     # Check that the page includes the first book
     assert b'Books from 1997' in response.data
+
+
+@pytest.fixture
+def memory_app():
+    return create_app({
+        'TESTING': True,
+        'REPOSITORY': 'memory',
+        'TEST_DATA_PATH': get_project_root() / 'tests' / 'data',
+        'WTF_CSRF_ENABLED': False
+    })
+
+
+def test_navigation_menus_are_rebuilt_when_books_change(memory_app):
+    client = memory_app.test_client()
+    response = client.get('/About_Us')
+    assert response.status_code == 200
+    assert b'books_by_language?language=English' in response.data
+    assert b'Welsh' not in response.data
+
+    # The cached menus are reused while the books stay the same.
+    with memory_app.test_request_context():
+        menus = utilities.navigation_cache.menus_html(repo.repo_instance)
+        assert utilities.navigation_cache.menus_html(repo.repo_instance) is menus
+
+    book = Book(1, 'A new book')
+    book.language = 'wel'
+    repo.repo_instance.add_book(book)
+
+    response = client.get('/About_Us')
+    assert b'books_by_language?language=Welsh' in response.data
+    assert b'Welsh (1 book)' in response.data
+    assert b'English (15 books)' in response.data
+
+
+def test_home_search_lists_each_matching_book_once(memory_app):
+    client = memory_app.test_client()
+    # Only books matching both words are listed, and each of them once.
+    response = client.get('/?q=war+avatar')
+    assert response.status_code == 200
+    assert response.data.count(b'War Stories, Volume 3') == 1
+    assert response.data.count(b'War Stories, Volume 4') == 1
+    assert b'Crossed, Volume 15' not in response.data
+
+
+def test_books_with_release_year_second_page(memory_app):
+    client = memory_app.test_client()
+    response = client.get('/books_by_release_year?release_year=2016&page=2')
+    assert response.status_code == 200
+    assert b'Cruelle' in response.data
+    assert b'War Stories' not in response.data
+    assert b'books_by_release_year?page=2&amp;release_year=2016' in response.data
+
+
+def test_browse_books_by_several_facets(memory_app):
+    client = memory_app.test_client()
+    response = client.get('/browse?language=English&release_year=2016')
+    assert response.status_code == 200
+    assert b'4 books' in response.data
+    assert b'War Stories, Volume 4' in response.data
+    assert b'Cruelle' not in response.data
+    # The French book from 2016 is offered, with the number of books choosing French as well would add.
+    assert b'/browse?language=English&amp;language=French&amp;release_year=2016">French</a> (1)' in response.data
+
+
+def test_memory_repository_is_loaded_from_snapshot(tmp_path):
+    snapshot_path = tmp_path / 'capitulo.snapshot'
+    test_config = {
+        'TESTING': True,
+        'REPOSITORY': 'memory',
+        'TEST_DATA_PATH': get_project_root() / 'tests' / 'data',
+        'WTF_CSRF_ENABLED': False,
+        'MEMORY_SNAPSHOT': snapshot_path
+    }
+    create_app(test_config)
+    assert snapshot_path.exists()
+    saved_at = snapshot_path.stat().st_mtime_ns
+
+    app = create_app(test_config)
+    # The second start loads the snapshot rather than populating and saving it again.
+    assert snapshot_path.stat().st_mtime_ns == saved_at
+    assert repo.repo_instance.get_number_of_books() == 20
+    response = app.test_client().get('/?q=war')
+    assert b'War Stories, Volume 3' in response.data
+
+
+def test_instrumentation_times_requests():
+    app = create_app({
+        'TESTING': True,
+        'REPOSITORY': 'memory',
+        'TEST_DATA_PATH': get_project_root() / 'tests' / 'data',
+        'WTF_CSRF_ENABLED': False,
+        'INSTRUMENTATION': True
+    })
+    client = app.test_client()
+    response = client.get('/books_by_release_year?release_year=2016')
+    assert response.status_code == 200
+    server_timing = response.headers['Server-Timing']
+    assert server_timing.startswith('total;dur=')
+    assert 'repository-get_books_by_id;desc="1 calls"' in server_timing
+
+    response = client.get('/_metrics')
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    metrics = response.get_data(as_text=True)
+    assert 'capitulo_requests_total{endpoint="books_bp.books_by_release_year"} 1' in metrics
+    assert 'capitulo_repository_calls_total{method="get_books_by_id"} 1' in metrics
+
+
+def test_instrumentation_is_off_by_default(memory_app):
+    client = memory_app.test_client()
+    assert 'Server-Timing' not in client.get('/About_Us').headers
+    assert client.get('/_metrics').status_code == 404
+
+
+@pytest.fixture
+def instrumented_database_app(tmp_path):
+    # A database of its own, which create_app finds empty and so creates, maps and populates
+    app = create_app({
+        'TESTING': True,
+        'REPOSITORY': 'database',
+        'TEST_DATA_PATH': get_project_root() / 'tests' / 'data',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "capitulo-test.db"}',
+        'WTF_CSRF_ENABLED': False,
+        'INSTRUMENTATION': True,
+        'SQL_STATEMENT_BUDGET': 1
+    })
+    yield app
+    # The mappers would otherwise stay installed for the memory tests that follow.
+    unmap_model()
+
+
+def test_statement_budget_fails_requests_that_go_over_it(instrumented_database_app):
+    client = instrumented_database_app.test_client()
+    with pytest.raises(StatementBudgetExceeded):
+        client.get('/books_by_language?language=English')
+    metrics = client.get('/_metrics').get_data(as_text=True)
+    assert 'capitulo_repository_sql_statements_total{method="get_books_by_id"}' in metrics
+
+
+def test_books_by_release_year_pages_by_book_id(memory_app):
+    client = memory_app.test_client()
+    first_page = client.get('/books_by_release_year?release_year=2016')
+    next_url = b'/books_by_release_year?after='
+    assert next_url in first_page.data
+
+    book_ids = repo.repo_instance.get_book_ids_for_year(2016)
+    response = client.get(f'/books_by_release_year?release_year=2016&after={book_ids[3]}')
+    assert response.status_code == 200
+    # The page after the first four books is the second page
+    assert response.data.count(b'Cruelle') == client.get('/books_by_release_year?release_year=2016&page=2') \
+        .data.count(b'Cruelle') == 1
+    # It is the last page
+    assert next_url not in response.data
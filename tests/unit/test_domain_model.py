@@ -1,4 +1,5 @@
 from pathlib import Path
+import pickle
 import pytest
 
 from utils import get_project_root
@@ -58,6 +59,16 @@ class TestPublisher:
         publisher1.name = "DC Comics"
         assert str(publisher1) == "<Publisher DC Comics>"
 
+    def test_books(self):
+        publisher = Publisher("Avatar Press")
+        book1 = Book(27036536, "War Stories, Volume 3")
+        book2 = Book(27036539, "War Stories, Volume 4")
+        book1.publisher = publisher
+        book2.publisher = publisher
+        book1.publisher = publisher
+        publisher.add_book("War Stories, Volume 3")
+        assert list(publisher.books) == [book1, book2]
+
 
 class TestAuthor:
 
@@ -287,6 +298,29 @@ class TestBook:
         assert str(
             book.authors) == "[<Author J.R.R. Tolkien, author id = 1>, <Author Ernest Hemingway, author id = 3>, <Author J.K. Rowling, author id = 4>]"
 
+    def test_collections_are_created_when_first_used(self):
+        book = Book(84765876, "Harry Potter")
+        reviews = book.reviews
+        assert reviews == []
+        review = Review(book, "Great", 5, None)
+        book.add_review(review)
+        assert book.reviews is reviews
+        assert review in reviews
+
+    def test_pickle_round_trip(self):
+        book = Book(84765876, "Harry Potter")
+        book.publisher = Publisher("Bloomsbury")
+        book.add_author(Author(4, "J.K. Rowling"))
+        book.release_year = 1997
+
+        copied_book = pickle.loads(pickle.dumps(book))
+        assert copied_book == book
+        assert copied_book.title == "Harry Potter"
+        assert copied_book.release_year == 1997
+        assert copied_book.authors == [Author(4, "J.K. Rowling")]
+        assert list(copied_book.publisher.books) == [copied_book]
+        assert copied_book.reviews == []
+
 
 class TestReview:
 
@@ -469,6 +503,47 @@ class TestBooksJSONReader:
         dataset_of_books = read_books_and_authors
         assert dataset_of_books[17].title == "續．星守犬"
 
+    def test_stream_books_from_file(self, read_books_and_authors):
+        root_folder = get_project_root()
+        data_folder = root_folder / "capitulo" / "adapters" / "data"
+        reader = BooksJSONReader(str(data_folder / 'comic_books_excerpt.json'),
+                                 str(data_folder / 'book_authors_excerpt.json'))
+        books = reader.iter_books()
+        assert next(books) == read_books_and_authors[0]
+        assert list(books) == read_books_and_authors[1:]
+        assert reader.dataset_of_books == []
+
+    def test_parse_books_in_parallel(self, read_books_and_authors):
+        root_folder = get_project_root()
+        data_folder = root_folder / "capitulo" / "adapters" / "data"
+        reader = BooksJSONReader(str(data_folder / 'comic_books_excerpt.json'),
+                                 str(data_folder / 'book_authors_excerpt.json'))
+        # A small chunk size splits the excerpt across several workers.
+        books = list(reader.iter_books_parallel(processes=2, chunk_bytes=4096))
+        assert books == read_books_and_authors
+
+        avatar_press_books = [book for book in books if book.publisher == Publisher("Avatar Press")]
+        assert len(avatar_press_books) == 4
+        assert all(book.publisher is avatar_press_books[0].publisher for book in avatar_press_books)
+        for book in books:
+            for author in book.authors:
+                assert all(other_author is author for other_book in books for other_author in other_book.authors
+                           if other_author == author)
+
+    def test_repeated_values_are_shared(self):
+        root_folder = get_project_root()
+        data_folder = root_folder / "capitulo" / "adapters" / "data"
+        reader = BooksJSONReader(str(data_folder / 'comic_books_excerpt.json'),
+                                 str(data_folder / 'book_authors_excerpt.json'))
+        books = list(reader.iter_books())
+
+        for book in books:
+            assert all(other_book.release_year is book.release_year for other_book in books
+                       if other_book.release_year == book.release_year)
+            assert all(other_book.language is book.language for other_book in books
+                       if other_book.language == book.language)
+        assert reader.symbols.bytes_saved > 0
+
 
 class TestBooksInventory:
 
@@ -1,9 +1,20 @@
 from datetime import date, datetime
 from typing import List
+import shutil
 
 import pytest
+from werkzeug.security import generate_password_hash, check_password_hash
+
 from capitulo.domain.model import Publisher, Author, Book, Review, User, BooksInventory, make_review
 from capitulo.adapters.repository import RepositoryException
+from capitulo.adapters.csv_data_importer import hash_passwords, is_password_hash, read_users_file
+from capitulo.adapters import snapshot, memory_repository
+from capitulo.adapters.memory_repository import MemoryRepository
+from capitulo.adapters.facet_index import FacetIndex, build_facet_index
+
+from utils import get_project_root
+
+TEST_DATA_PATH = get_project_root() / "tests" / "data"
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -28,6 +39,22 @@ def test_repository_does_not_retrieve_a_non_existent_user(in_memory_repo):
     assert user is None
 
 
+def test_repository_user_names_are_case_sensitive(in_memory_repo):
+    user = User('Keitel', '358473723')
+    in_memory_repo.add_user(user)
+    assert in_memory_repo.get_user(' Keitel ') is user
+    assert in_memory_repo.get_user('keitel') is None
+
+
+def test_repository_keeps_first_user_with_a_name(in_memory_repo):
+    user = User('keitel', '358473723')
+    in_memory_repo.add_user(user)
+    in_memory_repo.add_user(User('keitel', '999999999'))
+    assert in_memory_repo.get_user('keitel') is user
+    assert in_memory_repo.get_number_of_users() == 4
+    assert in_memory_repo.get_users()[-1] is user
+
+
 def test_repository_can_retrieve_book_count(in_memory_repo):
     number_of_books = in_memory_repo.get_number_of_books()
     assert number_of_books == 20
@@ -246,3 +273,222 @@ def test_repository_can_retrieve_reviews(in_memory_repo):
     in_memory_repo.add_review(review2)
     assert len(in_memory_repo.get_reviews()) == 3
 
+
+
+def test_repository_can_remove_book(in_memory_repo):
+    book = in_memory_repo.get_book(707611)
+    in_memory_repo.remove_book(book)
+    assert in_memory_repo.get_book(707611) is None
+    assert in_memory_repo.get_number_of_books() == 19
+    assert in_memory_repo.get_book_ids_for_year(1997) is None
+    assert 1997 not in in_memory_repo.get_release_years()
+
+
+def test_repository_reindexes_updated_book(in_memory_repo):
+    book = in_memory_repo.get_book(27036539)
+    in_memory_repo.add_book(book)
+    assert in_memory_repo.get_number_of_books() == 20
+
+    book.release_year = 3000
+    in_memory_repo.update_book(book)
+    assert 27036539 not in in_memory_repo.get_book_ids_for_year(2016)
+    assert in_memory_repo.get_book_ids_for_year(3000) == [27036539]
+
+
+def test_repository_indexes_book_ids_in_order(in_memory_repo):
+    book = Book(1, "First")
+    book.publisher = Publisher("Avatar Press")
+    in_memory_repo.add_book(book)
+    book_ids = in_memory_repo.get_book_ids_for_publisher("Avatar Press")
+    assert book_ids[0] == 1
+    assert book_ids == sorted(book_ids)
+
+
+def test_repository_adds_books_out_of_order_in_a_batch(in_memory_repo):
+    books = [Book(book_id, f"Book {book_id}") for book_id in (5, 2, 27036539, 3)]
+    for book in books:
+        book.publisher = Publisher("Avatar Press")
+        book.release_year = 2016
+    replaced = in_memory_repo.get_book(27036539)
+    in_memory_repo.add_books(books)
+
+    assert in_memory_repo.get_number_of_books() == 23
+    assert in_memory_repo.get_first_book().book_id == 2
+    assert in_memory_repo.get_book(27036539) is books[2]
+    assert replaced.book_id not in in_memory_repo.get_book_ids_for_language(replaced.language)
+    for book_ids in (in_memory_repo.get_book_ids_for_publisher("Avatar Press"),
+                     in_memory_repo.get_book_ids_for_year(2016)):
+        assert {2, 3, 5, 27036539} <= set(book_ids)
+        assert book_ids == sorted(book_ids)
+
+
+def test_repository_can_search_books(in_memory_repo):
+    # Every word must match, as a prefix, somewhere in the book.
+    assert in_memory_repo.search_book_ids("war stories") == [27036536, 27036539]
+    assert in_memory_repo.search_book_ids("urasa centu") == [12349663, 12349665, 13340336]
+    assert in_memory_repo.search_book_ids("japanese") == [17405342]
+    assert in_memory_repo.search_book_ids("marvel 2016") == []
+    assert in_memory_repo.search_book_ids("") == []
+
+
+def test_repository_search_ranks_title_matches_first(in_memory_repo):
+    # "Martin" is an author of both books; only one has "Martin" in the title.
+    book = Book(1, "Martin's Comics")
+    in_memory_repo.add_book(book)
+    results = in_memory_repo.search_book_ids("martin")
+    assert results[0] == 1
+    assert set(results) == {1, 27036536, 35452242}
+
+
+def test_repository_search_follows_removed_books(in_memory_repo):
+    in_memory_repo.remove_book(in_memory_repo.get_book(27036536))
+    assert in_memory_repo.search_book_ids("war") == [27036539]
+
+
+def test_repository_can_get_page_of_book_ids(in_memory_repo):
+    assert in_memory_repo.get_book_ids_page('release_year', 2016, 0, 4) == ([27036536, 27036537, 27036538, 27036539], 5)
+    assert in_memory_repo.get_book_ids_page('release_year', 2016, 4, 4) == ([30128855], 5)
+    assert in_memory_repo.get_book_ids_page('publisher', "Avatar Press", 8, 4) == ([], 4)
+    assert in_memory_repo.get_book_ids_page('language', "Klingon", 0, 4) == ([], 0)
+    assert in_memory_repo.get_book_ids_page('search', "war", 1, 4) == ([27036539], 2)
+
+
+def test_hash_passwords_keeps_hashed_passwords():
+    password_hash = generate_password_hash('cLQ^C#oFXloS')
+    hashes = hash_passwords([password_hash, 'mvNNbc1eLA$i'])
+    assert hashes[0] == password_hash
+    assert is_password_hash(hashes[1])
+    assert check_password_hash(hashes[1], 'mvNNbc1eLA$i')
+
+
+def test_passwords_that_only_look_hashed_are_hashed():
+    assert is_password_hash(generate_password_hash('cLQ^C#oFXloS'))
+    look_alikes = ['pbkdf2:my$secret$password', 'pbkdf2:sha256:0$salt$' + '0' * 64,
+                   'pbkdf2:sha256:150000$salt$not-hex', 'pbkdf2:sha256:150000$salt$abcdef',
+                   'pbkdf2:nohash:150000$salt$' + '0' * 64]
+    for password in look_alikes:
+        assert not is_password_hash(password)
+    hashes = hash_passwords(look_alikes)
+    for password, password_hash in zip(look_alikes, hashes):
+        assert check_password_hash(password_hash, password)
+
+
+def test_memory_populate_reuses_saved_hashes(tmp_path):
+    cache_path = tmp_path / "password-hashes.json"
+    repo = MemoryRepository()
+    memory_repository.populate(TEST_DATA_PATH, repo, processes=1, password_hash_cache=cache_path)
+    assert cache_path.exists()
+
+    other_repo = MemoryRepository()
+    memory_repository.populate(TEST_DATA_PATH, other_repo, password_hash_cache=cache_path)
+    assert other_repo.get_user('thorke').password == repo.get_user('thorke').password
+
+
+def test_read_users_file_reuses_saved_hashes(tmp_path):
+    users_filename = tmp_path / "users.csv"
+    shutil.copy(TEST_DATA_PATH / "users.csv", users_filename)
+    cache_path = tmp_path / "password-hashes.json"
+
+    users = read_users_file(str(users_filename), hash_cache_path=cache_path)
+    assert [user[1] for user in users] == ['thorke', 'fmercury', 'tyler']
+    assert check_password_hash(users[0][2], 'cLQ^C#oFXloS')
+
+    # Hashes are salted, so getting the same ones back shows nothing was hashed again.
+    assert read_users_file(str(users_filename), hash_cache_path=cache_path) == users
+
+    with open(users_filename, 'a') as users_file:
+        users_file.write('\n4,newuser,newpassword1\n')
+    assert [user[1] for user in read_users_file(str(users_filename), hash_cache_path=cache_path)][-1] == 'newuser'
+
+
+def test_snapshot_round_trip(in_memory_repo, tmp_path):
+    snapshot_path = tmp_path / "repository.snapshot"
+    digest = snapshot.source_digest(TEST_DATA_PATH)
+    snapshot.save_snapshot(in_memory_repo, snapshot_path, digest)
+
+    loaded_repo = snapshot.load_snapshot(snapshot_path, digest)
+    assert loaded_repo is not in_memory_repo
+    assert loaded_repo.get_all_books() == in_memory_repo.get_all_books()
+    assert loaded_repo.get_number_of_users() == in_memory_repo.get_number_of_users()
+    assert len(loaded_repo.get_reviews()) == len(in_memory_repo.get_reviews())
+    assert loaded_repo.get_book_ids_for_year(2016) == in_memory_repo.get_book_ids_for_year(2016)
+    assert loaded_repo.search_book_ids("war") == [27036536, 27036539]
+
+    # Books keep pointing at the same Publisher and User objects as the repository's other books and reviews.
+    book = loaded_repo.get_book(27036536)
+    assert book.publisher is loaded_repo.get_book(27036539).publisher
+
+
+def test_snapshot_is_ignored_when_out_of_date(in_memory_repo, tmp_path):
+    snapshot_path = tmp_path / "repository.snapshot"
+    assert snapshot.load_snapshot(snapshot_path, b'\0' * 32) is None
+
+    snapshot.save_snapshot(in_memory_repo, snapshot_path, snapshot.source_digest(TEST_DATA_PATH))
+    assert snapshot.load_snapshot(snapshot_path, b'\0' * 32) is None
+
+    snapshot_path.write_bytes(b'not a snapshot')
+    assert snapshot.load_snapshot(snapshot_path, snapshot.source_digest(TEST_DATA_PATH)) is None
+
+
+def test_facet_index_combines_filters(in_memory_repo):
+    facet_index = build_facet_index(in_memory_repo)
+    selected = facet_index.select({'language': ['English'], 'release_year': [2016], 'publisher': ['Avatar Press']})
+    assert facet_index.book_ids(selected) == [27036536, 27036537, 27036538, 27036539]
+    assert facet_index.book_ids(selected, offset=1, limit=2) == [27036537, 27036538]
+    # Values of one facet match books with any of them.
+    selected = facet_index.select({'release_year': [1997, 2006]})
+    assert facet_index.book_ids(selected) == in_memory_repo.get_book_ids_for_year(1997) + \
+           in_memory_repo.get_book_ids_for_year(2006)
+    assert facet_index.select({'publisher': ['Penguin']}) == 0
+
+
+def test_facet_index_counts_leave_out_a_facets_own_filter():
+    facet_index = FacetIndex([1, 2, 3, 4], {
+        'language': {'English': [1, 2, 3], 'French': [4]},
+        'release_year': {2016: [1, 4], 2017: [2, 3]}
+    })
+    counts = facet_index.counts({'language': ['English']})
+    assert counts['language'] == {'English': 3, 'French': 1}
+    assert counts['release_year'] == {2016: 1, 2017: 2}
+    counts = facet_index.counts({'language': ['French'], 'release_year': [2016]})
+    assert counts['language'] == {'English': 1, 'French': 1}
+    # Values that would match nothing may be left out.
+    assert counts['release_year'].get(2016) == 1 and counts['release_year'].get(2017, 0) == 0
+
+
+def test_repository_counts_books_per_facet(in_memory_repo):
+    facet_counts = in_memory_repo.get_facet_counts()
+    assert facet_counts['language']['English'] == 15
+    assert facet_counts['publisher']['Avatar Press'] == 4
+    assert facet_counts['author'][14965] == 2
+    assert facet_counts['release_year'][2016] == 5
+
+    book = Book(1, 'A new book')
+    book.release_year = 2016
+    in_memory_repo.add_book(book)
+    in_memory_repo.remove_book(in_memory_repo.get_book(27036539))
+    facet_counts = in_memory_repo.get_facet_counts()
+    assert facet_counts['release_year'][2016] == 5
+    assert facet_counts['publisher']['Avatar Press'] == 3
+
+
+def test_repository_pages_through_a_category_by_book_id(in_memory_repo):
+    book_ids = in_memory_repo.get_book_ids_for_language('English')
+    assert in_memory_repo.count_book_ids('language', 'English') == len(book_ids)
+
+    pages = []
+    after = None
+    while True:
+        page = in_memory_repo.get_book_ids_after('language', 'English', after, 4)
+        if len(page) == 0:
+            break
+        pages.append(page)
+        after = page[-1]
+    assert [book_id for page in pages for book_id in page] == book_ids
+    assert all(len(page) == 4 for page in pages[:-1])
+    assert in_memory_repo.get_book_ids_after('language', 'Klingon', None, 4) == []
+
+
+def test_repository_does_not_page_search_results_by_book_id(in_memory_repo):
+    with pytest.raises(RepositoryException):
+        in_memory_repo.get_book_ids_after('search', 'war', None, 4)
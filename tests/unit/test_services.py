@@ -5,7 +5,9 @@ import pytest
 from capitulo.authentication.services import AuthenticationException
 from capitulo.books import services as books_services
 from capitulo.authentication import services as auth_services
+from capitulo.home import services as home_services
 from capitulo.books.services import NonExistentBookException
+from capitulo.domain.model import Book
 from capitulo.reading_list import services as read_services
 from capitulo.utilities import services as util_services
 
@@ -332,3 +334,63 @@ def test_cannot_remove_book_from_reading_list_without_book(in_memory_repo):
         read_services.add_book_to_reading_list(None, 'dogdog', in_memory_repo)
     with pytest.raises(read_services.NonExistentBookException):
         read_services.add_book_to_reading_list(3567543, 'dogdog', in_memory_repo)
+
+
+def test_browse_books_by_several_facets(in_memory_repo):
+    filters = {'language': ['English'], 'release_year': [2016], 'author': [14965]}
+    page, facets = books_services.browse_books(filters, 1, 4, in_memory_repo)
+    assert page.book_ids == [27036536, 27036539]
+    assert page.total == 2
+
+    languages = {facet_value['label']: facet_value['count'] for facet_value in facets['language']}
+    assert languages['English'] == 2
+    authors = {facet_value['value']: facet_value for facet_value in facets['author']}
+    assert authors[14965]['label'] == 'Garth Ennis'
+
+
+def test_browse_books_follows_added_books(in_memory_repo):
+    books_services.browse_books({}, 1, 4, in_memory_repo)
+    book = Book(1, 'A new book')
+    book.language = 'wel'
+    in_memory_repo.add_book(book)
+
+    page, facets = books_services.browse_books({'language': ['Welsh']}, 1, 4, in_memory_repo)
+    assert page.book_ids == [1]
+
+
+def test_get_books_by_id_counts_the_reviews_of_each_book(in_memory_repo):
+    books_services.add_review(27036539, 'A story to remember', 'thorke', 5, in_memory_repo)
+    books_as_dict = books_services.get_books_by_id([27036539, 23272155], in_memory_repo)
+
+    assert [book['number_of_reviews'] for book in books_as_dict] == [
+        len(in_memory_repo.get_book(27036539).reviews), len(in_memory_repo.get_book(23272155).reviews)]
+    assert books_as_dict[0]['number_of_reviews'] > 0
+    assert 'reviews' not in books_as_dict[0]
+
+
+def test_views_of_books_are_cached_and_read_only(in_memory_repo):
+    books_as_dict = books_services.get_books_by_id([27036539, 23272155], in_memory_repo)
+
+    assert books_services.get_books_by_id([23272155, 27036539], in_memory_repo) == books_as_dict[::-1]
+    assert books_services.get_books_by_id([27036539], in_memory_repo)[0] is books_as_dict[0]
+    with pytest.raises(TypeError):
+        books_as_dict[0]['title'] = 'Another title'
+
+
+def test_home_and_books_services_share_views_of_books(in_memory_repo):
+    books_as_dict = books_services.get_books_by_id([27036539], in_memory_repo)
+
+    assert home_services.get_books_by_id([27036539], in_memory_repo)[0] is books_as_dict[0]
+
+
+def test_adding_a_review_rebuilds_the_views_of_its_book(in_memory_repo):
+    book_as_dict = books_services.get_book(27036539, in_memory_repo)
+    other_book_as_dict = books_services.get_book(23272155, in_memory_repo)
+
+    books_services.add_review(27036539, 'A story to remember', 'thorke', 5, in_memory_repo)
+    number_of_reviews = len(in_memory_repo.get_book(27036539).reviews)
+
+    assert number_of_reviews > len(book_as_dict['reviews'])
+    assert len(books_services.get_book(27036539, in_memory_repo)['reviews']) == number_of_reviews
+    assert books_services.get_books_by_id([27036539], in_memory_repo)[0]['number_of_reviews'] == number_of_reviews
+    assert books_services.get_book(23272155, in_memory_repo) is other_book_as_dict
@@ -2,11 +2,13 @@ from datetime import date, datetime
 
 import pytest
 import sqlalchemy
+from sqlalchemy import event
 
 import capitulo.adapters.repository as repo
 from capitulo.adapters.database_repository import SqlAlchemyRepository
 from capitulo.domain.model import Publisher, Author, Book, Review, User, BooksInventory, make_review
 from capitulo.adapters.repository import RepositoryException
+from capitulo.books.services import books_to_dict
 
 
 def test_repository_can_add_a_user(session_factory):
@@ -61,6 +63,40 @@ def test_repository_can_add_book(session_factory):
 
     assert repo.get_book(12345689 + number_of_books) == book
 
+def test_repository_can_add_books_in_batches(session_factory):
+    repo = SqlAlchemyRepository(session_factory, batch_size=2)
+    publisher = Publisher("Batch Press")
+    author = Author(99999999, "Batch Author")
+    books = []
+    for book_id in range(1, 6):
+        book = Book(book_id, f"Batch Book {book_id}")
+        book.publisher = publisher
+        book.add_author(author)
+        books.append(book)
+
+    repo.add_books(books)
+
+    assert repo.get_number_of_books() == 25
+    assert repo.get_book(5).title == "Batch Book 5"
+    assert repo.get_book(5).authors[0].full_name == "Batch Author"
+    assert repo.get_book_ids_for_publisher("Batch Press") == [1, 2, 3, 4, 5]
+    assert repo.get_publishers().count("Batch Press") == 1
+
+
+def test_repository_can_add_users_and_reviews_in_batches(session_factory):
+    repo = SqlAlchemyRepository(session_factory, batch_size=2)
+    users = [User(f'batchuser{number}', '123456789') for number in range(3)]
+    repo.add_users(users)
+    assert repo.get_number_of_users() == 6
+    assert repo.get_user('batchuser2') is users[2]
+
+    book = repo.get_book(707611)
+    reviews = [make_review(book, f"Batch review {number}", 4, users[number]) for number in range(3)]
+    repo.add_reviews(reviews)
+    assert repo.get_number_of_reviews() == 9
+    assert all(review in repo.get_reviews() for review in reviews)
+
+
 def test_repository_can_retrieve_book(session_factory):
     repo = SqlAlchemyRepository(session_factory)
 
@@ -199,6 +235,39 @@ def test_repository_can_get_books_by_publisher(session_factory):
     assert collection[0].title == "Superman Archives, Vol. 2"
 
 
+def count_statements(session_factory, function):
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session_factory.kw['bind']
+    event.listen(engine, 'before_cursor_execute', record_statement)
+    try:
+        function()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record_statement)
+    return len(statements)
+
+
+@pytest.mark.parametrize(('method', 'many', 'few'), (
+        ('get_books_by_language', 'English', 'French'),
+        ('get_books_by_publisher', 'Avatar Press', 'DC Comics'),
+        ('get_books_by_author', 'Garth Ennis', 'Florence Dupre la Tour'),
+))
+def test_repository_gets_books_by_category_in_constant_statements(session_factory, method, many, few):
+    repo = SqlAlchemyRepository(session_factory)
+
+    def get_books_as_dict(category):
+        repo.reset_session()
+        books = books_to_dict(getattr(repo, method)(category))
+        assert len(books) > 0
+        return books
+
+    assert count_statements(session_factory, lambda: get_books_as_dict(many)) == \
+           count_statements(session_factory, lambda: get_books_as_dict(few))
+
+
 def test_repository_can_get_books_by_title(session_factory):
     repo = SqlAlchemyRepository(session_factory)
     collection = repo.get_books_by_title("Superman Archives, Vol. 2")
@@ -219,6 +288,13 @@ def test_repository_returns_book_ids_for_existing_author(session_factory):
     assert book_ids == [30128855]
 
 
+def test_repository_returns_book_ids_for_author_unique_id(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+
+    assert repo.get_book_ids_for_author(14965) == repo.get_book_ids_for_author('Garth Ennis')
+    assert repo.get_book_ids_for_author(1) == []
+
+
 def test_repository_returns_book_ids_for_existing_publisher(session_factory):
     repo = SqlAlchemyRepository(session_factory)
 
@@ -233,7 +309,7 @@ def test_repository_returns_book_ids_for_existing_language(session_factory):
     repo = SqlAlchemyRepository(session_factory)
 
     book_ids = repo.get_book_ids_for_language('English')
-    assert book_ids == [25742454, 13571772, 35452242, 707611, 2250580, 27036536, 27036539, 27036537, 27036538, 11827783, 12349665, 12349663, 30735315, 2168737, 18955715]
+    assert book_ids == [25742454, 13571772, 35452242, 707611, 2250580, 27036536, 27036537, 27036538, 27036539, 11827783, 12349665, 12349663, 30735315, 2168737, 18955715]
 
 
 def test_repository_returns_book_ids_for_release_year(session_factory):
@@ -345,4 +421,162 @@ def test_repository_can_get_release_years(session_factory):
     repo = SqlAlchemyRepository(session_factory)
 
     results = repo.get_release_years()
-    assert len(results) == 8
\ No newline at end of file
+    assert len(results) == 8
+
+def test_repository_can_search_books(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+
+    assert repo.search_book_ids("war stories") == [27036536, 27036539]
+    assert repo.search_book_ids("avatar ennis") == [27036536, 27036539]
+
+    book = Book(1, "Stories of the War")
+    repo.add_book(book)
+    assert repo.search_book_ids("war stories") == [1, 27036536, 27036539]
+
+
+def test_repository_can_get_page_of_book_ids(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+
+    assert repo.get_book_ids_page('release_year', 2016, 0, 4) == ([27036536, 27036537, 27036538, 27036539], 5)
+    assert repo.get_book_ids_page('release_year', 2016, 4, 4) == ([30128855], 5)
+    assert repo.get_book_ids_page('author', 14965, 0, 4) == ([27036536, 27036539], 2)
+    assert repo.get_book_ids_page('language', "Klingon", 0, 4) == ([], 0)
+
+
+def test_repository_counts_books_per_facet(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+
+    facet_counts = repo.get_facet_counts()
+    assert facet_counts['language']['English'] == len(repo.get_book_ids_for_language('English'))
+    assert facet_counts['publisher']['DC Comics'] == len(repo.get_book_ids_for_publisher('DC Comics'))
+    assert facet_counts['author'][14965] == 2
+    assert facet_counts['release_year'][2016] == 5
+
+
+def test_instrumentation_counts_sql_statements_of_repository_calls(session_factory):
+    from flask import Flask, g
+    from capitulo.instrumentation import instrumentation
+
+    repo = SqlAlchemyRepository(session_factory)
+    metrics = instrumentation.Metrics()
+    instrumentation.instrument_repository(repo, metrics)
+    instrumentation.instrument_engine(session_factory.kw['bind'], metrics)
+
+    app = Flask(__name__)
+    with app.test_request_context():
+        timings = g.request_timings = instrumentation.RequestTimings()
+        repo.get_book(25742454)
+        repo.get_facet_counts()
+    assert timings.repository_calls['get_book'][0] == 1
+    assert timings.repository_calls['get_facet_counts'][0] == 1
+    assert timings.sql.statements >= 5
+    assert timings.sql.by_repository_method['get_book'] == 1
+    assert 'capitulo_sql_statements_total' in metrics.prometheus_text()
+
+
+def test_count_statements_flags_repeated_statements_and_enforces_a_budget(session_factory):
+    from capitulo.instrumentation.statements import count_statements, StatementBudgetExceeded
+
+    repo = SqlAlchemyRepository(session_factory)
+    engine = session_factory.kw['bind']
+    book_ids = repo.get_book_ids_all()[:6]
+
+    with count_statements(engine, budget=1) as counter:
+        repo.get_books_by_id(book_ids)
+    assert counter.statements == 1
+    assert counter.n_plus_one_candidates() == {}
+
+    with pytest.raises(StatementBudgetExceeded):
+        with count_statements(engine, budget=3) as counter:
+            for book_id in book_ids:
+                repo.get_book(book_id)
+    # The same query for six ids is one shape, run six times
+    [(shape, count)] = counter.n_plus_one_candidates().items()
+    assert count == 6
+    assert shape.startswith('SELECT')
+
+
+def test_engine_factory_sets_sqlite_pragmas_and_pool(tmp_path):
+    from sqlalchemy.pool import QueuePool
+    from capitulo.adapters.engine_factory import create_database_engine
+
+    engine = create_database_engine(f'sqlite:///{tmp_path / "pragmas.db"}', pool='queue', pool_size=2,
+                                    sqlite_pragmas={'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                                                    'cache_size': -2048, 'mmap_size': ''})
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 2
+    with engine.connect() as connection:
+        assert connection.execute(sqlalchemy.text('PRAGMA journal_mode')).scalar() == 'wal'
+        # NORMAL
+        assert connection.execute(sqlalchemy.text('PRAGMA synchronous')).scalar() == 1
+        assert connection.execute(sqlalchemy.text('PRAGMA cache_size')).scalar() == -2048
+        # Left as SQLite has it
+        assert connection.execute(sqlalchemy.text('PRAGMA mmap_size')).scalar() == 0
+
+    with pytest.raises(ValueError):
+        create_database_engine('sqlite://', pool='shared')
+
+
+def test_listing_and_detail_loading_take_a_fixed_number_of_statements(session_factory):
+    from capitulo.adapters.repository import BOOK_LISTING, BOOK_DETAIL
+    from capitulo.books.services import book_to_dict, books_to_listing_dict
+    from capitulo.instrumentation.statements import count_statements
+
+    repo = SqlAlchemyRepository(session_factory)
+    engine = session_factory.kw['bind']
+    book_ids = [book.book_id for book in repo.get_all_books()]
+    repo.reset_session()
+
+    # The books, their authors and their reviews; the publishers are joined to the books
+    with count_statements(engine, budget=3):
+        listing = books_to_listing_dict(repo.get_books_by_id(book_ids, BOOK_LISTING))
+    assert len(listing) == len(book_ids)
+    assert sum(book['number_of_reviews'] for book in listing) == repo.get_number_of_reviews()
+
+    repo.reset_session()
+    # The reviews' users and books are joined to the reviews
+    with count_statements(engine, budget=3):
+        book = book_to_dict(repo.get_book(707611, BOOK_DETAIL))
+    assert [review['user_name'] for review in book['reviews']] == ['thorke'] * 3
+
+    with pytest.raises(ValueError):
+        repo.get_book(707611, 'everything')
+
+
+def test_repository_pages_through_a_category_by_book_id(session_factory):
+    from capitulo.instrumentation.statements import count_statements
+
+    repo = SqlAlchemyRepository(session_factory)
+    book_ids = sorted(repo.get_book_ids_for_publisher('Avatar Press'))
+
+    assert repo.get_book_ids_after('publisher', 'Avatar Press', None, 2) == book_ids[:2]
+    assert repo.get_book_ids_after('publisher', 'Avatar Press', book_ids[1], 2) == book_ids[2:4]
+    assert repo.get_book_ids_after('author', 14965, None, None) == sorted(repo.get_book_ids_for_author(14965))
+
+    assert repo.count_book_ids('publisher', 'Avatar Press') == len(book_ids)
+    # The count is kept until the books change
+    with count_statements(session_factory.kw['bind'], budget=0):
+        assert repo.count_book_ids('publisher', 'Avatar Press') == len(book_ids)
+
+
+def test_book_views_are_rebuilt_for_reviews_added_by_other_workers(session_factory):
+    from capitulo.adapters.repository import BOOK_LISTING
+    from capitulo.utilities.book_views import BookViewCache, books_to_listing_dict
+
+    # Two repositories over the same database, as two workers would have
+    repo = SqlAlchemyRepository(session_factory)
+    other_repo = SqlAlchemyRepository(session_factory)
+    cache = BookViewCache()
+
+    def listing_view():
+        view = cache.views(repo, BOOK_LISTING, [707611],
+                           lambda book_ids: books_to_listing_dict(repo.get_books_by_id(book_ids, BOOK_LISTING)))[0]
+        repo.reset_session()
+        return view
+
+    view = listing_view()
+    assert listing_view() is view
+
+    user = other_repo.get_user('thorke')
+    other_repo.add_review(make_review(other_repo.get_book(707611), 'Read it again last week', 5, user))
+    assert listing_view()['number_of_reviews'] == view['number_of_reviews'] + 1
@@ -2,9 +2,11 @@ import pytest
 
 import datetime
 
+from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
 
 from capitulo.domain.model import User, Book, Review, make_review, Author
+from capitulo.adapters.orm import create_missing_indexes
 
 
 def insert_user(empty_session, values=None):
@@ -234,3 +236,28 @@ def test_save_reviewed_book(empty_session):
     # tables.
     rows = list(empty_session.execute('SELECT user_id, book_id, review_text, rating FROM reviews'))
     assert rows == [(user_key, book_key, review_text, rating)]
+
+
+def test_lookup_columns_are_indexed(empty_session):
+    inspector = inspect(empty_session.bind)
+
+    book_indexes = {index['name']: index for index in inspector.get_indexes('books')}
+    assert book_indexes['ix_books_book_id']['unique']
+    assert book_indexes['ix_books_language_book_id']['column_names'] == ['language', 'book_id']
+    assert {'ix_books_publisher_book_id', 'ix_books_release_year_book_id'} <= set(book_indexes)
+
+    reading_list_indexes = {index['name']: index['column_names'] for index in inspector.get_indexes('reading_lists')}
+    assert reading_list_indexes['ix_reading_lists_user_name_title'] == ['user_name', 'title']
+
+
+def test_missing_indexes_are_added_to_existing_database(empty_session):
+    engine = empty_session.bind
+    # Simulate a database created before the indexes were defined.
+    for index_name in ('ix_books_language_book_id', 'ix_reviews_book_id', 'ix_reading_lists_user_name_title'):
+        empty_session.execute(f'DROP INDEX {index_name}')
+    empty_session.commit()
+
+    assert create_missing_indexes(engine) == ['ix_books_language_book_id', 'ix_reading_lists_user_name_title',
+                                              'ix_reviews_book_id']
+    assert 'ix_books_language_book_id' in {index['name'] for index in inspect(engine).get_indexes('books')}
+    assert create_missing_indexes(engine) == []